@@ -2,23 +2,25 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
 import uuid
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-import httpx
 import jwt
 from fastapi import Depends, HTTPException, Request, Security, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jwt import algorithms
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .config import get_settings
 from .db import get_db_session
+from .http_client import http_client
 from .models import Profile
+from .services.ttl_cache import TTLCache
 
 
 @dataclass
@@ -30,42 +32,78 @@ class AuthContext:
 
 
 class JWKSVerifier:
-    """Caches JWKS and verifies RS256 JWTs (Supabase)."""
+    """Caches JWKS and verifies RS256 JWTs (Supabase).
 
-    def __init__(self, jwks_url: str, cache_ttl_seconds: int, expected_aud: str | None) -> None:
+    Public keys are parsed once per ``kid`` at refresh time, and successfully
+    verified tokens are remembered (by SHA-256 of the token) until their ``exp``.
+    The lock is only taken to refresh the key set, so concurrent requests with
+    cached keys never queue behind each other.
+    """
+
+    def __init__(
+        self,
+        jwks_url: str,
+        cache_ttl_seconds: int,
+        expected_aud: str | None,
+        verified_cache_size: int = 10_000,
+    ) -> None:
         self._jwks_url = jwks_url
         self._cache_ttl = cache_ttl_seconds
         self._expected_aud = expected_aud
-        self._jwks: dict[str, dict[str, object]] | None = None
+        self._keys: dict[str, tuple[object, str]] = {}
         self._cache_expiry: datetime | None = None
+        self._last_refresh: datetime | None = None
         self._lock = asyncio.Lock()
+        self.verified: TTLCache[dict[str, object]] = TTLCache(maxsize=verified_cache_size, ttl_seconds=0)
+
+    def _keys_fresh(self) -> bool:
+        return bool(self._keys) and self._cache_expiry is not None and datetime.now(timezone.utc) < self._cache_expiry
 
     async def _refresh(self) -> None:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(self._jwks_url)
-            resp.raise_for_status()
-            data = resp.json()
-        keys = data.get("keys", [])
-        self._jwks = {str(k["kid"]): k for k in keys if "kid" in k}
-        self._cache_expiry = datetime.now(timezone.utc) + timedelta(seconds=self._cache_ttl)
-
-    async def _get_key(self, kid: str) -> dict[str, object]:
+        resp = await http_client.request("jwks", "GET", self._jwks_url)
+        resp.raise_for_status()
+        data = resp.json()
+        keys: dict[str, tuple[object, str]] = {}
+        for k in data.get("keys", []):
+            if "kid" not in k:
+                continue
+            try:
+                keys[str(k["kid"])] = (algorithms.RSAAlgorithm.from_jwk(json.dumps(k)), str(k.get("alg", "RS256")))
+            except (jwt.InvalidKeyError, ValueError, KeyError):
+                continue
+        self._keys = keys
+        self._last_refresh = datetime.now(timezone.utc)
+        self._cache_expiry = self._last_refresh + timedelta(seconds=self._cache_ttl)
+
+    async def _get_key(self, kid: str) -> tuple[object, str]:
+        if self._keys_fresh():
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
         async with self._lock:
-            now = datetime.now(timezone.utc)
-            if not self._jwks or not self._cache_expiry or now >= self._cache_expiry:
+            # Another request may have refreshed while we waited for the lock.
+            if not self._keys_fresh():
                 await self._refresh()
-            if not self._jwks:
+            if not self._keys:
                 raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="JWKS unavailable")
-            key = self._jwks.get(kid)
-            if key is None:
+            key = self._keys.get(kid)
+            recently = self._last_refresh and datetime.now(timezone.utc) - self._last_refresh < timedelta(
+                seconds=_MIN_ROTATION_REFRESH_SECONDS
+            )
+            if key is None and not recently:
                 # key rotation: refresh once
                 await self._refresh()
-                key = self._jwks.get(kid) if self._jwks else None
+                key = self._keys.get(kid)
             if key is None:
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unknown signing key")
             return key
 
     async def verify(self, token: str) -> dict[str, object]:
+        token_hash = hashlib.sha256(token.encode("utf-8")).digest()
+        cached = self.verified.get(token_hash)
+        if cached is not None:
+            return cached
+
         try:
             headers = jwt.get_unverified_header(token)
         except jwt.PyJWTError as exc:  # type: ignore[attr-defined]
@@ -75,40 +113,73 @@ class JWKSVerifier:
         if not kid:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing key id")
 
-        key_dict = await self._get_key(str(kid))
-        key = algorithms.RSAAlgorithm.from_jwk(json.dumps(key_dict))
-        audience = settings.supabase_expected_aud or None
+        key, alg = await self._get_key(str(kid))
+        audience = self._expected_aud
 
         try:
             payload: dict[str, object] = jwt.decode(
                 token,
                 key=key,
-                algorithms=[str(key_dict.get("alg", "RS256"))],
+                algorithms=[alg],
                 audience=audience,
                 options={"verify_aud": audience is not None},
             )
         except jwt.PyJWTError as exc:  # type: ignore[attr-defined]
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
 
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            # Only reuse the result while the token itself is still valid.
+            self.verified.set(token_hash, payload, ttl_seconds=exp - datetime.now(timezone.utc).timestamp())
         return payload
 
 
+# An unknown kid only forces a JWKS refetch if the last one is older than this,
+# so tokens with bogus key ids cannot trigger a refresh per request.
+_MIN_ROTATION_REFRESH_SECONDS = 30
+
 settings = get_settings()
 _verifier = JWKSVerifier(
     jwks_url=str(settings.supabase_jwks_url),
     cache_ttl_seconds=settings.jwks_cache_ttl_seconds,
     expected_aud=settings.supabase_expected_aud or None,
+    verified_cache_size=settings.jwt_verified_cache_size,
 )
 
 # Expose an HTTP Bearer scheme so FastAPI adds it to OpenAPI (/docs -> “Authorize”)
 bearer_scheme = HTTPBearer(bearerFormat="JWT", auto_error=False)
 
 
+# user_id -> owner_id, so repeat requests skip the profiles round trip.
+owner_cache: TTLCache[uuid.UUID] = TTLCache(
+    maxsize=settings.auth_owner_cache_size,
+    ttl_seconds=settings.auth_owner_cache_ttl_seconds,
+)
+
+
+def invalidate_owner_cache(user_id: uuid.UUID | None = None) -> None:
+    """Forget a user's cached owner (or everyone's when ``user_id`` is None)."""
+    if user_id is None:
+        owner_cache.clear()
+    else:
+        owner_cache.pop(user_id)
+
+
+@event.listens_for(Profile, "after_update")
+@event.listens_for(Profile, "after_delete")
+def _profile_changed(mapper, connection, target: Profile) -> None:
+    invalidate_owner_cache(target.user_id)
+
+
 async def _owner_from_profiles(session: AsyncSession, user_id: uuid.UUID) -> uuid.UUID:
+    cached = owner_cache.get(user_id)
+    if cached is not None:
+        return cached
     result = await session.execute(select(Profile.owner_id).where(Profile.user_id == user_id))
     owner_id = result.scalar_one_or_none()
     if not owner_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Profile not linked to owner")
+    owner_cache.set(user_id, owner_id)
     return owner_id
 
 
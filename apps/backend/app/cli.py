@@ -0,0 +1,128 @@
+"""Command-line tools that run against the configured database.
+
+Run from ``apps/backend`` with the same environment as the API::
+
+    python -m app.cli compliance --owner-id <uuid> --from 2024-09-01 --to 2024-10-01
+    python -m app.cli import-paddocks --owner-id <uuid> --farm-id <uuid> paddocks.geojson
+
+The compliance report is written to stdout as CSV, or as the API's JSON with
+``--json``. The exit status is 1 when any application fails. Paddock imports
+print the same JSON as the import endpoint and exit 1 if any feature failed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import sys
+import uuid
+from collections.abc import AsyncIterator
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi import HTTPException
+
+from .db import AsyncSessionFactory, engine
+from .schemas import ApplicationExportFilter
+from .services.compliance import compliance_report
+from .services.ownership import ensure_farm
+from .services.paddock_import import import_paddocks
+
+_READ_CHUNK_BYTES = 256 * 1024
+
+
+def _timestamp(value: str) -> datetime:
+    at = datetime.fromisoformat(value)
+    return at if at.tzinfo is not None else at.replace(tzinfo=timezone.utc)
+
+
+async def _compliance(args: argparse.Namespace) -> int:
+    filters = ApplicationExportFilter(
+        started_from=args.started_from,
+        started_to=args.started_to,
+        farm_id=args.farm_id,
+        paddock_id=args.paddock_id,
+        finalized=True if args.finalized_only else None,
+    )
+    try:
+        async with AsyncSessionFactory() as session:
+            report = await compliance_report(session, args.owner_id, filters)
+    finally:
+        await engine.dispose()
+
+    if args.json:
+        sys.stdout.write(report.model_dump_json(by_alias=True, indent=2) + "\n")
+    else:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["application_id", "started_at", "verdict", "delta_t", "wind_speed_ms", "violations"])
+        for result in report.results:
+            writer.writerow(
+                [
+                    result.application_id,
+                    result.started_at.isoformat(),
+                    result.verdict,
+                    "" if result.delta_t is None else result.delta_t,
+                    "" if result.wind_speed_ms is None else result.wind_speed_ms,
+                    ";".join(result.violations),
+                ]
+            )
+    summary = ", ".join(f"{key}={value}" for key, value in report.summary.items())
+    print(summary, file=sys.stderr)
+    return 1 if report.summary["fail"] else 0
+
+
+async def _read_chunks(path: Path) -> AsyncIterator[bytes]:
+    with path.open("rb") as handle:
+        while chunk := handle.read(_READ_CHUNK_BYTES):
+            yield chunk
+
+
+async def _import_paddocks(args: argparse.Namespace) -> int:
+    path: Path = args.path
+    file_format = args.format or ("kml" if path.suffix.lower() == ".kml" else "geojson")
+    try:
+        async with AsyncSessionFactory() as session:
+            await ensure_farm(session, args.farm_id, args.owner_id)
+            result = await import_paddocks(session, args.owner_id, args.farm_id, _read_chunks(path), file_format)
+            if args.dry_run:
+                await session.rollback()
+            else:
+                await session.commit()
+    except HTTPException as e:
+        print(e.detail, file=sys.stderr)
+        return 2
+    finally:
+        await engine.dispose()
+    sys.stdout.write(result.model_dump_json(indent=2) + "\n")
+    return 1 if result.failed else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compliance = commands.add_parser("compliance", help="Check applications against the spray-condition rules")
+    compliance.add_argument("--owner-id", type=uuid.UUID, required=True)
+    compliance.add_argument("--from", dest="started_from", type=_timestamp, help="ISO date/time; UTC if no offset")
+    compliance.add_argument("--to", dest="started_to", type=_timestamp, help="ISO date/time; UTC if no offset")
+    compliance.add_argument("--farm-id", type=uuid.UUID)
+    compliance.add_argument("--paddock-id", type=uuid.UUID)
+    compliance.add_argument("--finalized-only", action="store_true")
+    compliance.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    compliance.set_defaults(handler=_compliance)
+
+    paddocks = commands.add_parser("import-paddocks", help="Create or update a farm's paddocks from GeoJSON or KML")
+    paddocks.add_argument("path", type=Path)
+    paddocks.add_argument("--owner-id", type=uuid.UUID, required=True)
+    paddocks.add_argument("--farm-id", type=uuid.UUID, required=True)
+    paddocks.add_argument("--format", choices=("geojson", "kml"), help="Defaults from the file extension")
+    paddocks.add_argument("--dry-run", action="store_true", help="Validate and report without saving")
+    paddocks.set_defaults(handler=_import_paddocks)
+
+    args = parser.parse_args(argv)
+    return asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 
-from pydantic import AnyHttpUrl, Field, field_validator
+from pydantic import AnyHttpUrl, Field, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -17,7 +17,63 @@ class Settings(BaseSettings):
     supabase_expected_aud: str = "authenticated"
     public_record_base_url: AnyHttpUrl
     environment: str = "development"
+    metrics_token: str | None = None
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 10.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    db_pgbouncer: bool = False
+    db_statement_cache_size: int = 100
+    db_echo: bool = False
     jwks_cache_ttl_seconds: int = 3600
+    jwt_verified_cache_size: int = 10_000
+    auth_owner_cache_size: int = 10_000
+    auth_owner_cache_ttl_seconds: float = 300.0
+    supabase_url: str | None = None
+    supabase_service_role_key: str | None = None
+    supabase_bucket: str | None = None
+    pdf_render_workers: int = 2
+    pdf_render_max_queue: int = 16
+    pdf_render_timeout_seconds: float = 30.0
+    pdf_render_max_tasks_per_worker: int = 50
+    pdf_render_retry_after_seconds: int = 5
+    pdf_cache_memory_max_bytes: int = 64 * 1024 * 1024
+    pdf_cache_dir: str | None = None
+    pdf_cache_disk_max_bytes: int = 512 * 1024 * 1024
+    pdf_combined_max_records: int = 500
+    pdf_combined_chunk_records: int = 25
+    pdf_warmup_on_startup: bool = False
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_max_connections_per_host: int = 10
+    http_keepalive_expiry_seconds: float = 30.0
+    http_storage_timeout_seconds: float = 60.0
+    http_jwks_timeout_seconds: float = 10.0
+    http_weather_timeout_seconds: float = 10.0
+    # Over twice the poll interval, so a poll running late still leaves a fresh reading stored.
+    weather_cache_max_age_seconds: float = 150.0
+    weather_poll_interval_seconds: float = 60.0
+    weather_poll_concurrency: int = 8
+    weather_nearest_max_gap_seconds: float = 900.0
+    sync_cursor_settle_seconds: float = 10.0
+    sync_tombstone_retention_days: int = 90
+    paddock_index_cache_size: int = 1000
+    paddock_index_recheck_seconds: float = 5.0
+    paddock_boundary_tolerance_m: float = 15.0
+    paddock_max_accuracy_m: float = 50.0
+    track_max_points: int = 1_000_000
+    coverage_map_cache_size: int = 256
+    tank_plan_cache_size: int = 4096
+    compliance_wind_min_ms: float = 0.8
+    compliance_wind_max_ms: float = 5.5
+    compliance_delta_t_min: float = 2.0
+    compliance_delta_t_max: float = 10.0
+    finalize_job_concurrency: int = 4
+    finalize_job_max_attempts: int = 3
+    finalize_job_backoff_seconds: float = 2.0
+    finalize_job_lease_seconds: float = 60.0
+    finalize_job_retention_seconds: float = 86_400.0
 
     @field_validator("allowed_origins", mode="before")
     def _split_origins(cls, value: list[str] | str | None) -> list[str]:
@@ -27,6 +83,17 @@ class Settings(BaseSettings):
             return value
         return [origin.strip() for origin in value.split(",") if origin.strip()]
 
+    @model_validator(mode="after")
+    def _check_weather_poll_interval(self) -> Settings:
+        interval, max_age = self.weather_poll_interval_seconds, self.weather_cache_max_age_seconds
+        # 0 disables the poller or the cache, so there is nothing to keep fresh.
+        if interval > 0 and max_age > 0 and interval >= max_age:
+            raise ValueError(
+                f"WEATHER_POLL_INTERVAL_SECONDS ({interval:g}) must be below WEATHER_CACHE_MAX_AGE_SECONDS "
+                f"({max_age:g}), or fetches between polls call the station live"
+            )
+        return self
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -1,10 +1,14 @@
-# apps/backend/app/db.py
 from __future__ import annotations
 
 import ssl
+import time
+import uuid
 from collections.abc import AsyncIterator
+from typing import Any
 
+from sqlalchemy import exc
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from .config import get_settings
 
@@ -21,15 +25,79 @@ elif db_url.startswith("postgresql://"):
 # Supabase requires SSL; pass an SSL context to asyncpg via SQLAlchemy
 ssl_ctx = ssl.create_default_context()
 
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a free connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited_ms = (time.perf_counter() - started) * 1000
+            self.checkouts += 1
+            self.wait_ms_total += waited_ms
+            self.wait_ms_max = max(self.wait_ms_max, waited_ms)
+
+    def stats(self) -> dict[str, Any]:
+        capacity = self.size() + max(self._max_overflow, 0)
+        checked_out = self.checkedout()
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": checked_out,
+            "checked_in": self.checkedin(),
+            "overflow": self.overflow(),
+            "saturation": checked_out / capacity if capacity else 0.0,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms_avg": self.wait_ms_total / self.checkouts if self.checkouts else 0.0,
+            "wait_ms_max": self.wait_ms_max,
+        }
+
+
+connect_args: dict[str, Any] = {"ssl": ssl_ctx}
+if settings.db_pgbouncer:
+    # pgbouncer in transaction mode hands each transaction a different server
+    # connection, so named prepared statements must not be cached or reused.
+    connect_args.update(
+        statement_cache_size=0,
+        prepared_statement_cache_size=0,
+        prepared_statement_name_func=lambda: f"__asyncpg_{uuid.uuid4()}__",
+    )
+else:
+    connect_args["prepared_statement_cache_size"] = settings.db_statement_cache_size
+
 engine = create_async_engine(
     db_url,
-    echo=(settings.environment == "development"),
-    connect_args={"ssl": ssl_ctx},
+    echo=settings.db_echo,
+    poolclass=InstrumentedPool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout_seconds,
+    pool_recycle=settings.db_pool_recycle_seconds,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    connect_args=connect_args,
 )
 
 AsyncSessionFactory = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
 
 
+def pool_stats() -> dict[str, Any]:
+    pool = engine.sync_engine.pool
+    return pool.stats() if isinstance(pool, InstrumentedPool) else {"status": pool.status()}
+
+
 async def get_db_session() -> AsyncIterator[AsyncSession]:
     async with AsyncSessionFactory() as session:
         yield session
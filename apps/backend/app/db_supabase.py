@@ -1,13 +1,30 @@
 # apps/backend/db_supabase.py
+import asyncio
 import os
-from supabase import create_client, Client
+
+from supabase import acreate_client
+from supabase._async.client import AsyncClient
 
 SUPABASE_URL = os.environ["SUPABASE_URL"]
 SUPABASE_KEY = os.environ["SUPABASE_SERVICE_ROLE_KEY"]  # server-side only
-_sb: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+# The async client talks to PostgREST over httpx, so lookups never block the event loop.
+_sb: AsyncClient | None = None
+_sb_lock = asyncio.Lock()
+
+
+async def _client() -> AsyncClient:
+    global _sb
+    if _sb is None:
+        async with _sb_lock:
+            if _sb is None:
+                _sb = await acreate_client(SUPABASE_URL, SUPABASE_KEY)
+    return _sb
+
 
 async def get_app_by_id(application_id: str):
-    res = _sb.table("applications") \
+    sb = await _client()
+    res = await sb.table("applications") \
         .select("*") \
         .eq("application_id", application_id) \
         .limit(1) \
@@ -15,7 +32,8 @@ async def get_app_by_id(application_id: str):
     return res.data[0] if res.data else None
 
 async def get_owner_by_id(owner_id: str):
-    res = _sb.table("owners") \
+    sb = await _client()
+    res = await sb.table("owners") \
         .select("owner_id, owner_name") \
         .eq("owner_id", owner_id) \
         .limit(1) \
@@ -23,7 +41,8 @@ async def get_owner_by_id(owner_id: str):
     return res.data[0] if res.data else None
 
 async def get_paddock_by_id(paddock_id: str):
-    res = _sb.table("paddocks") \
+    sb = await _client()
+    res = await sb.table("paddocks") \
         .select("paddock_id, paddock_name, centroid_lat, centroid_lng, created_at") \
         .eq("paddock_id", paddock_id) \
         .limit(1) \
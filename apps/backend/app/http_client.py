@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpcore
+import httpx
+
+from .config import get_settings
+
+
+@dataclass
+class _HostStats:
+    in_use: int = 0
+    waiting: int = 0
+    requests: int = 0
+    errors: int = 0
+    wait_ms_total: float = 0.0
+    wait_ms_max: float = 0.0
+    origin: httpcore.Origin | None = field(default=None, repr=False)
+    semaphore: asyncio.Semaphore | None = field(default=None, repr=False)
+
+
+class HttpClient:
+    """Application-scoped ``httpx.AsyncClient`` shared by every outbound call.
+
+    One connection pool (keepalive, HTTP/2 when ``h2`` is installed) serves all
+    hosts. Each call names a destination ("storage", "jwks", "weather") that
+    picks its timeout, and a per-host semaphore caps concurrent connections to
+    any one host so a slow upstream cannot take the whole pool. The time spent
+    waiting on that cap is recorded per host. Open and idle connection counts
+    are read from the transport's connection pool.
+    """
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        self._timeouts = {
+            "storage": httpx.Timeout(settings.http_storage_timeout_seconds, connect=10.0),
+            "jwks": httpx.Timeout(settings.http_jwks_timeout_seconds, connect=5.0),
+            "weather": httpx.Timeout(settings.http_weather_timeout_seconds, connect=5.0),
+        }
+        self._limits = httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+        )
+        self._per_host = max(1, settings.http_max_connections_per_host)
+        self._http2 = importlib.util.find_spec("h2") is not None
+        self._transport: httpx.AsyncHTTPTransport | None = None
+        self._client: httpx.AsyncClient | None = None
+        self._hosts: defaultdict[str, _HostStats] = defaultdict(_HostStats)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Normally opened by the app lifespan; scripts and tests get one on first use.
+        if self._client is None or self._client.is_closed:
+            self._transport = httpx.AsyncHTTPTransport(limits=self._limits, http2=self._http2)
+            self._client = httpx.AsyncClient(transport=self._transport)
+        return self._client
+
+    async def start(self) -> None:
+        _ = self.client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def request(self, destination: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        parsed = httpx.URL(url)
+        host = parsed.host
+        stats = self._hosts[host]
+        if stats.semaphore is None:
+            stats.semaphore = asyncio.Semaphore(self._per_host)
+        if stats.origin is None:
+            port = parsed.port or (443 if parsed.scheme == "https" else 80)
+            stats.origin = httpcore.Origin(parsed.scheme.encode(), host.encode(), port)
+        kwargs.setdefault("timeout", self._timeouts[destination])
+
+        stats.waiting += 1
+        started = time.perf_counter()
+        try:
+            await stats.semaphore.acquire()
+        finally:
+            stats.waiting -= 1
+        waited_ms = (time.perf_counter() - started) * 1000
+        stats.in_use += 1
+        stats.requests += 1
+        stats.wait_ms_total += waited_ms
+        stats.wait_ms_max = max(stats.wait_ms_max, waited_ms)
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            stats.errors += 1
+            raise
+        else:
+            return response
+        finally:
+            stats.in_use -= 1
+            stats.semaphore.release()
+
+    def _connections(self) -> list[httpcore.AsyncConnectionInterface]:
+        # httpx keeps its httpcore pool in the private ``_pool``; without it, report no connections.
+        pool = getattr(self._transport, "_pool", None)
+        if self._client is None or self._client.is_closed or not isinstance(pool, httpcore.AsyncConnectionPool):
+            return []
+        return pool.connections
+
+    def stats(self) -> dict[str, Any]:
+        """Request counters kept per host, and open and idle connections as the pool reports them."""
+        connections = self._connections()
+        idle = [c for c in connections if c.is_idle() and not c.has_expired()]
+        return {
+            "http2": self._http2,
+            "in_use": sum(s.in_use for s in self._hosts.values()),
+            "open": len(connections),
+            "idle": len(idle),
+            "max_idle": self._limits.max_keepalive_connections,
+            "waiting": sum(s.waiting for s in self._hosts.values()),
+            "hosts": {
+                host: {
+                    "in_use": s.in_use,
+                    "idle": sum(1 for c in idle if s.origin is not None and c.can_handle_request(s.origin)),
+                    "waiting": s.waiting,
+                    "requests": s.requests,
+                    "errors": s.errors,
+                    "wait_ms_avg": s.wait_ms_total / s.requests if s.requests else 0.0,
+                    "wait_ms_max": s.wait_ms_max,
+                }
+                for host, s in self._hosts.items()
+            },
+        }
+
+
+http_client = HttpClient()
@@ -1,12 +1,93 @@
+import asyncio
+import importlib
 import logging
+import secrets
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 
+
+async def _warm_up(app: FastAPI) -> None:
+    log = logging.getLogger("uvicorn.error")
+    try:
+        from .pdf import warm_up
+
+        timings = await warm_up()
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        app.state.warmup = {"status": "failed", "error": str(e)}
+        log.warning(f"PDF warmup failed: {e}")
+        return
+    app.state.warmup = {"status": "done", "timings": timings}
+    log.info("PDF warmup done: " + ", ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in timings.items()))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        from .http_client import http_client
+
+        await http_client.start()
+    except Exception as e:
+        logging.getLogger("uvicorn.error").warning(f"HTTP client not started: {e}")
+    try:
+        from .services.weather import weather_poller
+
+        weather_poller.start()
+    except Exception as e:
+        logging.getLogger("uvicorn.error").warning(f"Weather poller not started: {e}")
+    try:
+        from .services.finalize import finalize_jobs
+
+        finalize_jobs.start()
+    except Exception as e:
+        logging.getLogger("uvicorn.error").warning(f"Finalize jobs not started: {e}")
+    app.state.warmup = {"status": "disabled"}
+    warmup_task = None
+    try:
+        from .config import get_settings
+
+        if get_settings().pdf_warmup_on_startup:
+            app.state.warmup = {"status": "pending"}
+            warmup_task = asyncio.create_task(_warm_up(app))
+    except Exception as e:
+        logging.getLogger("uvicorn.error").warning(f"PDF warmup not started: {e}")
+    yield
+    if warmup_task is not None:
+        warmup_task.cancel()
+    try:
+        from .services.weather import weather_poller
+
+        await weather_poller.stop()
+    except Exception as e:
+        logging.getLogger("uvicorn.error").warning(f"Weather poller not stopped cleanly: {e}")
+    try:
+        from .services.finalize import finalize_jobs
+
+        await finalize_jobs.shutdown()
+    except Exception as e:
+        logging.getLogger("uvicorn.error").warning(f"Finalize jobs not shut down cleanly: {e}")
+    try:
+        from .pdf import render_pool
+
+        render_pool.shutdown()
+    except Exception as e:
+        logging.getLogger("uvicorn.error").warning(f"Render pool not shut down cleanly: {e}")
+    try:
+        from .http_client import http_client
+
+        await http_client.aclose()
+    except Exception as e:
+        logging.getLogger("uvicorn.error").warning(f"HTTP client not closed cleanly: {e}")
+
+
 app = FastAPI(
     title="Infield Spray Record API",
     description="API for managing spray application records for QA audits",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -19,6 +100,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -27,6 +109,63 @@ def healthz():
     return {"ok": True}
 
 
+@app.get("/readyz")
+def readyz(response: Response):
+    # Liveness stays on /healthz; readiness waits for the optional PDF warmup.
+    warmup = getattr(app.state, "warmup", {"status": "disabled"})
+    ready = warmup["status"] != "pending"
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"ready": ready, "warmup": warmup}
+
+
+# (metrics key, module, callable path); each is collected on its own so one failure hides nothing else.
+_METRIC_COLLECTORS = (
+    ("db_pool", ".db", "pool_stats"),
+    ("http", ".http_client", "http_client.stats"),
+    ("pdf_render_pool", ".pdf", "render_pool.stats"),
+    ("pdf_cache", ".pdf", "pdf_cache.stats"),
+    ("auth_owner_cache", ".auth", "owner_cache.stats"),
+    ("auth_verified_token_cache", ".auth", "_verifier.verified.stats"),
+    ("weather_station_readings", ".services.weather", "station_readings.stats"),
+    ("weather_poller", ".services.weather", "weather_poller.stats"),
+    ("finalize_jobs", ".services.finalize", "finalize_jobs.stats"),
+    ("paddock_index", ".services.paddock_index", "paddock_indexes.stats"),
+    ("coverage_maps", ".services.coverage_map", "coverage_maps.stats"),
+    ("tank_plans", ".services.tank_mix", "tank_plans.stats"),
+)
+
+
+def _check_metrics_access(authorization: str | None) -> None:
+    """Require ``Bearer $METRICS_TOKEN``; without a token the endpoint only exists in development."""
+    from .config import get_settings
+
+    settings = get_settings()
+    if not settings.metrics_token:
+        if settings.environment != "development":
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+        return
+    expected = f"Bearer {settings.metrics_token}"
+    if authorization is None or not secrets.compare_digest(authorization.encode(), expected.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Metrics token required")
+
+
+@app.get("/metricsz")
+def metricsz(authorization: str | None = Header(default=None)):
+    """Point-in-time pool and cache counters for capacity tuning."""
+    _check_metrics_access(authorization)
+    metrics: dict[str, object] = {}
+    for name, module, path in _METRIC_COLLECTORS:
+        try:
+            target: object = importlib.import_module(module, __package__)
+            for attribute in path.split("."):
+                target = getattr(target, attribute)
+            metrics[name] = target()  # type: ignore[operator]
+        except Exception as e:
+            metrics[name] = {"error": str(e)}
+    return metrics
+
+
 @app.get("/")
 def root():
     return {
@@ -39,7 +178,7 @@ def root():
 
 # Try to attach routers, but don't crash the process if something is misconfigured.
 try:
-    from .routers import applications, farms, mixes, owners, paddocks, records, weather
+    from .routers import applications, farms, jobs, mixes, owners, paddocks, records, sync, tracks, weather
 
     app.include_router(applications.router)
     app.include_router(records.router)
@@ -48,5 +187,8 @@ try:
     app.include_router(owners.router)
     app.include_router(mixes.router)
     app.include_router(weather.router)
+    app.include_router(jobs.router)
+    app.include_router(sync.router)
+    app.include_router(tracks.router)
 except Exception as e:
     logging.getLogger("uvicorn.error").warning(f"Routers not attached at startup: {e}")
@@ -3,8 +3,8 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Numeric, String, Text, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import REAL, Boolean, DateTime, ForeignKey, Integer, LargeBinary, Numeric, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -56,6 +56,9 @@ class Farm(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
 
     owner: Mapped[Owner] = relationship(back_populates="farms")
     paddocks: Mapped[list["Paddock"]] = relationship(back_populates="farm", cascade="all, delete-orphan")
@@ -77,9 +80,14 @@ class Paddock(Base):
     gps_longitude: Mapped[float | None] = mapped_column(Numeric, nullable=True)
     gps_accuracy_m: Mapped[float | None] = mapped_column(Numeric, nullable=True)
     gps_updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # GeoJSON Polygon or MultiPolygon geometry, [lng, lat] order.
+    boundary: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
 
     owner: Mapped[Owner] = relationship(back_populates="paddocks")
     farm: Mapped[Farm] = relationship(back_populates="paddocks")
@@ -111,6 +119,9 @@ class Application(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
 
     owner: Mapped[Owner] = relationship(back_populates="applications")
     paddocks: Mapped[list["ApplicationPaddock"]] = relationship(
@@ -140,6 +151,33 @@ class ApplicationPaddock(Base):
     paddock: Mapped[Paddock] = relationship(back_populates="application_links")
 
 
+class ApplicationTrack(Base):
+    """A sprayer GPS track kept as one packed blob (see ``services.tracks``), not a row per fix."""
+
+    __tablename__ = "application_tracks"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    owner_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("owners.id", ondelete="CASCADE"), nullable=False
+    )
+    application_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("applications.id", ondelete="CASCADE"), nullable=False
+    )
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    ended_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    point_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    boom_width_m: Mapped[float | None] = mapped_column(REAL, nullable=True)
+    distance_m: Mapped[float] = mapped_column(REAL, nullable=False)
+    sprayed_distance_m: Mapped[float] = mapped_column(REAL, nullable=False)
+    covered_area_ha: Mapped[float | None] = mapped_column(REAL, nullable=True)
+    tracked_seconds: Mapped[float] = mapped_column(REAL, nullable=False)
+    paddock_seconds: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
 class Mix(Base):
     __tablename__ = "mixes"
 
@@ -152,6 +190,9 @@ class Mix(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
 
     owner: Mapped[Owner] = relationship(back_populates="mixes")
     items: Mapped[list["MixItem"]] = relationship(back_populates="mix", cascade="all, delete-orphan")
@@ -187,3 +228,87 @@ class BlynkStation(Base):
     )
 
     owner: Mapped[Owner] = relationship()
+
+
+class WeatherReading(Base):
+    """One polled station sample; REAL columns keep the time series compact."""
+
+    __tablename__ = "weather_readings"
+
+    station_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("blynk_stations.id", ondelete="CASCADE"), primary_key=True
+    )
+    observed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    wind_speed_ms: Mapped[float | None] = mapped_column(REAL, nullable=True)
+    wind_direction_deg: Mapped[float | None] = mapped_column(REAL, nullable=True)
+    temp_c: Mapped[float | None] = mapped_column(REAL, nullable=True)
+    humidity_pct: Mapped[float | None] = mapped_column(REAL, nullable=True)
+
+
+class WorkerLease(Base):
+    """Which process runs a singleton background task until ``expires_at``."""
+
+    __tablename__ = "worker_leases"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    holder: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class BackgroundJob(Base):
+    """A background job's progress, so any process can report it and resume it after a restart."""
+
+    __tablename__ = "background_jobs"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    owner_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("owners.id", ondelete="CASCADE"), nullable=False
+    )
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    key: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False, default="queued")
+    stage: Mapped[str | None] = mapped_column(String, nullable=True)
+    completed_stages: Mapped[list[str]] = mapped_column(JSONB, nullable=False, default=list)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    result: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    lease_holder: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class SyncReceipt(Base):
+    """Records which entity an offline client's idempotency key produced."""
+
+    __tablename__ = "sync_receipts"
+
+    owner_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("owners.id", ondelete="CASCADE"), primary_key=True
+    )
+    idempotency_key: Mapped[str] = mapped_column(String, primary_key=True)
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    entity_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class SyncTombstone(Base):
+    """A deleted row, kept so delta sync clients learn about the delete."""
+
+    __tablename__ = "sync_tombstones"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    owner_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("owners.id", ondelete="CASCADE"), nullable=False
+    )
+    entity: Mapped[str] = mapped_column(String, nullable=False)
+    entity_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
@@ -2,16 +2,26 @@
 from __future__ import annotations
 
 from pathlib import Path
+import asyncio
 import base64
+import hashlib
+import json
+import time
+import uuid
 from datetime import datetime, timezone
+from functools import lru_cache
 from io import BytesIO
-from typing import Iterable
+from typing import Any, Iterable, Sequence
 
 import qrcode
 from jinja2 import Environment, FileSystemLoader, select_autoescape
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import DeclarativeBase
 
 from .config import get_settings
-from .models import Application, ApplicationPaddock
+from .models import Application, ApplicationPaddock, Owner, Paddock
+from .services.pdf_cache import PdfCache
+from .services.render_pool import RenderPool
 from .utils import to_float
 
 # Templates live at: apps/backend/app/templates/application.html
@@ -22,6 +32,37 @@ _env = Environment(
     autoescape=select_autoescape(["html", "xml"]),
 )
 
+_settings = get_settings()
+# Shared off-loop renderer; the forkserver preloads this module so recycled workers start with the app imported.
+render_pool = RenderPool(
+    workers=_settings.pdf_render_workers,
+    max_queue=_settings.pdf_render_max_queue,
+    timeout_seconds=_settings.pdf_render_timeout_seconds,
+    max_tasks_per_worker=_settings.pdf_render_max_tasks_per_worker,
+    retry_after_seconds=_settings.pdf_render_retry_after_seconds,
+    preload=(__name__,),
+)
+
+pdf_cache = PdfCache(
+    memory_max_bytes=_settings.pdf_cache_memory_max_bytes,
+    disk_dir=_settings.pdf_cache_dir,
+    disk_max_bytes=_settings.pdf_cache_disk_max_bytes,
+)
+
+# Template and font changes must invalidate cached PDFs, so their bytes are part of every key.
+_TEMPLATE_DIGEST = hashlib.sha256(
+    b"".join(p.read_bytes() for p in sorted(TEMPLATES_DIR.rglob("*")) if p.is_file() and p.suffix != ".bak")
+).hexdigest()
+
+# Each combined audit chunk gets the single-render timeout plus this much per record.
+_COMBINED_SECONDS_PER_RECORD = 1.0
+
+# Context entries that do not feed the cache key: the timestamp changes on every
+# build, the QR code is derived from record_url and the coverage map from
+# coverage_map_key.
+_UNKEYED_CONTEXT = frozenset({"generated_at", "qr_code", "coverage_map"})
+
+@lru_cache(maxsize=1024)
 def _qr_data_uri(url: str) -> str:
     qr = qrcode.QRCode(version=1, box_size=4, border=1)
     qr.add_data(url)
@@ -31,7 +72,12 @@ def _qr_data_uri(url: str) -> str:
     img.save(buf, format="PNG")
     return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
 
-def build_application_context(application: Application) -> dict:
+def build_application_context(application: Application, coverage_map_key: str | None = None) -> dict:
+    """Template context for one application.
+
+    ``coverage_map_key`` comes from ``coverage_map_keys``; the map itself is
+    only drawn (or fetched from its cache) when the PDF is not cached.
+    """
     settings = get_settings()
     record_url = (
         f"{settings.public_record_base_url}/records/{application.id}"
@@ -55,6 +101,8 @@ def build_application_context(application: Application) -> dict:
         "generated_at": datetime.now(timezone.utc),
         "qr_code": _qr_data_uri(record_url) if record_url else None,
         "record_url": record_url,
+        "coverage_map_key": coverage_map_key,
+        "coverage_map": None,
         "weather": {
             "wind_speed_ms": to_float(application.wind_speed_ms),
             "wind_direction_deg": to_float(application.wind_direction_deg),
@@ -67,13 +115,181 @@ def render_application_html(context: dict) -> str:
     template = _env.get_template("application.html")
     return template.render(**context)
 
+def render_combined_html(contexts: Sequence[dict]) -> str:
+    """One HTML document holding every application, so styles and fonts are handled once."""
+    template = _env.get_template("applications_combined.html")
+    return template.render(records=contexts, generated_at=datetime.now(timezone.utc))
+
+def _data_url_fetcher(url: str) -> dict:
+    """Resolve inline ``data:`` URIs (QR code, coverage map) and refuse every other fetch.
+
+    Templates embed all their images and use system fonts, so nothing else is
+    ever needed. PDFs must render the same way offline, and a refused URL
+    fails at once instead of touching the disk or network on every render.
+    """
+    if url.startswith("data:"):
+        from weasyprint import default_url_fetcher
+
+        return default_url_fetcher(url)
+    raise ValueError(f"Asset fetch refused: {url}")
+
 def generate_pdf_from_html(html_str: str) -> bytes:
     # Lazy import so startup never fails on missing system libs
     from weasyprint import HTML
-    # base_url must be a local directory so relative assets resolve
-    return HTML(string=html_str, base_url=str(TEMPLATES_DIR)).write_pdf()
+    return HTML(string=html_str, base_url=str(TEMPLATES_DIR), url_fetcher=_data_url_fetcher).write_pdf()
+
+def merge_pdfs(parts: Sequence[bytes]) -> bytes:
+    """Concatenate rendered PDFs page by page (runs in the render pool)."""
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(PdfReader(BytesIO(part)))
+    out = BytesIO()
+    writer.write(out)
+    return out.getvalue()
 
 def generate_application_pdf(application: Application) -> bytes:
     ctx = build_application_context(application)
     html = render_application_html(ctx)
     return generate_pdf_from_html(html)
+
+def _key_material(value: Any) -> Any:
+    if isinstance(value, DeclarativeBase):
+        return {attr.key: getattr(value, attr.key) for attr in sa_inspect(value).mapper.column_attrs}
+    if isinstance(value, dict):
+        return {str(k): _key_material(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_key_material(v) for v in value]
+    return value
+
+def pdf_cache_key(context: dict) -> str:
+    """Stable digest of everything in the context that affects the rendered PDF."""
+    material = {k: _key_material(v) for k, v in context.items() if k not in _UNKEYED_CONTEXT}
+    material["__template__"] = _TEMPLATE_DIGEST
+    encoded = json.dumps(material, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+async def _with_coverage_map(context: dict) -> dict:
+    key = context.get("coverage_map_key")
+    if not key or context.get("coverage_map"):
+        return context
+    # Imported here so render pool workers, which preload this module, never set up a database engine.
+    from .services.coverage_map import coverage_maps
+
+    return {**context, "coverage_map": await coverage_maps.data_uri(key, context["application"].id)}
+
+async def render_context_pdf(context: dict, cache_key: str | None = None) -> bytes:
+    """Return the PDF for a built context, rendering in the pool only on a cache miss."""
+    key = cache_key or pdf_cache_key(context)
+    cached = await pdf_cache.get(key)
+    if cached is not None:
+        return cached
+    html = render_application_html(await _with_coverage_map(context))
+    pdf_bytes = await render_pool.run(generate_pdf_from_html, html)
+    await pdf_cache.put(key, pdf_bytes)
+    return pdf_bytes
+
+def combined_cache_key(contexts: Sequence[dict]) -> str:
+    """Cache key for a combined chunk, built from the single-render key of each record."""
+    keys = ",".join(pdf_cache_key(context) for context in contexts)
+    return hashlib.sha256(f"combined:{keys}".encode("ascii")).hexdigest()
+
+async def _prepare_combined_chunk(contexts: Sequence[dict]) -> tuple[str, bytes | str]:
+    """Return the chunk's cache key and either its cached PDF or the HTML still to render."""
+    key = combined_cache_key(contexts)
+    cached = await pdf_cache.get(key)
+    if cached is not None:
+        return key, cached
+    # One at a time: each map missing from its cache takes a database connection.
+    contexts = [await _with_coverage_map(context) for context in contexts]
+    return key, render_combined_html(contexts)
+
+async def render_combined_pdf(contexts: Sequence[dict]) -> bytes:
+    """Lay out many applications as one audit PDF (one page per application).
+
+    Records are rendered in chunks of ``pdf_combined_chunk_records``, each its
+    own pool job with a bounded timeout and its own cache entry, so a large
+    audit never holds a worker for long and single-record exports interleave
+    with it. The next chunk's coverage maps are drawn while the current one
+    renders, and the parts are merged in the pool at the end.
+    """
+    size = max(1, _settings.pdf_combined_chunk_records)
+    chunks = [contexts[i:i + size] for i in range(0, len(contexts), size)]
+    timeout = _settings.pdf_render_timeout_seconds + _COMBINED_SECONDS_PER_RECORD * size
+    parts: list[bytes] = []
+    prepared = asyncio.create_task(_prepare_combined_chunk(chunks[0]))
+    try:
+        for index in range(len(chunks)):
+            key, content = await prepared
+            if index + 1 < len(chunks):
+                prepared = asyncio.create_task(_prepare_combined_chunk(chunks[index + 1]))
+            if isinstance(content, str):
+                pdf_bytes = await render_pool.run(generate_pdf_from_html, content, timeout=timeout)
+                await pdf_cache.put(key, pdf_bytes)
+                content = pdf_bytes
+            parts.append(content)
+    finally:
+        prepared.cancel()
+    if len(parts) == 1:
+        return parts[0]
+    return await render_pool.run(merge_pdfs, parts)
+
+async def render_application_pdf(application: Application, coverage_map_key: str | None = None) -> bytes:
+    """Build the context on the event loop, then lay out the PDF in the render pool."""
+    return await render_context_pdf(build_application_context(application, coverage_map_key))
+
+def _warmup_application() -> Application:
+    """Transient fixture that exercises every section of the template."""
+    owner = Owner(id=uuid.UUID(int=0), name="Warmup")
+    paddock = Paddock(id=uuid.UUID(int=0), name="Warmup paddock")
+    link = ApplicationPaddock(
+        paddock_id=paddock.id,
+        paddock=paddock,
+        gps_latitude=-36.0,
+        gps_longitude=144.0,
+        gps_accuracy_m=5.0,
+        gps_captured_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+    )
+    return Application(
+        id=uuid.UUID(int=0),
+        owner=owner,
+        started_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        finalized=False,
+        notes="warmup",
+        wind_speed_ms=3.0,
+        wind_direction_deg=180.0,
+        temp_c=20.0,
+        humidity_pct=50.0,
+        paddocks=[link],
+    )
+
+async def warm_up() -> dict[str, float | int]:
+    """Pay template compile, QR, WeasyPrint import and font discovery costs up front.
+
+    The fixture render bypasses the PDF cache and is sent once per pool worker
+    so each process is warm, not just the first one.
+    """
+    timings: dict[str, float | int] = {}
+    start = time.perf_counter()
+    for name in ("application.html", "applications_combined.html"):
+        _env.get_template(name)
+    timings["template_compile_ms"] = (time.perf_counter() - start) * 1000
+
+    step = time.perf_counter()
+    html = render_application_html(build_application_context(_warmup_application()))
+    timings["context_build_ms"] = (time.perf_counter() - step) * 1000
+
+    async def timed_render() -> float:
+        began = time.perf_counter()
+        await render_pool.run(generate_pdf_from_html, html)
+        return (time.perf_counter() - began) * 1000
+
+    step = time.perf_counter()
+    workers = max(1, _settings.pdf_render_workers)
+    renders = await asyncio.gather(*(timed_render() for _ in range(workers)))
+    timings["render_ms"] = (time.perf_counter() - step) * 1000
+    timings["slowest_worker_render_ms"] = max(renders)
+    timings["workers_warmed"] = workers
+    timings["total_ms"] = (time.perf_counter() - start) * 1000
+    return timings
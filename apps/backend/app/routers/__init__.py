@@ -1,11 +1,14 @@
-from . import applications, farms, mixes, owners, paddocks, records, weather
+from . import applications, farms, jobs, mixes, owners, paddocks, records, sync, tracks, weather
 
 __all__ = [
     "applications",
     "farms",
+    "jobs",
     "mixes",
     "owners",
     "paddocks",
     "records",
+    "sync",
+    "tracks",
     "weather",
 ]
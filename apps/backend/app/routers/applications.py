@@ -3,18 +3,37 @@ from __future__ import annotations
 import uuid
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
-from sqlalchemy import select, update
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import literal, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from ..auth import AuthContext, get_current_auth
 from ..db import get_db_session
 from ..models import Application, ApplicationPaddock
-from ..pdf import generate_application_pdf
-from ..schemas import ApplicationCreate, ApplicationPaddockPayload, ApplicationSummary
-from ..services.serializers import serialize_application_summary
-from ..services.ownership import ensure_application, ensure_paddock
+from ..pdf import (
+    build_application_context,
+    pdf_cache_key,
+    render_combined_pdf,
+    render_context_pdf,
+)
+from ..schemas import (
+    ApplicationBulkCreate,
+    ApplicationCreate,
+    ApplicationExportFilter,
+    ApplicationSummary,
+    ComplianceReportResponse,
+    JobResponse,
+)
+from ..services.applications import apply_application_filters, application_summary_select, create_applications
+from ..services.compliance import compliance_report
+from ..services.coverage_map import coverage_map_keys
+from ..services.finalize import ensure_storage_configured, finalize_jobs
+from ..services.pagination import decode_cursor, encode_cursor
+from ..services.serializers import serialize_application_summary, serialize_application_summary_row, serialize_job
+from ..services.ownership import ensure_application
+from ..services.pdf_export import stream_applications_zip
 from ..config import get_settings
 
 router = APIRouter(prefix="/api/applications", tags=["applications"])
@@ -36,26 +55,53 @@ async def _load_application(session: AsyncSession, application_id: uuid.UUID, ow
     return application
 
 
+async def _filtered_application_ids(
+    session: AsyncSession, owner_id: uuid.UUID, filters: ApplicationExportFilter
+) -> list[uuid.UUID]:
+    query = apply_application_filters(select(Application.id), owner_id, filters)
+    result = await session.execute(query.order_by(Application.started_at))
+    return list(result.scalars().all())
+
+
 @router.get("", response_model=list[ApplicationSummary])
 async def list_applications(
+    response: Response,
     owner_id: uuid.UUID | None = Query(default=None),
+    started_from: datetime | None = Query(default=None, alias="startedFrom"),
+    started_to: datetime | None = Query(default=None, alias="startedTo"),
+    finalized: bool | None = Query(default=None),
+    paddock_id: uuid.UUID | None = Query(default=None, alias="paddockId"),
+    farm_id: uuid.UUID | None = Query(default=None, alias="farmId"),
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = Query(default=None),
     auth: AuthContext = Depends(get_current_auth),
     session: AsyncSession = Depends(get_db_session),
 ) -> list[ApplicationSummary]:
+    """Newest first, one page at a time.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` for the next
+    page; it is absent on the last page.
+    """
     if owner_id is not None and owner_id != auth.owner_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot access applications for another owner")
 
     target_owner_id = owner_id or auth.owner_id
-
-    query = (
-        select(Application)
-        .where(Application.owner_id == target_owner_id)
-        .options(selectinload(Application.paddocks))
-        .order_by(Application.started_at.desc())
+    filters = ApplicationExportFilter(
+        started_from=started_from, started_to=started_to, finalized=finalized, paddock_id=paddock_id, farm_id=farm_id
     )
-    result = await session.execute(query)
-    applications = result.scalars().all()
-    return [serialize_application_summary(application) for application in applications]
+
+    query = apply_application_filters(application_summary_select(), target_owner_id, filters)
+    if cursor is not None:
+        after_started_at, after_id = decode_cursor(cursor)
+        after = tuple_(literal(after_started_at, Application.started_at.type), literal(after_id, Application.id.type))
+        query = query.where(tuple_(Application.started_at, Application.id) < after)
+    query = query.order_by(Application.started_at.desc(), Application.id.desc()).limit(limit + 1)
+
+    rows = (await session.execute(query)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].started_at, rows[-1].id)
+    return [serialize_application_summary_row(row) for row in rows]
 
 
 @router.post("", response_model=ApplicationSummary, status_code=status.HTTP_201_CREATED)
@@ -64,128 +110,135 @@ async def start_application(
     auth: AuthContext = Depends(get_current_auth),
     session: AsyncSession = Depends(get_db_session),
 ) -> ApplicationSummary:
-    owner_id = payload.owner_id or auth.owner_id
-    if owner_id != auth.owner_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot create application for another owner")
-
-    paddock_payloads: list[ApplicationPaddockPayload] | None = payload.paddocks
-    if not paddock_payloads and payload.paddock_ids:
-        paddock_payloads = [ApplicationPaddockPayload(paddock_id=pid) for pid in payload.paddock_ids]
-
-    if not paddock_payloads:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="At least one paddock is required")
-
-    started_at = payload.started_at or datetime.now(timezone.utc)
-    application = Application(
-        owner_id=owner_id,
-        mix_id=payload.mix_id,
-        operator_user_id=payload.operator_user_id or auth.user_id,
-        started_at=started_at,
-        notes=payload.notes,
-        water_source=payload.water_source,
-        created_at=datetime.now(timezone.utc),
-    )
-    session.add(application)
-    await session.flush()
-
-    for p in paddock_payloads:
-        await ensure_paddock(session, p.paddock_id, owner_id)
-        gps_captured_at = None
-        if p.gps_lat is not None and p.gps_lng is not None:
-            gps_captured_at = datetime.now(timezone.utc)
-        link = ApplicationPaddock(
-            owner_id=owner_id,
-            application_id=application.id,
-            paddock_id=p.paddock_id,
-            gps_latitude=p.gps_lat,
-            gps_longitude=p.gps_lng,
-            gps_accuracy_m=p.gps_accuracy_m,
-            gps_captured_at=gps_captured_at,
-        )
-        session.add(link)
-
+    (application_id,) = await create_applications(session, [payload], auth)
     await session.commit()
-    application = await _load_application(session, application.id, owner_id)
+    application = await _load_application(session, application_id, auth.owner_id)
     return serialize_application_summary(application)
 
 
-@router.post("/{application_id}/finalize", response_model=ApplicationSummary)
+@router.post("/bulk", response_model=list[ApplicationSummary], status_code=status.HTTP_201_CREATED)
+async def start_applications_bulk(
+    payload: ApplicationBulkCreate,
+    auth: AuthContext = Depends(get_current_auth),
+    session: AsyncSession = Depends(get_db_session),
+) -> list[ApplicationSummary]:
+    """Create a backlog of applications in one transaction; any invalid item rejects the batch."""
+    application_ids = await create_applications(session, payload.applications, auth)
+    await session.commit()
+
+    query = (
+        select(Application)
+        .where(Application.id.in_(application_ids), Application.owner_id == auth.owner_id)
+        .options(selectinload(Application.paddocks))
+    )
+    result = await session.execute(query)
+    by_id = {application.id: application for application in result.scalars().all()}
+    return [serialize_application_summary(by_id[application_id]) for application_id in application_ids]
+
+
+@router.post("/{application_id}/finalize", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def finalize_application(
     application_id: uuid.UUID,
     response: Response,
     auth: AuthContext = Depends(get_current_auth),
     session: AsyncSession = Depends(get_db_session),
-) -> ApplicationSummary:
-    # 1) Ensure we own it
-    application = await ensure_application(session, application_id, auth.owner_id)
-
-    # 2) Render PDF
-    try:
-        pdf_bytes = generate_application_pdf(application)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"PDF render failed: {e!s}")
-
-    # 3) Upload to Supabase via REST (upsert)
-    import httpx  # ensure httpx is in requirements.txt
-    settings = get_settings()
-    bucket = settings.supabase_bucket
-    if not bucket:
-        raise HTTPException(status_code=500, detail="SUPABASE_BUCKET not configured")
-
-    key = f"applications/{application_id}/application-{application_id}.pdf"
-    upload_url = f"{settings.supabase_url}/storage/v1/object/{bucket}/{key}"
-    headers = {
-        "Authorization": f"Bearer {settings.supabase_service_role_key}",
-        "Content-Type": "application/pdf",
-        "x-upsert": "true",
-    }
+) -> JobResponse:
+    # Only cheap checks run in the request; render, upload and mark-finalized run as a job.
+    await ensure_application(session, application_id, auth.owner_id)
+    ensure_storage_configured()
 
-    try:
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.post(upload_url, content=pdf_bytes, headers=headers)
-            if r.status_code not in (200, 201):
-                raise HTTPException(status_code=500, detail=f"Storage upload failed: {r.status_code} {r.text}")
-
-            # If bucket is PUBLIC:
-            pdf_url = f"{settings.supabase_url}/storage/v1/object/public/{bucket}/{key}"
-
-            # If bucket is PRIVATE, use this instead:
-            # sign_url = f"{settings.supabase_url}/storage/v1/object/sign/{bucket}/{key}"
-            # rs = await client.post(sign_url, headers={
-            #     "Authorization": f"Bearer {settings.supabase_service_role_key}",
-            #     "Content-Type": "application/json",
-            # }, json={"expiresIn": 60 * 60 * 24})
-            # if rs.status_code != 200:
-            #     raise HTTPException(status_code=500, detail=f"Sign URL failed: {rs.status_code} {rs.text}")
-            # pdf_url = settings.supabase_url + rs.json()["signedURL"]
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Storage upload failed: {e!s}")
-
-    # 4) Mark finalized
-    finished_at = datetime.now(timezone.utc)
-    await session.execute(
-        update(Application)
-        .where(Application.id == application_id, Application.owner_id == auth.owner_id)
-        .values(finalized=True, finished_at=finished_at)
-    )
-    await session.commit()
-
-    # 5) Return fresh summary & expose URL in a header
-    application = await _load_application(session, application_id, auth.owner_id)
-    response.headers["X-PDF-URL"] = pdf_url
-    return serialize_application_summary(application)
+    job = await finalize_jobs.submit(kind="finalize", key=str(application_id), owner_id=auth.owner_id)
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return serialize_job(job)
 
 
 @router.get("/{application_id}/export.pdf", response_class=Response)
 async def export_application_pdf(
     application_id: uuid.UUID,
+    if_none_match: str | None = Header(default=None),
     auth: AuthContext = Depends(get_current_auth),
     session: AsyncSession = Depends(get_db_session),
 ) -> Response:
     application = await _load_application(session, application_id, auth.owner_id)
-    pdf_bytes = generate_application_pdf(application)
+    map_keys = await coverage_map_keys(session, [application])
+    context = build_application_context(application, map_keys.get(application_id))
+    cache_key = pdf_cache_key(context)
+    etag = f'"{cache_key}"'
+    # Clients must revalidate, but an unchanged record costs a hash instead of a render.
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and (if_none_match.strip() == "*" or etag in {t.strip() for t in if_none_match.split(",")}):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+
+    pdf_bytes = await render_context_pdf(context, cache_key)
     filename = f"application-{application_id}.pdf"
-    headers = {"Content-Disposition": f'inline; filename="{filename}"'}
+    headers = {"Content-Disposition": f'inline; filename="{filename}"', **cache_headers}
+    return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
+
+
+@router.post("/compliance", response_model=ComplianceReportResponse)
+async def application_compliance(
+    filters: ApplicationExportFilter,
+    auth: AuthContext = Depends(get_current_auth),
+    session: AsyncSession = Depends(get_db_session),
+) -> ComplianceReportResponse:
+    return await compliance_report(session, auth.owner_id, filters)
+
+
+@router.post("/export", response_class=StreamingResponse)
+async def export_applications_zip(
+    filters: ApplicationExportFilter,
+    auth: AuthContext = Depends(get_current_auth),
+    session: AsyncSession = Depends(get_db_session),
+) -> StreamingResponse:
+    application_ids = await _filtered_application_ids(session, auth.owner_id, filters)
+
+    # The dependency session closes before streaming starts; the stream opens its own.
+    concurrency = max(1, get_settings().pdf_render_workers)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    headers = {
+        "Content-Disposition": f'attachment; filename="applications-{stamp}.zip"',
+        "X-Application-Count": str(len(application_ids)),
+    }
+    return StreamingResponse(
+        stream_applications_zip(auth.owner_id, application_ids, concurrency),
+        media_type="application/zip",
+        headers=headers,
+    )
+
+
+@router.post("/export/combined.pdf", response_class=Response)
+async def export_applications_combined_pdf(
+    filters: ApplicationExportFilter,
+    auth: AuthContext = Depends(get_current_auth),
+    session: AsyncSession = Depends(get_db_session),
+) -> Response:
+    application_ids = await _filtered_application_ids(session, auth.owner_id, filters)
+    if not application_ids:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No applications match the filter")
+    limit = get_settings().pdf_combined_max_records
+    if len(application_ids) > limit:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Combined export is limited to {limit} applications; narrow the filter or use the ZIP export",
+        )
+
+    query = (
+        select(Application)
+        .where(Application.id.in_(application_ids), Application.owner_id == auth.owner_id)
+        .options(
+            selectinload(Application.paddocks).selectinload(ApplicationPaddock.paddock),
+            selectinload(Application.owner),
+        )
+        .order_by(Application.started_at)
+    )
+    applications = (await session.execute(query)).scalars().all()
+    map_keys = await coverage_map_keys(session, applications)
+    contexts = [build_application_context(application, map_keys.get(application.id)) for application in applications]
+    pdf_bytes = await render_combined_pdf(contexts)
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    headers = {
+        "Content-Disposition": f'attachment; filename="applications-audit-{stamp}.pdf"',
+        "X-Application-Count": str(len(contexts)),
+    }
     return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
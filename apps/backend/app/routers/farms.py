@@ -3,15 +3,17 @@ from __future__ import annotations
 import uuid
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..auth import AuthContext, get_current_auth
 from ..db import get_db_session
 from ..models import Paddock
-from ..schemas import PaddockCreate, PaddockResponse
+from ..schemas import PaddockCreate, PaddockImportResponse, PaddockResponse
 from ..services.ownership import ensure_farm
+from ..services.paddock_import import ImportFormat, import_paddocks
+from ..services.paddock_index import paddock_indexes, parse_boundary
 from ..services.serializers import serialize_paddock
 
 router = APIRouter(prefix="/api/farms", tags=["farms"])
@@ -40,14 +42,51 @@ async def create_paddock(
     session: AsyncSession = Depends(get_db_session),
 ) -> PaddockResponse:
     await ensure_farm(session, farm_id, auth.owner_id)
+    if payload.boundary is not None:
+        parse_boundary(payload.boundary)
     paddock = Paddock(
         owner_id=auth.owner_id,
         farm_id=farm_id,
         name=payload.name,
         area_hectares=payload.area_hectares,
+        boundary=payload.boundary,
         created_at=datetime.now(timezone.utc),
     )
     session.add(paddock)
     await session.commit()
+    paddock_indexes.invalidate(auth.owner_id)
     await session.refresh(paddock)
     return serialize_paddock(paddock)
+
+
+_IMPORT_CONTENT_TYPES: dict[str, ImportFormat] = {
+    "application/geo+json": "geojson",
+    "application/json": "geojson",
+    "application/vnd.google-earth.kml+xml": "kml",
+    "application/xml": "kml",
+    "text/xml": "kml",
+}
+
+
+@router.post("/{farm_id}/paddocks/import", response_model=PaddockImportResponse)
+async def import_farm_paddocks(
+    farm_id: uuid.UUID,
+    request: Request,
+    file_format: ImportFormat | None = Query(default=None, alias="format"),
+    auth: AuthContext = Depends(get_current_auth),
+    session: AsyncSession = Depends(get_db_session),
+) -> PaddockImportResponse:
+    """Upsert paddock boundaries from a GeoJSON FeatureCollection or KML file sent as the request body."""
+    await ensure_farm(session, farm_id, auth.owner_id)
+    if file_format is None:
+        content_type = request.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        file_format = _IMPORT_CONTENT_TYPES.get(content_type)
+    if file_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send GeoJSON or KML, or pass format=geojson|kml",
+        )
+    result = await import_paddocks(session, auth.owner_id, farm_id, request.stream(), file_format)
+    await session.commit()
+    paddock_indexes.invalidate(auth.owner_id)
+    return result
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from ..auth import AuthContext, get_current_auth
+from ..schemas import JobResponse
+from ..services.finalize import finalize_jobs
+from ..services.serializers import serialize_job
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: uuid.UUID,
+    auth: AuthContext = Depends(get_current_auth),
+) -> JobResponse:
+    """Status of a job, from any API process; 404 once it is past retention or for another owner."""
+    job = await finalize_jobs.get(job_id, auth.owner_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return serialize_job(job)
@@ -10,8 +10,9 @@ from sqlalchemy.orm import selectinload
 from ..auth import AuthContext, get_current_auth
 from ..db import get_db_session
 from ..models import Mix, MixItem
-from ..schemas import MixCreate, MixResponse
+from ..schemas import MixCreate, MixResponse, TankCalculation, TankCalculationRequest, TankPlanRequest
 from ..services.serializers import serialize_mix
+from ..services.tank_mix import plan_tanks
 
 router = APIRouter(prefix="/api/mixes", tags=["mixes"])
 
@@ -75,3 +76,38 @@ async def create_mix(
     result = await session.execute(query)
     created_mix = result.scalar_one()
     return serialize_mix(created_mix)
+
+
+@router.post("/tank-plan", response_model=list[TankCalculation])
+async def plan_mix_tanks(
+    payload: TankPlanRequest,
+    auth: AuthContext = Depends(get_current_auth),
+    session: AsyncSession = Depends(get_db_session),
+) -> list[TankCalculation]:
+    """Tank counts and product volumes for every mix against every paddock set."""
+    return await plan_tanks(
+        session,
+        auth.owner_id,
+        payload.mix_ids,
+        payload.paddock_sets,
+        payload.tank_capacity_l,
+        payload.water_rate_l_per_ha,
+    )
+
+
+@router.post("/{mix_id}/tanks", response_model=TankCalculation)
+async def calculate_mix_tanks(
+    mix_id: uuid.UUID,
+    payload: TankCalculationRequest,
+    auth: AuthContext = Depends(get_current_auth),
+    session: AsyncSession = Depends(get_db_session),
+) -> TankCalculation:
+    plans = await plan_tanks(
+        session,
+        auth.owner_id,
+        [mix_id],
+        [payload.paddock_ids],
+        payload.tank_capacity_l,
+        payload.water_rate_l_per_ha,
+    )
+    return plans[0]
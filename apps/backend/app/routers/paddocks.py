@@ -3,18 +3,36 @@ from __future__ import annotations
 import uuid
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..auth import AuthContext, get_current_auth
 from ..db import get_db_session
-from ..schemas import PaddockResponse, PaddockUpdate
+from ..models import ApplicationPaddock
+from ..schemas import PaddockLocation, PaddockResponse, PaddockUpdate
 from ..services.ownership import ensure_paddock
+from ..services.paddock_index import paddock_indexes, parse_boundary
 from ..services.serializers import serialize_paddock
+from ..services.sync import record_tombstone, touch_applications
 
 router = APIRouter(prefix="/api/paddocks", tags=["paddocks"])
 
 
+@router.get("/locate", response_model=list[PaddockLocation])
+async def locate_paddock(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    auth: AuthContext = Depends(get_current_auth),
+    session: AsyncSession = Depends(get_db_session),
+) -> list[PaddockLocation]:
+    """Paddocks whose boundary contains the coordinate; empty when it is in none of them."""
+    index = await paddock_indexes.get(session, auth.owner_id)
+    return [
+        PaddockLocation(paddock_id=shape.id, farm_id=shape.farm_id, name=shape.name) for shape in index.locate(lat, lng)
+    ]
+
+
 @router.patch("/{paddock_id}", response_model=PaddockResponse)
 async def update_paddock(
     paddock_id: uuid.UUID,
@@ -39,11 +57,18 @@ async def update_paddock(
     if payload.gps_accuracy_m is not None:
         paddock.gps_accuracy_m = payload.gps_accuracy_m
         updated = True
+    if "boundary" in payload.model_fields_set:
+        # An explicit null clears the boundary.
+        if payload.boundary is not None:
+            parse_boundary(payload.boundary)
+        paddock.boundary = payload.boundary
+        updated = True
     if updated and (payload.gps_latitude is not None or payload.gps_longitude is not None):
         paddock.gps_updated_at = datetime.now(timezone.utc)
     if not updated:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No fields to update")
     await session.commit()
+    paddock_indexes.invalidate(auth.owner_id)
     await session.refresh(paddock)
     return serialize_paddock(paddock)
 
@@ -59,6 +84,12 @@ async def delete_paddock(
     session: AsyncSession = Depends(get_db_session),
 ) -> Response:
     paddock = await ensure_paddock(session, paddock_id, auth.owner_id)
+    # The cascade changes these applications' paddock ids, so sync clients must refetch them.
+    await touch_applications(
+        session, select(ApplicationPaddock.application_id).where(ApplicationPaddock.paddock_id == paddock_id)
+    )
+    await record_tombstone(session, auth.owner_id, "paddock", paddock_id)
     await session.delete(paddock)
     await session.commit()
+    paddock_indexes.invalidate(auth.owner_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime, timezone
-from typing import Any, Mapping
+from typing import Any, Awaitable, Callable, Mapping
 from pathlib import Path
 
 from fastapi import APIRouter, HTTPException, Request
@@ -19,6 +20,10 @@ TEMPLATE_NAME = "application.html"
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
 
+async def _maybe(lookup: Callable[[str], Awaitable[Any]], key: str | None) -> Any:
+    return await lookup(key) if key else None
+
+
 def kph_to_ms(value: Any) -> float | None:
     if value is None:
         return None
@@ -43,8 +48,10 @@ async def preview_application(request: Request, application_id: str):
     if not app_row:
         raise HTTPException(404, "Application not found")
 
-    owner = await get_owner_by_id(app_row["owner_id"]) if app_row.get("owner_id") else None
-    paddock = await get_paddock_by_id(app_row["paddock_id"]) if app_row.get("paddock_id") else None
+    owner, paddock = await asyncio.gather(
+        _maybe(get_owner_by_id, app_row.get("owner_id")),
+        _maybe(get_paddock_by_id, app_row.get("paddock_id")),
+    )
 
     weather = {
         "wind_speed_ms": kph_to_ms(app_row.get("weather_wind_kph")),
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..auth import AuthContext, get_current_auth
+from ..db import get_db_session
+from ..schemas import SyncChangesResponse, SyncPushRequest, SyncPushResponse
+from ..services.sync import apply_sync_batch, collect_changes
+
+router = APIRouter(prefix="/api/sync", tags=["sync"])
+
+
+@router.get("/changes", response_model=SyncChangesResponse)
+async def list_changes(
+    since: str | None = Query(default=None),
+    auth: AuthContext = Depends(get_current_auth),
+    session: AsyncSession = Depends(get_db_session),
+) -> SyncChangesResponse:
+    """Farms, paddocks, mixes and applications changed since the ``cursor`` of a previous call."""
+    return await collect_changes(session, auth.owner_id, since)
+
+
+@router.post("/push", response_model=SyncPushResponse)
+async def push_changes(
+    batch: SyncPushRequest,
+    auth: AuthContext = Depends(get_current_auth),
+    session: AsyncSession = Depends(get_db_session),
+) -> SyncPushResponse:
+    """Apply records created offline; safe to resend after a dropped connection."""
+    results = await apply_sync_batch(session, batch, auth)
+    await session.commit()
+    return SyncPushResponse(results=results)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..auth import AuthContext, get_current_auth
+from ..config import get_settings
+from ..db import get_db_session
+from ..models import ApplicationPaddock, ApplicationTrack
+from ..schemas import TrackSummary
+from ..services.ownership import ensure_application
+from ..services.paddock_index import paddock_indexes
+from ..services.sync import touch_applications
+from ..services.tracks import decode_track, max_track_bytes, new_track_row, track_metrics
+
+router = APIRouter(prefix="/api/applications", tags=["tracks"])
+
+_SUMMARY_COLUMNS = [column for column in ApplicationTrack.__table__.columns if column.key != "data"]
+
+
+@router.get("/{application_id}/tracks", response_model=list[TrackSummary])
+async def list_tracks(
+    application_id: uuid.UUID,
+    auth: AuthContext = Depends(get_current_auth),
+    session: AsyncSession = Depends(get_db_session),
+) -> list[TrackSummary]:
+    await ensure_application(session, application_id, auth.owner_id)
+    rows = await session.execute(
+        select(*_SUMMARY_COLUMNS)
+        .where(ApplicationTrack.application_id == application_id, ApplicationTrack.owner_id == auth.owner_id)
+        .order_by(ApplicationTrack.started_at)
+    )
+    return [TrackSummary.model_validate(row) for row in rows]
+
+
+@router.post("/{application_id}/tracks", response_model=TrackSummary, status_code=status.HTTP_201_CREATED)
+async def upload_track(
+    application_id: uuid.UUID,
+    request: Request,
+    boom_width_m: float | None = Query(default=None, alias="boomWidthM", gt=0, le=100),
+    auth: AuthContext = Depends(get_current_auth),
+    session: AsyncSession = Depends(get_db_session),
+) -> TrackSummary:
+    """Attach a GPS track sent as the packed binary format (optionally gzipped) in the request body."""
+    application = await ensure_application(session, application_id, auth.owner_id)
+    if application.finalized:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Application is finalized")
+
+    max_points = get_settings().track_max_points
+    # Gzipped bodies are bounded again after decompression, in decode_track.
+    limit = max_track_bytes(max_points)
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > limit:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Track is too large")
+
+    track, data = decode_track(bytes(body), max_points)
+    paddock_ids = (
+        await session.execute(
+            select(ApplicationPaddock.paddock_id).where(ApplicationPaddock.application_id == application_id)
+        )
+    ).scalars().all()
+    index = await paddock_indexes.get(session, auth.owner_id)
+    shapes = [shape for shape in (index.get(pid) for pid in paddock_ids) if shape is not None]
+
+    # Vectorised, but still about 150 ms for a day at 5 Hz; keep it off the event loop.
+    metrics = await asyncio.to_thread(track_metrics, track, boom_width_m, shapes)
+    row = new_track_row(auth.owner_id, application_id, track, data, boom_width_m, metrics)
+    await session.execute(insert(ApplicationTrack), [row])
+    await touch_applications(session, [application_id])
+    await session.commit()
+    return TrackSummary.model_validate(row)
@@ -1,20 +1,28 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import asyncio
+from datetime import datetime, timedelta, timezone
 import uuid
 
-import httpx
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, ConfigDict, Field
-from sqlalchemy import select, update
+from sqlalchemy import Float, cast, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..auth import AuthContext, get_current_auth
+from ..config import get_settings
 from ..db import get_db_session
-from ..models import Application, BlynkStation
-from ..schemas import WeatherSnapshot
+from ..models import Application, BlynkStation, WeatherReading
+from ..schemas import WeatherExceedance, WeatherHistoryBucket, WeatherHistoryResponse, WeatherSnapshot
 from ..services.ownership import ensure_application
-from ..utils import to_float
+from ..services.weather import (
+    latest_reading,
+    nearest_reading,
+    reading_payload,
+    station_readings,
+    store_readings,
+)
+from ..services.weather_history import downsample
 
 router = APIRouter(prefix="/api/weather", tags=["weather"])
 
@@ -27,34 +35,13 @@ async def _get_station(
     return result.scalar_one_or_none()
 
 
-async def _fetch_weather_payload(station: BlynkStation) -> dict[str, float | None]:
-    params: dict[str, str] = {}
-    headers: dict[str, str] = {}
-    if station.auth_token:
-        params["token"] = station.auth_token
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.get(station.read_url, params=params, headers=headers)
-        try:
-            response.raise_for_status()
-        except httpx.HTTPStatusError as exc:
-            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Failed to fetch weather") from exc
-        try:
-            data = response.json()
-        except ValueError as exc:
-            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Invalid weather payload") from exc
-    return {
-        "wind_speed_ms": to_float(data.get("wind_speed_ms")),
-        "wind_direction_deg": to_float(data.get("wind_direction_deg")),
-        "temp_c": to_float(data.get("temp_c")),
-        "humidity_pct": to_float(data.get("humidity_pct")),
-    }
-
-
 class WeatherFetchRequest(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
     station_id: str = Field(..., min_length=1, alias="stationId")
     application_id: uuid.UUID | None = Field(default=None, alias="applicationId")
+    # Stamp the application with the stored reading nearest its started_at instead of the latest one.
+    at_started_at: bool = Field(default=False, alias="atStartedAt")
 
 
 @router.post("/fetch", response_model=WeatherSnapshot)
@@ -67,14 +54,39 @@ async def fetch_weather(
     if station is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Weather station not found")
 
-    payload = await _fetch_weather_payload(station)
-    fetched_at = datetime.now(timezone.utc)
-
+    application: Application | None = None
     if request.application_id is not None:
-        await ensure_application(session, request.application_id, auth.owner_id)
+        application = await ensure_application(session, request.application_id, auth.owner_id)
+
+    settings = get_settings()
+    if request.at_started_at:
+        if application is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="atStartedAt requires applicationId")
+        reading = await nearest_reading(
+            session, station.id, application.started_at, settings.weather_nearest_max_gap_seconds
+        )
+        if reading is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="No stored weather reading near the application start"
+            )
+        payload, fetched_at, cached = reading_payload(reading), reading.observed_at, True
+    else:
+        # Polled samples first; only go to the station when none is fresh enough.
+        reading = await latest_reading(session, station.id, settings.weather_cache_max_age_seconds)
+        if reading is not None:
+            payload, fetched_at, cached = reading_payload(reading), reading.observed_at, True
+        else:
+            # End the read transaction so a slow station does not hold a pooled connection;
+            # commit rather than rollback, which would expire station and application.
+            await session.commit()
+            payload, fetched_at, cached = await station_readings.get(station)
+            if not cached:
+                await store_readings(session, [(station.id, fetched_at, payload)])
+
+    if application is not None:
         await session.execute(
             update(Application)
-            .where(Application.id == request.application_id, Application.owner_id == auth.owner_id)
+            .where(Application.id == application.id, Application.owner_id == auth.owner_id)
             .values(
                 wind_speed_ms=payload["wind_speed_ms"],
                 wind_direction_deg=payload["wind_direction_deg"],
@@ -82,7 +94,7 @@ async def fetch_weather(
                 humidity_pct=payload["humidity_pct"],
             )
         )
-        await session.commit()
+    await session.commit()
 
     return WeatherSnapshot(
         station_id=station.station_id,
@@ -91,4 +103,58 @@ async def fetch_weather(
         temp_c=payload["temp_c"],
         humidity_pct=payload["humidity_pct"],
         fetched_at=fetched_at,
+        cached=cached,
+        age_seconds=(datetime.now(timezone.utc) - fetched_at).total_seconds(),
+    )
+
+
+@router.get("/stations/{station_id}/history", response_model=WeatherHistoryResponse)
+async def weather_history(
+    station_id: str,
+    start: datetime = Query(...),
+    end: datetime = Query(...),
+    buckets: int = Query(default=300, ge=1, le=2000),
+    wind_limit_ms: float | None = Query(default=None, ge=0, alias="windLimitMs"),
+    auth: AuthContext = Depends(get_current_auth),
+    session: AsyncSession = Depends(get_db_session),
+) -> WeatherHistoryResponse:
+    """Stored readings over ``[start, end)`` reduced to min/max/mean per bucket."""
+    if start.tzinfo is None or end.tzinfo is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start and end need a UTC offset")
+    if end <= start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end must be after start")
+    if end - start > timedelta(days=366):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Range is limited to 366 days")
+
+    station = await _get_station(session, auth.owner_id, station_id)
+    if station is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Weather station not found")
+
+    query = (
+        select(
+            cast(func.extract("epoch", WeatherReading.observed_at), Float),
+            WeatherReading.wind_speed_ms,
+            WeatherReading.wind_direction_deg,
+            WeatherReading.temp_c,
+            WeatherReading.humidity_pct,
+        )
+        .where(
+            WeatherReading.station_id == station.id,
+            WeatherReading.observed_at >= start,
+            WeatherReading.observed_at < end,
+        )
+        .order_by(WeatherReading.observed_at)
+    )
+    rows = (await session.execute(query)).all()
+    # Keep the event loop free while NumPy reduces a large range.
+    reduced = await asyncio.to_thread(downsample, rows, start, end, buckets, wind_limit_ms)
+
+    return WeatherHistoryResponse(
+        station_id=station.station_id,
+        start=start,
+        end=end,
+        bucket_seconds=(end - start).total_seconds() / buckets,
+        wind_limit_ms=wind_limit_ms,
+        buckets=[WeatherHistoryBucket(**bucket) for bucket in reduced["buckets"]],
+        exceedances=[WeatherExceedance(**interval) for interval in reduced["exceedances"]],
     )
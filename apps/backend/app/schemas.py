@@ -2,9 +2,9 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Any, Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class FarmCreate(BaseModel):
@@ -58,9 +58,64 @@ class MixResponse(BaseModel):
     created_at: datetime = Field(alias="createdAt")
 
 
+class TankCalculationRequest(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    paddock_ids: list[uuid.UUID] = Field(..., alias="paddockIds", min_length=1, max_length=500)
+    tank_capacity_l: float = Field(..., alias="tankCapacityL", gt=0)
+    # Spray volume per hectare; without it the mix's totalWaterL is the job's whole volume.
+    water_rate_l_per_ha: float | None = Field(default=None, alias="waterRateLPerHa", gt=0)
+
+
+TANK_PLAN_MAX_COMBINATIONS = 1000
+
+
+class TankPlanRequest(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    mix_ids: list[uuid.UUID] = Field(..., alias="mixIds", min_length=1, max_length=100)
+    paddock_sets: list[Annotated[list[uuid.UUID], Field(min_length=1, max_length=500)]] = Field(
+        ..., alias="paddockSets", min_length=1, max_length=100
+    )
+    tank_capacity_l: float = Field(..., alias="tankCapacityL", gt=0)
+    water_rate_l_per_ha: float | None = Field(default=None, alias="waterRateLPerHa", gt=0)
+
+    @model_validator(mode="after")
+    def _cap_combinations(self) -> "TankPlanRequest":
+        if len(self.mix_ids) * len(self.paddock_sets) > TANK_PLAN_MAX_COMBINATIONS:
+            raise ValueError(f"mixIds x paddockSets may be at most {TANK_PLAN_MAX_COMBINATIONS} combinations")
+        return self
+
+
+class TankProductAmount(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    chemical: str
+    rate_l_per_ha: float = Field(alias="rateLPerHa")
+    total_l: float = Field(alias="totalL")
+    per_full_tank_l: float = Field(alias="perFullTankL")
+    final_tank_l: float = Field(alias="finalTankL")
+
+
+class TankCalculation(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    mix_id: uuid.UUID = Field(alias="mixId")
+    paddock_ids: list[uuid.UUID] = Field(alias="paddockIds")
+    area_ha: float = Field(alias="areaHa")
+    water_l: float = Field(alias="waterL")
+    tank_capacity_l: float = Field(alias="tankCapacityL")
+    tank_count: int = Field(alias="tankCount")
+    full_tanks: int = Field(alias="fullTanks")
+    # 0 when the volume fills a whole number of tanks.
+    final_tank_water_l: float = Field(alias="finalTankWaterL")
+    products: list[TankProductAmount]
+
+
 class PaddockCreate(BaseModel):
     name: str = Field(..., min_length=1)
     area_hectares: float | None = Field(default=None, ge=0)
+    boundary: dict[str, Any] | None = None
 
 
 class PaddockUpdate(BaseModel):
@@ -69,6 +124,7 @@ class PaddockUpdate(BaseModel):
     gps_latitude: Optional[float] = None
     gps_longitude: Optional[float] = None
     gps_accuracy_m: Optional[float] = Field(default=None, ge=0)
+    boundary: Optional[dict[str, Any]] = None
 
 
 class PaddockResponse(BaseModel):
@@ -82,9 +138,29 @@ class PaddockResponse(BaseModel):
     gps_longitude: float | None
     gps_accuracy_m: float | None
     gps_updated_at: datetime | None
+    boundary: dict[str, Any] | None = None
     created_at: datetime
 
 
+class PaddockLocation(BaseModel):
+    paddock_id: uuid.UUID
+    farm_id: uuid.UUID
+    name: str
+
+
+class PaddockImportError(BaseModel):
+    index: int
+    name: str | None
+    error: str
+
+
+class PaddockImportResponse(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    errors: list[PaddockImportError]
+
+
 class ApplicationPaddockPayload(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
@@ -108,6 +184,20 @@ class ApplicationCreate(BaseModel):
     water_source: str | None = Field(default=None, alias="waterSource")
 
 
+class ApplicationBulkCreate(BaseModel):
+    applications: list[ApplicationCreate] = Field(..., min_length=1, max_length=500)
+
+
+class ApplicationExportFilter(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    started_from: datetime | None = Field(default=None, alias="startedFrom")
+    started_to: datetime | None = Field(default=None, alias="startedTo")
+    paddock_id: uuid.UUID | None = Field(default=None, alias="paddockId")
+    farm_id: uuid.UUID | None = Field(default=None, alias="farmId")
+    finalized: bool | None = None
+
+
 class ApplicationPaddockResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -169,6 +259,182 @@ class WeatherSnapshot(BaseModel):
     temp_c: float | None = Field(default=None, alias="temperatureC")
     humidity_pct: float | None = Field(default=None, alias="humidityPct")
     fetched_at: datetime = Field(alias="fetchedAt")
+    cached: bool = False
+    age_seconds: float = Field(default=0.0, alias="ageSeconds")
+
+
+class WeatherHistoryBucket(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    start: datetime
+    end: datetime
+    samples: int
+    wind_exceeded: bool = Field(alias="windExceeded")
+    wind_speed_min: float | None = Field(default=None, alias="windSpeedMinMs")
+    wind_speed_max: float | None = Field(default=None, alias="windSpeedMaxMs")
+    wind_speed_mean: float | None = Field(default=None, alias="windSpeedMeanMs")
+    wind_direction_mean: float | None = Field(default=None, alias="windDirectionMeanDeg")
+    temp_min: float | None = Field(default=None, alias="temperatureMinC")
+    temp_max: float | None = Field(default=None, alias="temperatureMaxC")
+    temp_mean: float | None = Field(default=None, alias="temperatureMeanC")
+    humidity_min: float | None = Field(default=None, alias="humidityMinPct")
+    humidity_max: float | None = Field(default=None, alias="humidityMaxPct")
+    humidity_mean: float | None = Field(default=None, alias="humidityMeanPct")
+
+
+class WeatherExceedance(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    start: datetime
+    end: datetime
+    max_wind_speed_ms: float = Field(alias="maxWindSpeedMs")
+
+
+class WeatherHistoryResponse(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    station_id: str = Field(alias="stationId")
+    start: datetime
+    end: datetime
+    bucket_seconds: float = Field(alias="bucketSeconds")
+    wind_limit_ms: float | None = Field(default=None, alias="windLimitMs")
+    buckets: list[WeatherHistoryBucket]
+    exceedances: list[WeatherExceedance]
+
+
+class TrackSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
+    id: uuid.UUID
+    application_id: uuid.UUID = Field(alias="applicationId")
+    started_at: datetime = Field(alias="startedAt")
+    ended_at: datetime = Field(alias="endedAt")
+    point_count: int = Field(alias="pointCount")
+    boom_width_m: float | None = Field(default=None, alias="boomWidthM")
+    distance_m: float = Field(alias="distanceM")
+    sprayed_distance_m: float = Field(alias="sprayedDistanceM")
+    covered_area_ha: float | None = Field(default=None, alias="coveredAreaHa")
+    tracked_seconds: float = Field(alias="trackedSeconds")
+    paddock_seconds: dict[str, float] = Field(alias="paddockSeconds")
+
+
+class ComplianceRulesResponse(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    wind_min_ms: float = Field(alias="windMinMs")
+    wind_max_ms: float = Field(alias="windMaxMs")
+    delta_t_min: float = Field(alias="deltaTMin")
+    delta_t_max: float = Field(alias="deltaTMax")
+
+
+class ComplianceResult(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    application_id: uuid.UUID = Field(alias="applicationId")
+    started_at: datetime = Field(alias="startedAt")
+    verdict: str
+    delta_t: float | None = Field(default=None, alias="deltaT")
+    wind_speed_ms: float | None = Field(default=None, alias="windSpeedMs")
+    violations: list[str]
+
+
+class ComplianceReportResponse(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    rules: ComplianceRulesResponse
+    summary: dict[str, int]
+    results: list[ComplianceResult]
+
+
+class JobResponse(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: uuid.UUID
+    kind: str
+    status: str
+    stage: str | None = None
+    completed_stages: list[str] = Field(default_factory=list, alias="completedStages")
+    attempts: int = 0
+    error: str | None = None
+    result: dict[str, Any] | None = None
+    created_at: datetime = Field(alias="createdAt")
+    updated_at: datetime = Field(alias="updatedAt")
+
+
+class SyncApplicationItem(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    idempotency_key: str = Field(..., min_length=1, max_length=200, alias="idempotencyKey")
+    application: ApplicationCreate
+
+
+class SyncPaddockLinkItem(BaseModel):
+    """Adds a paddock to an application, referenced by server id or by the key that created it."""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    idempotency_key: str = Field(..., min_length=1, max_length=200, alias="idempotencyKey")
+    application_id: uuid.UUID | None = Field(default=None, alias="applicationId")
+    application_key: str | None = Field(default=None, alias="applicationKey")
+    paddock: ApplicationPaddockPayload
+
+
+class SyncWeatherItem(BaseModel):
+    """Weather for an application; ``stationId`` with ``fetchedAt`` also stores it as that station's reading."""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    idempotency_key: str = Field(..., min_length=1, max_length=200, alias="idempotencyKey")
+    application_id: uuid.UUID | None = Field(default=None, alias="applicationId")
+    application_key: str | None = Field(default=None, alias="applicationKey")
+    station_id: str | None = Field(default=None, alias="stationId")
+    wind_speed_ms: float | None = Field(default=None, alias="windSpeedMs")
+    wind_direction_deg: float | None = Field(default=None, alias="windDirectionDeg")
+    temp_c: float | None = Field(default=None, alias="temperatureC")
+    humidity_pct: float | None = Field(default=None, alias="humidityPct")
+    fetched_at: datetime | None = Field(default=None, alias="fetchedAt")
+
+
+class SyncPushRequest(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    applications: list[SyncApplicationItem] = Field(default_factory=list, max_length=500)
+    paddock_links: list[SyncPaddockLinkItem] = Field(default_factory=list, max_length=2000, alias="paddockLinks")
+    weather: list[SyncWeatherItem] = Field(default_factory=list, max_length=500)
+
+
+class SyncItemResult(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    idempotency_key: str = Field(alias="idempotencyKey")
+    kind: str
+    status: str  # created | duplicate | rejected
+    entity_id: uuid.UUID | None = Field(default=None, alias="entityId")
+    error: str | None = None
+
+
+class SyncPushResponse(BaseModel):
+    results: list[SyncItemResult]
+
+
+class SyncTombstoneResponse(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    entity: str
+    id: uuid.UUID
+    deleted_at: datetime = Field(alias="deletedAt")
+
+
+class SyncChangesResponse(BaseModel):
+    """Rows changed since the request cursor; ``reset`` means replace local data instead of merging."""
+
+    cursor: str
+    reset: bool
+    farms: list[FarmResponse]
+    paddocks: list[PaddockResponse]
+    mixes: list[MixResponse]
+    applications: list[ApplicationSummary]
+    deleted: list[SyncTombstoneResponse]
 
 
 class RecordResponse(BaseModel):
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import uuid
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..auth import AuthContext
+from ..models import Application, ApplicationPaddock, Paddock
+from ..schemas import ApplicationCreate, ApplicationExportFilter, ApplicationPaddockPayload
+from .ownership import ensure_paddocks
+from .paddock_index import ensure_fixes_within_boundaries
+
+
+def _paddock_payloads(payload: ApplicationCreate) -> list[ApplicationPaddockPayload]:
+    paddock_payloads: list[ApplicationPaddockPayload] | None = payload.paddocks
+    if not paddock_payloads and payload.paddock_ids:
+        paddock_payloads = [ApplicationPaddockPayload(paddock_id=pid) for pid in payload.paddock_ids]
+    if not paddock_payloads:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="At least one paddock is required")
+    return paddock_payloads
+
+
+def apply_application_filters(query: Select, owner_id: uuid.UUID, filters: ApplicationExportFilter) -> Select:
+    query = query.where(Application.owner_id == owner_id)
+    if filters.started_from is not None:
+        query = query.where(Application.started_at >= filters.started_from)
+    if filters.started_to is not None:
+        query = query.where(Application.started_at < filters.started_to)
+    if filters.finalized is not None:
+        query = query.where(Application.finalized.is_(filters.finalized))
+    if filters.paddock_id is not None or filters.farm_id is not None:
+        links = select(ApplicationPaddock.application_id).join(Paddock, Paddock.id == ApplicationPaddock.paddock_id)
+        if filters.paddock_id is not None:
+            links = links.where(ApplicationPaddock.paddock_id == filters.paddock_id)
+        if filters.farm_id is not None:
+            links = links.where(Paddock.farm_id == filters.farm_id)
+        query = query.where(Application.id.in_(links.where(Paddock.owner_id == owner_id)))
+    return query
+
+
+def application_summary_select() -> Select:
+    """Summary columns only, with paddock ids aggregated in SQL.
+
+    Rows go through ``serialize_application_summary_row``; no Application or
+    ApplicationPaddock objects are hydrated.
+    """
+    paddock_ids = (
+        select(func.array_agg(ApplicationPaddock.paddock_id))
+        .where(ApplicationPaddock.application_id == Application.id)
+        .scalar_subquery()
+        .label("paddock_ids")
+    )
+    return select(
+        Application.id,
+        Application.owner_id,
+        Application.mix_id,
+        Application.started_at,
+        Application.finished_at,
+        Application.finalized,
+        Application.wind_speed_ms,
+        Application.wind_direction_deg,
+        Application.temp_c,
+        Application.humidity_pct,
+        paddock_ids,
+    )
+
+
+def paddock_link_row(
+    owner_id: uuid.UUID, application_id: uuid.UUID, payload: ApplicationPaddockPayload, now: datetime
+) -> dict[str, Any]:
+    has_gps = payload.gps_lat is not None and payload.gps_lng is not None
+    return {
+        "id": uuid.uuid4(),
+        "owner_id": owner_id,
+        "application_id": application_id,
+        "paddock_id": payload.paddock_id,
+        "gps_latitude": payload.gps_lat,
+        "gps_longitude": payload.gps_lng,
+        "gps_accuracy_m": payload.gps_accuracy_m,
+        "gps_captured_at": now if has_gps else None,
+    }
+
+
+def application_rows(
+    payload: ApplicationCreate, auth: AuthContext, now: datetime
+) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """Validate one create payload and return its application row and paddock link rows."""
+    owner_id = payload.owner_id or auth.owner_id
+    if owner_id != auth.owner_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot create application for another owner")
+    paddock_payloads = _paddock_payloads(payload)
+
+    application_id = uuid.uuid4()
+    row = {
+        "id": application_id,
+        "owner_id": owner_id,
+        "mix_id": payload.mix_id,
+        "operator_user_id": payload.operator_user_id or auth.user_id,
+        "started_at": payload.started_at or now,
+        "notes": payload.notes,
+        "water_source": payload.water_source,
+        "created_at": now,
+    }
+    return row, [paddock_link_row(owner_id, application_id, p, now) for p in paddock_payloads]
+
+
+async def insert_application_rows(
+    session: AsyncSession, application_rows: Sequence[dict[str, Any]], link_rows: Sequence[dict[str, Any]]
+) -> None:
+    # executemany: SQLAlchemy batches these into multi-row INSERT ... VALUES statements.
+    if application_rows:
+        await session.execute(insert(Application), list(application_rows))
+    if link_rows:
+        await session.execute(insert(ApplicationPaddock), list(link_rows))
+
+
+async def create_applications(
+    session: AsyncSession, payloads: Sequence[ApplicationCreate], auth: AuthContext
+) -> list[uuid.UUID]:
+    """Insert applications and their paddock links without committing.
+
+    Every referenced paddock is checked in one query, and captured GPS fixes
+    against the owner's cached boundary index. Each table then gets a
+    single batched multi-row INSERT, however many applications and paddocks the
+    payloads carry. Returns the new ids in payload order.
+    """
+    now = datetime.now(timezone.utc)
+    app_rows: list[dict[str, Any]] = []
+    link_rows: list[dict[str, Any]] = []
+    for payload in payloads:
+        row, links = application_rows(payload, auth, now)
+        app_rows.append(row)
+        link_rows.extend(links)
+
+    await ensure_paddocks(session, (row["paddock_id"] for row in link_rows), auth.owner_id)
+    await ensure_fixes_within_boundaries(session, auth.owner_id, link_rows)
+    await insert_application_rows(session, app_rows, link_rows)
+    return [row["id"] for row in app_rows]
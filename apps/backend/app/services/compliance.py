@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+from sqlalchemy import Float, and_, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import Settings, get_settings
+from ..models import Application, ApplicationPaddock
+from ..schemas import ApplicationExportFilter, ComplianceReportResponse, ComplianceResult, ComplianceRulesResponse
+from .applications import apply_application_filters
+
+# Kept last: missing weather alone makes a record incomplete rather than failed.
+VIOLATIONS = ("wind_low", "wind_high", "delta_t_low", "delta_t_high", "missing_gps", "missing_weather")
+
+
+@dataclass(frozen=True)
+class ComplianceRules:
+    wind_min_ms: float
+    wind_max_ms: float
+    delta_t_min: float
+    delta_t_max: float
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> ComplianceRules:
+        return cls(
+            wind_min_ms=settings.compliance_wind_min_ms,
+            wind_max_ms=settings.compliance_wind_max_ms,
+            delta_t_min=settings.compliance_delta_t_min,
+            delta_t_max=settings.compliance_delta_t_max,
+        )
+
+    def as_dict(self) -> dict[str, float]:
+        return asdict(self)
+
+
+@dataclass
+class ComplianceColumns:
+    """One array per field, row-aligned; missing values are NaN."""
+
+    application_ids: list[uuid.UUID]
+    started_at: list[datetime]
+    wind_speed_ms: np.ndarray
+    temp_c: np.ndarray
+    humidity_pct: np.ndarray
+    has_gps: np.ndarray
+
+
+def delta_t(temp_c: np.ndarray, humidity_pct: np.ndarray) -> np.ndarray:
+    """Dry bulb minus wet bulb (°C), with wet bulb from Stull (2011).
+
+    Accurate to about 0.3 °C for 5-99 % RH and -20-50 °C, which is well inside
+    the spray-window bands it is compared against.
+    """
+    t, rh = temp_c, humidity_pct
+    wet_bulb = (
+        t * np.arctan(0.151977 * np.sqrt(rh + 8.313659))
+        + np.arctan(t + rh)
+        - np.arctan(rh - 1.676331)
+        + 0.00391838 * rh**1.5 * np.arctan(0.023101 * rh)
+        - 4.686035
+    )
+    return t - wet_bulb
+
+
+def evaluate(columns: ComplianceColumns, rules: ComplianceRules) -> dict[str, np.ndarray]:
+    """Boolean mask per violation code plus the ``delta_t`` column, for all rows at once."""
+    wind, temp, humidity = columns.wind_speed_ms, columns.temp_c, columns.humidity_pct
+    with np.errstate(invalid="ignore"):
+        dt = delta_t(temp, humidity)
+        # NaN compares False, so rows missing a value only trip missing_weather.
+        return {
+            "delta_t": dt,
+            "wind_low": wind < rules.wind_min_ms,
+            "wind_high": wind > rules.wind_max_ms,
+            "delta_t_low": dt < rules.delta_t_min,
+            "delta_t_high": dt > rules.delta_t_max,
+            "missing_gps": ~columns.has_gps,
+            "missing_weather": np.isnan(wind) | np.isnan(temp) | np.isnan(humidity),
+        }
+
+
+def verdicts(columns: ComplianceColumns, rules: ComplianceRules) -> list[dict[str, Any]]:
+    """Per-application results: ``fail`` on any violation, ``incomplete`` if only weather is missing."""
+    masks = evaluate(columns, rules)
+    flags = np.column_stack([masks[code] for code in VIOLATIONS])
+    failed = flags[:, :-1].any(axis=1)
+    results: list[dict[str, Any]] = []
+    for i, application_id in enumerate(columns.application_ids):
+        row_flags = flags[i]
+        if failed[i]:
+            verdict = "fail"
+        elif row_flags[-1]:
+            verdict = "incomplete"
+        else:
+            verdict = "pass"
+        dt = masks["delta_t"][i]
+        results.append(
+            {
+                "application_id": application_id,
+                "started_at": columns.started_at[i],
+                "verdict": verdict,
+                "delta_t": None if np.isnan(dt) else round(float(dt), 2),
+                "wind_speed_ms": None if np.isnan(columns.wind_speed_ms[i]) else float(columns.wind_speed_ms[i]),
+                "violations": [code for code, flagged in zip(VIOLATIONS, row_flags) if flagged],
+            }
+        )
+    return results
+
+
+async def load_compliance_columns(
+    session: AsyncSession, owner_id: uuid.UUID, filters: ApplicationExportFilter
+) -> ComplianceColumns:
+    """Fetch only the numeric columns the rules need and turn them into arrays."""
+    # True only when every linked paddock has a GPS fix; NULL (no links) counts as missing.
+    has_gps = (
+        select(func.bool_and(and_(ApplicationPaddock.gps_latitude.isnot(None), ApplicationPaddock.gps_longitude.isnot(None))))
+        .where(ApplicationPaddock.application_id == Application.id)
+        .scalar_subquery()
+    )
+    query = apply_application_filters(
+        select(
+            Application.id,
+            Application.started_at,
+            cast(Application.wind_speed_ms, Float),
+            cast(Application.temp_c, Float),
+            cast(Application.humidity_pct, Float),
+            func.coalesce(has_gps, False),
+        ),
+        owner_id,
+        filters,
+    ).order_by(Application.started_at)
+    rows = (await session.execute(query)).all()
+
+    ids = [row[0] for row in rows]
+    started = [row[1] for row in rows]
+    numeric = np.array([row[2:5] for row in rows], dtype=np.float64).reshape(len(rows), 3)
+    return ComplianceColumns(
+        application_ids=ids,
+        started_at=started,
+        wind_speed_ms=numeric[:, 0],
+        temp_c=numeric[:, 1],
+        humidity_pct=numeric[:, 2],
+        has_gps=np.array([row[5] for row in rows], dtype=bool),
+    )
+
+
+async def compliance_report(
+    session: AsyncSession,
+    owner_id: uuid.UUID,
+    filters: ApplicationExportFilter,
+    rules: ComplianceRules | None = None,
+) -> ComplianceReportResponse:
+    rules = rules or ComplianceRules.from_settings(get_settings())
+    results = verdicts(await load_compliance_columns(session, owner_id, filters), rules)
+    summary = {"total": len(results), "pass": 0, "fail": 0, "incomplete": 0}
+    for result in results:
+        summary[result["verdict"]] += 1
+    return ComplianceReportResponse(
+        rules=ComplianceRulesResponse(**rules.as_dict()),
+        summary=summary,
+        results=[ComplianceResult(**result) for result in results],
+    )
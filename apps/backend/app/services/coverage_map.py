@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import logging
+import math
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any
+
+import numpy as np
+from fastapi import HTTPException
+from PIL import Image, ImageDraw
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..db import AsyncSessionFactory
+from ..models import Application, ApplicationPaddock, ApplicationTrack, Paddock
+from .paddock_index import M_PER_DEG_LAT, M_PER_DEG_LNG_EQUATOR, parse_boundary
+from .tracks import Track, decode_track, segment_flags
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger("uvicorn.error")
+
+_settings = get_settings()
+
+_WIDTH_PX = 1200
+_MAX_HEIGHT_PX = 900
+_PADDING_PX = 24
+# Simplified tracks may deviate from the recorded path by this much on the map.
+_SIMPLIFY_TOLERANCE_PX = 0.5
+_BOUNDARY_FILL = (241, 245, 233)
+_BOUNDARY_LINE = (46, 94, 46)
+_SPRAYED = (37, 99, 235, 120)
+_UNSPRAYED = (120, 120, 120)
+
+
+def simplify(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas–Peucker: mask of the points to keep so the line stays within ``tolerance``.
+
+    Iterative, and each step measures every point of the current span in one
+    NumPy pass, so Python-level work scales with the points kept, not the
+    points recorded.
+    """
+    n = len(x)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        dx, dy = x[end] - x[start], y[end] - y[start]
+        px, py = x[start + 1 : end] - x[start], y[start + 1 : end] - y[start]
+        norm = math.hypot(dx, dy)
+        distance = np.abs(px * dy - py * dx) / norm if norm > 0 else np.hypot(px, py)
+        i = int(np.argmax(distance))
+        if distance[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def _runs(track_class: np.ndarray) -> list[tuple[int, int, int]]:
+    """``(first point, last point, class)`` for each run of same-class segments, skipping class 0."""
+    if not len(track_class):
+        return []
+    edges = np.flatnonzero(np.diff(track_class)) + 1
+    starts = np.concatenate(([0], edges))
+    ends = np.concatenate((edges, [len(track_class)]))
+    return [(int(s), int(e), int(track_class[s])) for s, e in zip(starts, ends) if track_class[s]]
+
+
+@dataclass(frozen=True)
+class MapTrack:
+    track: Track
+    boom_width_m: float | None
+
+
+def render_coverage_png(polygons: Sequence[list[list[np.ndarray]]], tracks: Sequence[MapTrack]) -> bytes:
+    """Draw paddock outlines (from ``parse_boundary``) with the sprayed swath, boom width to scale, and unsprayed travel on top."""
+    lat_parts = [t.track.lat for t in tracks]
+    lng_parts = [t.track.lng for t in tracks]
+    for parsed in polygons:
+        for polygon in parsed:
+            lng_parts.append(polygon[0][:, 0])
+            lat_parts.append(polygon[0][:, 1])
+    all_lat, all_lng = np.concatenate(lat_parts), np.concatenate(lng_parts)
+    ref_lat, ref_lng = float(all_lat.mean()), float(all_lng.mean())
+    kx = M_PER_DEG_LNG_EQUATOR * math.cos(math.radians(ref_lat))
+
+    def project(lat: np.ndarray, lng: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        return (lng - ref_lng) * kx, (lat - ref_lat) * M_PER_DEG_LAT
+
+    x_all, y_all = project(all_lat, all_lng)
+    min_x, max_x, min_y, max_y = x_all.min(), x_all.max(), y_all.min(), y_all.max()
+    span_x, span_y = max(max_x - min_x, 1.0), max(max_y - min_y, 1.0)
+    scale = min((_WIDTH_PX - 2 * _PADDING_PX) / span_x, (_MAX_HEIGHT_PX - 2 * _PADDING_PX) / span_y)
+    width = int(math.ceil(span_x * scale)) + 2 * _PADDING_PX
+    height = int(math.ceil(span_y * scale)) + 2 * _PADDING_PX
+
+    def to_pixels(x: np.ndarray, y: np.ndarray) -> list[tuple[float, float]]:
+        px = _PADDING_PX + (x - min_x) * scale
+        py = height - _PADDING_PX - (y - min_y) * scale
+        return list(zip(px.tolist(), py.tolist()))
+
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for parsed in polygons:
+        for polygon in parsed:
+            for r, ring in enumerate(polygon):
+                points = to_pixels(*project(ring[:, 1], ring[:, 0]))
+                draw.polygon(points, fill=_BOUNDARY_FILL if r == 0 else "white")
+
+    swath = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    swath_draw = ImageDraw.Draw(swath)
+    travel: list[list[tuple[float, float]]] = []
+    tolerance_m = _SIMPLIFY_TOLERANCE_PX / scale
+    for item in tracks:
+        x, y = project(item.track.lat, item.track.lng)
+        _, _, valid, sprayed = segment_flags(item.track, x, y)
+        boom_px = max(2, round((item.boom_width_m or 0) * scale))
+        for first, last, kind in _runs(valid.astype(np.int8) + sprayed.astype(np.int8)):
+            rx, ry = x[first : last + 1], y[first : last + 1]
+            keep = simplify(rx, ry, tolerance_m)
+            points = to_pixels(rx[keep], ry[keep])
+            if kind == 2:
+                swath_draw.line(points, fill=_SPRAYED, width=boom_px, joint="curve")
+            else:
+                travel.append(points)
+    image.paste(swath, (0, 0), swath)
+    for points in travel:
+        draw.line(points, fill=_UNSPRAYED, width=1)
+
+    for parsed in polygons:
+        for polygon in parsed:
+            for ring in polygon:
+                draw.line(to_pixels(*project(ring[:, 1], ring[:, 0])), fill=_BOUNDARY_LINE, width=2)
+
+    buf = BytesIO()
+    image.convert("P", palette=Image.Palette.ADAPTIVE, colors=32).save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+def _draw(boundaries: Sequence[dict[str, Any]], rows: Sequence[Any]) -> bytes | None:
+    # A corrupt stored track or boundary is left off the map rather than failing the whole PDF.
+    max_points = _settings.track_max_points
+    tracks = []
+    for data, boom_width_m in rows:
+        try:
+            tracks.append(MapTrack(decode_track(data, max_points)[0], boom_width_m))
+        except HTTPException:
+            logger.warning("Skipping unreadable stored track on coverage map")
+            continue
+    if not tracks:
+        return None
+    polygons = []
+    for boundary in boundaries:
+        try:
+            polygons.append(parse_boundary(boundary))
+        except HTTPException:
+            continue
+    return render_coverage_png(polygons, tracks)
+
+
+async def coverage_map_keys(session: AsyncSession, applications: Sequence[Application]) -> dict[uuid.UUID, str]:
+    """Cheap cache keys for the coverage maps of ``applications``; those without tracks are absent.
+
+    Tracks are immutable once uploaded, so their ids plus the linked paddocks'
+    ``updated_at`` identify a map. Applications must have ``paddocks`` and
+    ``paddocks.paddock`` loaded. One query covers the whole batch.
+    """
+    if not applications:
+        return {}
+    rows = await session.execute(
+        select(ApplicationTrack.application_id, ApplicationTrack.id)
+        .where(ApplicationTrack.application_id.in_([a.id for a in applications]))
+        .order_by(ApplicationTrack.application_id, ApplicationTrack.id)
+    )
+    track_ids: dict[uuid.UUID, list[str]] = {}
+    for application_id, track_id in rows:
+        track_ids.setdefault(application_id, []).append(str(track_id))
+
+    keys: dict[uuid.UUID, str] = {}
+    for application in applications:
+        if application.id not in track_ids:
+            continue
+        paddocks = sorted(
+            (str(link.paddock_id), str(link.paddock.updated_at) if link.paddock is not None else "")
+            for link in application.paddocks
+        )
+        material = f"{application.id}|{','.join(track_ids[application.id])}|{paddocks}"
+        keys[application.id] = hashlib.sha256(material.encode()).hexdigest()
+    return keys
+
+
+class CoverageMapCache:
+    """Memoised coverage map PNGs (as data URIs), keyed by ``coverage_map_keys``.
+
+    Finalize, single export and bulk exports of one application share the
+    drawing. A miss loads the tracks with its own session, so callers only
+    need the key until a PDF is actually rendered.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        # Keys change whenever the inputs do, so entries never go stale; the TTL only frees memory.
+        self._cache: TTLCache[str] = TTLCache(maxsize, ttl_seconds=24 * 3600)
+        self._inflight: dict[str, asyncio.Task[str]] = {}
+        self.renders = 0
+
+    async def _render(self, key: str, application_id: uuid.UUID) -> str:
+        async with AsyncSessionFactory() as session:
+            tracks = (
+                await session.execute(
+                    select(ApplicationTrack.data, ApplicationTrack.boom_width_m)
+                    .where(ApplicationTrack.application_id == application_id)
+                    .order_by(ApplicationTrack.started_at)
+                )
+            ).all()
+            boundaries = (
+                await session.execute(
+                    select(Paddock.boundary)
+                    .join(ApplicationPaddock, ApplicationPaddock.paddock_id == Paddock.id)
+                    .where(ApplicationPaddock.application_id == application_id, Paddock.boundary.isnot(None))
+                )
+            ).scalars().all()
+        png = await asyncio.to_thread(_draw, boundaries, tracks)
+        # "" marks "nothing drawable" so the miss is cached too.
+        uri = "data:image/png;base64," + base64.b64encode(png).decode("ascii") if png else ""
+        self.renders += 1
+        self._cache.set(key, uri)
+        return uri
+
+    async def data_uri(self, key: str, application_id: uuid.UUID) -> str:
+        """The map as a data URI, or ``""`` when none of the tracks can be read."""
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._render(key, application_id))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict[str, int]:
+        return {**self._cache.stats(), "renders": self.renders, "inflight": len(self._inflight)}
+
+
+coverage_maps = CoverageMapCache(_settings.coverage_map_cache_size)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+from fastapi import HTTPException, status
+from sqlalchemy import func, update
+
+from ..config import get_settings
+from ..db import AsyncSessionFactory
+from ..http_client import http_client
+from ..models import Application
+from ..pdf import render_application_pdf
+from .coverage_map import coverage_map_keys
+from .jobs import Job, JobRunner, Stage
+from .ownership import ensure_application
+from .serializers import serialize_application_summary
+
+_settings = get_settings()
+
+def storage_key(application_id: uuid.UUID) -> str:
+    return f"applications/{application_id}/application-{application_id}.pdf"
+
+
+def ensure_storage_configured() -> None:
+    if not _settings.supabase_bucket:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="SUPABASE_BUCKET not configured")
+    if not _settings.supabase_url or not _settings.supabase_service_role_key:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Supabase storage credentials not configured"
+        )
+
+
+async def upload_application_pdf(application_id: uuid.UUID, pdf_bytes: bytes) -> str:
+    """Upsert the PDF into Supabase Storage and return its URL (safe to repeat)."""
+    base_url = str(_settings.supabase_url).rstrip("/")
+    bucket = _settings.supabase_bucket
+    key = storage_key(application_id)
+    upload_url = f"{base_url}/storage/v1/object/{bucket}/{key}"
+    headers = {
+        "Authorization": f"Bearer {_settings.supabase_service_role_key}",
+        "Content-Type": "application/pdf",
+        "x-upsert": "true",
+    }
+
+    try:
+        r = await http_client.request("storage", "POST", upload_url, content=pdf_bytes, headers=headers)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Storage upload failed: {e!s}") from e
+    if r.status_code not in (200, 201):
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Storage upload failed: {r.status_code} {r.text}"
+        )
+
+    # Public bucket URL. For a PRIVATE bucket, POST {"expiresIn": 60 * 60 * 24} to
+    # {base_url}/storage/v1/object/sign/{bucket}/{key} and return base_url + signedURL.
+    return f"{base_url}/storage/v1/object/public/{bucket}/{key}"
+
+
+def finalize_stages(application_id: uuid.UUID, owner_id: uuid.UUID) -> list[Stage]:
+    """render -> upload -> mark_finalized; every stage can be re-run safely.
+
+    The rendered bytes only live in the job's scratch state, so a job resumed
+    after a restart renders again (usually a PDF cache hit) before uploading.
+    """
+
+    async def render_pdf() -> bytes:
+        async with AsyncSessionFactory() as session:
+            application = await ensure_application(session, application_id, owner_id, load_relations=True)
+            map_keys = await coverage_map_keys(session, [application])
+            return await render_application_pdf(application, map_keys.get(application.id))
+
+    async def render(job: Job) -> None:
+        job.state["pdf"] = await render_pdf()
+
+    async def upload(job: Job) -> None:
+        pdf_bytes = job.state.get("pdf") or await render_pdf()
+        pdf_url = await upload_application_pdf(application_id, pdf_bytes)
+        job.result = {"pdfUrl": pdf_url}
+
+    async def mark_finalized(job: Job) -> None:
+        async with AsyncSessionFactory() as session:
+            await session.execute(
+                update(Application)
+                .where(Application.id == application_id, Application.owner_id == owner_id)
+                # Keep the first finish time if this stage (or a later finalize) runs again.
+                .values(finalized=True, finished_at=func.coalesce(Application.finished_at, datetime.now(timezone.utc)))
+            )
+            await session.commit()
+            application = await ensure_application(session, application_id, owner_id, load_relations=True)
+            summary = serialize_application_summary(application)
+        job.result = {**(job.result or {}), "application": summary.model_dump(mode="json", by_alias=True)}
+
+    return [("render", render), ("upload", upload), ("mark_finalized", mark_finalized)]
+
+
+finalize_jobs = JobRunner(
+    {"finalize": lambda key, owner_id: finalize_stages(uuid.UUID(key), owner_id)},
+    concurrency=_settings.finalize_job_concurrency,
+    max_attempts=_settings.finalize_job_max_attempts,
+    backoff_seconds=_settings.finalize_job_backoff_seconds,
+    retention_seconds=_settings.finalize_job_retention_seconds,
+    lease_seconds=_settings.finalize_job_lease_seconds,
+)
@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from collections.abc import Awaitable, Callable, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from ..db import AsyncSessionFactory
+from ..models import BackgroundJob
+
+logger = logging.getLogger("uvicorn.error")
+
+ACTIVE_STATUSES = ("queued", "running")
+# Literal, not bound, so Postgres can match the partial unique index background_jobs_active_key.
+_ACTIVE_PREDICATE = text("status IN ('queued', 'running')")
+_JOB_COLUMNS = [column for column in BackgroundJob.__table__.columns if not column.key.startswith("lease_")]
+
+
+@dataclass
+class Job:
+    id: uuid.UUID
+    kind: str
+    key: str
+    owner_id: uuid.UUID
+    status: str = "queued"  # queued | running | succeeded | failed
+    stage: str | None = None
+    completed_stages: list[str] = field(default_factory=list)
+    attempts: int = 0
+    error: str | None = None
+    result: dict[str, Any] | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    # Scratch space shared between stages (e.g. rendered bytes); never stored, so lost on a restart.
+    state: dict[str, Any] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_row(cls, row: Any) -> Job:
+        return cls(
+            id=row.id,
+            kind=row.kind,
+            key=row.key,
+            owner_id=row.owner_id,
+            status=row.status,
+            stage=row.stage,
+            completed_stages=list(row.completed_stages or []),
+            attempts=row.attempts,
+            error=row.error,
+            result=row.result,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+        )
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+    def touch(self, **changes: Any) -> None:
+        for name, value in changes.items():
+            setattr(self, name, value)
+        self.updated_at = datetime.now(timezone.utc)
+
+
+Stage = tuple[str, Callable[[Job], Awaitable[None]]]
+# Builds a job's stages from its key and owner, so a job resumed by another process gets them too.
+StageFactory = Callable[[str, uuid.UUID], Sequence[Stage]]
+
+
+class _LeaseLost(Exception):
+    """Another process claimed the job after this one's lease expired."""
+
+
+def _retryable(exc: BaseException) -> bool:
+    if isinstance(exc, HTTPException):
+        return exc.status_code >= 500 or exc.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    return True
+
+
+class JobRunner:
+    """Background job runner with per-stage retries, backed by ``background_jobs``.
+
+    Each job is an ordered list of named stages. A failed stage is retried with
+    exponential backoff, and stages that already succeeded are not re-run, so
+    stages only need to be idempotent on their own. Submitting while an active
+    job for the same ``(kind, key)`` exists, in any process, returns that job
+    instead of starting a second one.
+
+    Status and stage progress are written to the table as they change, so a
+    poll can be answered by any process. The process running a job holds a
+    lease on its row and renews it every third of ``lease_seconds``. A
+    shutdown releases the lease. Every process sweeps for jobs whose lease
+    has expired, claims as many as it has free slots for, and resumes them
+    from their first incomplete stage. Stage scratch state is not stored, so
+    a resumed stage must not depend on it. Finished jobs are deleted after
+    ``retention_seconds``.
+    """
+
+    def __init__(
+        self,
+        stage_factories: Mapping[str, StageFactory],
+        concurrency: int,
+        max_attempts: int = 3,
+        backoff_seconds: float = 1.0,
+        retention_seconds: float = 3600.0,
+        lease_seconds: float = 60.0,
+    ) -> None:
+        self._factories = dict(stage_factories)
+        self._concurrency = max(1, concurrency)
+        self._semaphore: asyncio.Semaphore | None = None
+        self._max_attempts = max(1, max_attempts)
+        self._backoff = backoff_seconds
+        self._retention = timedelta(seconds=retention_seconds)
+        self._lease = timedelta(seconds=max(lease_seconds, 3.0))
+        self._holder = uuid.uuid4()
+        self._running: dict[uuid.UUID, asyncio.Task[None]] = {}
+        self._maintenance: asyncio.Task[None] | None = None
+        self.resumed = 0
+
+    async def submit(self, kind: str, key: str, owner_id: uuid.UUID) -> Job:
+        """Start a job, or return the active one for ``(kind, key)``."""
+        async with AsyncSessionFactory() as session:
+            async with session.begin():
+                stmt = (
+                    pg_insert(BackgroundJob)
+                    .values(
+                        id=uuid.uuid4(),
+                        owner_id=owner_id,
+                        kind=kind,
+                        key=key,
+                        status="queued",
+                        completed_stages=[],
+                        attempts=0,
+                        lease_holder=self._holder,
+                        lease_expires_at=func.now() + self._lease,
+                    )
+                    .on_conflict_do_nothing(
+                        index_elements=[BackgroundJob.kind, BackgroundJob.key],
+                        index_where=_ACTIVE_PREDICATE,
+                    )
+                    .returning(*_JOB_COLUMNS)
+                )
+                row = (await session.execute(stmt)).one_or_none()
+                if row is None:
+                    existing = (
+                        await session.execute(
+                            select(*_JOB_COLUMNS).where(
+                                BackgroundJob.kind == kind,
+                                BackgroundJob.key == key,
+                                BackgroundJob.status.in_(ACTIVE_STATUSES),
+                            )
+                        )
+                    ).one_or_none()
+                    if existing is not None:
+                        return Job.from_row(existing)
+                    # The active job finished between the two statements; start a new one.
+                    return await self.submit(kind, key, owner_id)
+        job = Job.from_row(row)
+        self._start(job)
+        return job
+
+    async def get(self, job_id: uuid.UUID, owner_id: uuid.UUID) -> Job | None:
+        async with AsyncSessionFactory() as session:
+            row = (
+                await session.execute(
+                    select(*_JOB_COLUMNS).where(BackgroundJob.id == job_id, BackgroundJob.owner_id == owner_id)
+                )
+            ).one_or_none()
+        return Job.from_row(row) if row is not None else None
+
+    def _start(self, job: Job) -> None:
+        task = asyncio.create_task(self._run(job, list(self._factories[job.kind](job.key, job.owner_id))))
+        self._running[job.id] = task
+        task.add_done_callback(lambda _: self._running.pop(job.id, None))
+
+    async def _save(self, job: Job, **changes: Any) -> None:
+        """Apply ``changes`` and write the job's progress, renewing this process's lease."""
+        job.touch(**changes)
+        async with AsyncSessionFactory() as session:
+            async with session.begin():
+                saved = await session.execute(
+                    update(BackgroundJob)
+                    .where(BackgroundJob.id == job.id, BackgroundJob.lease_holder == self._holder)
+                    .values(
+                        status=job.status,
+                        stage=job.stage,
+                        completed_stages=list(job.completed_stages),
+                        attempts=job.attempts,
+                        error=job.error,
+                        result=job.result,
+                        updated_at=job.updated_at,
+                        lease_expires_at=func.now() + self._lease,
+                    )
+                    .returning(BackgroundJob.id)
+                )
+                if saved.scalar_one_or_none() is None:
+                    raise _LeaseLost(str(job.id))
+
+    async def _release(self, job: Job) -> None:
+        """Hand an unfinished job to whichever process sweeps next."""
+        async with AsyncSessionFactory() as session:
+            async with session.begin():
+                await session.execute(
+                    update(BackgroundJob)
+                    .where(BackgroundJob.id == job.id, BackgroundJob.lease_holder == self._holder)
+                    .values(status="queued", lease_holder=None, lease_expires_at=func.now())
+                )
+
+    async def _run_stage(self, job: Job, name: str, fn: Callable[[Job], Awaitable[None]]) -> None:
+        for attempt in range(1, self._max_attempts + 1):
+            await self._save(job, stage=name, attempts=job.attempts + 1)
+            try:
+                await fn(job)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                if attempt == self._max_attempts or not _retryable(exc):
+                    raise
+                delay = self._backoff * 2 ** (attempt - 1)
+                logger.warning(f"Job {job.id} stage {name} attempt {attempt} failed ({exc!s}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _run(self, job: Job, stages: list[Stage]) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        try:
+            async with self._semaphore:
+                # A job that keeps taking its process down is resumed a bounded number of times.
+                if job.attempts >= self._max_attempts * len(stages):
+                    raise RuntimeError(f"Gave up after {job.attempts} attempts")
+                await self._save(job, status="running")
+                for name, fn in stages:
+                    if name in job.completed_stages:
+                        continue
+                    await self._run_stage(job, name, fn)
+                    job.completed_stages.append(name)
+                await self._save(job, status="succeeded", stage=None)
+        except asyncio.CancelledError:
+            # Shutting down: leave the job for the next process rather than failing it.
+            try:
+                await self._release(job)
+            except Exception as e:
+                logger.warning(f"Job {job.id} not released on shutdown; it resumes once its lease expires: {e}")
+            raise
+        except _LeaseLost:
+            logger.warning(f"Job {job.id} ({job.kind}) was taken over by another process")
+        except Exception as exc:
+            detail = exc.detail if isinstance(exc, HTTPException) else str(exc)
+            logger.warning(f"Job {job.id} ({job.kind}) failed at stage {job.stage}: {detail}")
+            try:
+                await self._save(job, status="failed", error=str(detail))
+            except Exception as e:
+                logger.warning(f"Job {job.id} failure not recorded: {e}")
+        finally:
+            job.state.clear()
+
+    async def maintain_once(self) -> int:
+        """Renew this process's leases, resume orphaned jobs and delete expired ones.
+
+        Returns how many orphaned jobs were claimed.
+        """
+        async with AsyncSessionFactory() as session:
+            async with session.begin():
+                await session.execute(
+                    update(BackgroundJob)
+                    .where(BackgroundJob.lease_holder == self._holder, BackgroundJob.status.in_(ACTIVE_STATUSES))
+                    .values(lease_expires_at=func.now() + self._lease)
+                )
+                await session.execute(
+                    delete(BackgroundJob).where(
+                        BackgroundJob.status.notin_(ACTIVE_STATUSES),
+                        BackgroundJob.updated_at < func.now() - self._retention,
+                    )
+                )
+                free = self._concurrency - len(self._running)
+                if free <= 0:
+                    return 0
+                orphans = (
+                    select(BackgroundJob.id)
+                    .where(
+                        BackgroundJob.status.in_(ACTIVE_STATUSES),
+                        BackgroundJob.kind.in_(self._factories),
+                        BackgroundJob.lease_expires_at < func.now(),
+                    )
+                    .order_by(BackgroundJob.created_at)
+                    .limit(free)
+                    .with_for_update(skip_locked=True)
+                )
+                claimed = (
+                    await session.execute(
+                        update(BackgroundJob)
+                        .where(BackgroundJob.id.in_(orphans))
+                        .values(lease_holder=self._holder, lease_expires_at=func.now() + self._lease)
+                        .returning(*_JOB_COLUMNS)
+                    )
+                ).all()
+        for row in claimed:
+            job = Job.from_row(row)
+            logger.info(f"Resuming job {job.id} ({job.kind}) after {', '.join(job.completed_stages) or 'no stages'}")
+            self._start(job)
+        self.resumed += len(claimed)
+        return len(claimed)
+
+    async def _maintain(self) -> None:
+        interval = self._lease.total_seconds() / 3
+        while True:
+            try:
+                await self.maintain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job maintenance failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self) -> None:
+        if self._maintenance is None:
+            self._maintenance = asyncio.create_task(self._maintain())
+
+    async def shutdown(self) -> None:
+        tasks = list(self._running.values())
+        if self._maintenance is not None:
+            tasks.append(self._maintenance)
+            self._maintenance = None
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": len(self._running),
+            "concurrency": self._concurrency,
+            "resumed": self.resumed,
+            "maintaining": self._maintenance is not None,
+        }
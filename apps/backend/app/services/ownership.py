@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import uuid
+from collections.abc import Iterable
 
 from fastapi import HTTPException, status
 from sqlalchemy import Select, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from ..models import Application, Farm, Paddock
+from ..models import Application, ApplicationPaddock, Farm, Paddock
 
 
 async def ensure_farm(session: AsyncSession, farm_id: uuid.UUID, owner_id: uuid.UUID) -> Farm:
@@ -27,12 +29,31 @@ async def ensure_paddock(session: AsyncSession, paddock_id: uuid.UUID, owner_id:
     return paddock
 
 
+async def ensure_paddocks(session: AsyncSession, paddock_ids: Iterable[uuid.UUID], owner_id: uuid.UUID) -> None:
+    """Check that every id is a paddock of ``owner_id`` with a single query."""
+    wanted = set(paddock_ids)
+    if not wanted:
+        return
+    result = await session.execute(select(Paddock.id).where(Paddock.id.in_(wanted), Paddock.owner_id == owner_id))
+    missing = wanted.difference(result.scalars().all())
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Paddock not found: {', '.join(sorted(str(pid) for pid in missing))}",
+        )
+
+
 async def ensure_application(
-    session: AsyncSession, application_id: uuid.UUID, owner_id: uuid.UUID
+    session: AsyncSession, application_id: uuid.UUID, owner_id: uuid.UUID, load_relations: bool = False
 ) -> Application:
     query: Select[tuple[Application]] = select(Application).where(
         Application.id == application_id, Application.owner_id == owner_id
     )
+    if load_relations:
+        query = query.options(
+            selectinload(Application.paddocks).selectinload(ApplicationPaddock.paddock),
+            selectinload(Application.owner),
+        )
     result = await session.execute(query)
     application = result.scalar_one_or_none()
     if application is None:
@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import codecs
+import json
+import math
+import uuid
+import xml.etree.ElementTree as ET
+from collections.abc import AsyncIterable
+from datetime import datetime, timezone
+from typing import Any, Literal
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Paddock
+from ..schemas import PaddockImportError, PaddockImportResponse
+from .paddock_index import boundary_metrics, parse_boundary
+
+ImportFormat = Literal["geojson", "kml"]
+
+# Features are validated and written in batches of this many, so memory stays
+# flat however large the file is.
+_BATCH_SIZE = 500
+# An unfinished feature larger than this means the file is malformed, not slow.
+_MAX_FEATURE_CHARS = 16 * 1024 * 1024
+_NAME_KEYS = ("name", "Name", "NAME", "paddock", "Paddock", "PADDOCK")
+# The character that must arrive before a value starting with the key can finish.
+_CLOSERS = {"{": "}", "[": "]", '"': '"'}
+
+
+class GeoJSONFeatureParser:
+    """Incremental parser that yields the features of a FeatureCollection as bytes arrive.
+
+    Only the feature being decoded is held in memory. Other top-level members
+    (``crs``, ``name``...) are decoded and dropped.
+    """
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buf = ""
+        self._pos = 0
+        # Characters after _pos already known not to finish the pending value.
+        self._scanned = 0
+        self._state = "start"
+        self._key: str | None = None
+        self._saw_features = False
+
+    def feed(self, data: bytes) -> list[dict[str, Any]]:
+        self._buf = self._buf[self._pos :] + self._text.decode(data)
+        self._pos = 0
+        return self._parse(final=False)
+
+    def close(self) -> list[dict[str, Any]]:
+        self._buf = self._buf[self._pos :] + self._text.decode(b"", final=True)
+        self._pos = 0
+        features = self._parse(final=True)
+        if self._state != "done":
+            raise ValueError("unexpected end of file")
+        if not self._saw_features:
+            raise ValueError("expected a FeatureCollection with a features array")
+        return features
+
+    def _next_char(self) -> str | None:
+        while self._pos < len(self._buf) and self._buf[self._pos] in " \t\r\n":
+            self._pos += 1
+        return self._buf[self._pos] if self._pos < len(self._buf) else None
+
+    def _expect(self, char: str | None, allowed: str) -> None:
+        if char not in allowed:
+            raise ValueError(f"expected one of {allowed!r} at offset {self._pos}, found {char!r}")
+
+    def _wait(self) -> tuple[bool, Any]:
+        pending = len(self._buf) - self._pos
+        if pending > _MAX_FEATURE_CHARS:
+            raise ValueError(f"value at offset {self._pos} is longer than {_MAX_FEATURE_CHARS} characters")
+        self._scanned = pending
+        return False, None
+
+    def _decode(self, final: bool) -> tuple[bool, Any]:
+        closer = _CLOSERS.get(self._buf[self._pos])
+        # Decoding again only helps once a new closer has arrived, which keeps a
+        # feature spread over many chunks linear rather than quadratic.
+        if not final and closer is not None and self._buf.find(closer, self._pos + self._scanned) < 0:
+            return self._wait()
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError as e:
+            if final or len(self._buf) - self._pos > _MAX_FEATURE_CHARS:
+                raise ValueError(str(e)) from e
+            return self._wait()
+        if end == len(self._buf) and not final and closer is None:
+            # A number cut off by the chunk boundary still decodes; wait for more.
+            return self._wait()
+        self._pos = end
+        self._scanned = 0
+        return True, value
+
+    def _parse(self, final: bool) -> list[dict[str, Any]]:
+        features: list[dict[str, Any]] = []
+        while self._state != "done":
+            char = self._next_char()
+            if char is None:
+                break
+            if self._state == "start":
+                self._expect(char, "{")
+                self._pos += 1
+                self._state = "key_or_end"
+            elif self._state in ("key", "key_or_end"):
+                self._expect(char, '"}' if self._state == "key_or_end" else '"')
+                if char == "}":
+                    self._pos += 1
+                    self._state = "done"
+                    continue
+                ok, self._key = self._decode(final)
+                if not ok:
+                    break
+                self._state = "colon"
+            elif self._state == "colon":
+                self._expect(char, ":")
+                self._pos += 1
+                self._state = "value"
+            elif self._state == "value":
+                if self._key == "features":
+                    self._expect(char, "[")
+                    self._pos += 1
+                    self._saw_features = True
+                    self._state = "item_or_end"
+                    continue
+                ok, _ = self._decode(final)
+                if not ok:
+                    break
+                self._state = "member_sep"
+            elif self._state == "member_sep":
+                self._expect(char, ",}")
+                self._pos += 1
+                self._state = "key" if char == "," else "done"
+            elif self._state in ("item", "item_or_end"):
+                if char == "]" and self._state == "item_or_end":
+                    self._pos += 1
+                    self._state = "member_sep"
+                    continue
+                self._expect(char, "{")
+                ok, feature = self._decode(final)
+                if not ok:
+                    break
+                features.append(feature)
+                self._state = "item_sep"
+            elif self._state == "item_sep":
+                self._expect(char, ",]")
+                self._pos += 1
+                self._state = "item" if char == "," else "member_sep"
+        return features
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _kml_ring(element: ET.Element | None) -> list[list[float]] | None:
+    if element is None:
+        return None
+    for child in element.iter():
+        if _local(child.tag) == "coordinates" and child.text:
+            # "lng,lat[,alt]" tuples separated by whitespace.
+            return [[float(v) for v in point.split(",")[:2]] for point in child.text.split()]
+    return None
+
+
+def _kml_polygon(polygon: ET.Element) -> list[list[list[float]]]:
+    outer = next((c for c in polygon if _local(c.tag) == "outerBoundaryIs"), None)
+    rings = [_kml_ring(outer)]
+    rings.extend(_kml_ring(c) for c in polygon if _local(c.tag) == "innerBoundaryIs")
+    return [ring for ring in rings if ring]
+
+
+def _kml_feature(placemark: ET.Element) -> dict[str, Any]:
+    name = next((c.text for c in placemark if _local(c.tag) == "name"), None)
+    feature: dict[str, Any] = {"type": "Feature", "properties": {"name": (name or "").strip()}, "geometry": None}
+    try:
+        polygons = [_kml_polygon(e) for e in placemark.iter() if _local(e.tag) == "Polygon"]
+    except ValueError:
+        feature["error"] = "Invalid boundary: coordinates must be numbers"
+        return feature
+    polygons = [p for p in polygons if p]
+    if len(polygons) == 1:
+        feature["geometry"] = {"type": "Polygon", "coordinates": polygons[0]}
+    elif polygons:
+        feature["geometry"] = {"type": "MultiPolygon", "coordinates": polygons}
+    return feature
+
+
+class KMLPlacemarkParser:
+    """Incremental KML parser that yields each Placemark as a GeoJSON-shaped feature.
+
+    Placemark elements are cleared once converted, so memory stays flat on
+    large documents.
+    """
+
+    def __init__(self) -> None:
+        self._parser = ET.XMLPullParser(events=("end",))
+
+    def feed(self, data: bytes) -> list[dict[str, Any]]:
+        self._parser.feed(data)
+        return self._drain()
+
+    def close(self) -> list[dict[str, Any]]:
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> list[dict[str, Any]]:
+        features = []
+        for _, element in self._parser.read_events():
+            if _local(element.tag) == "Placemark":
+                features.append(_kml_feature(element))
+                element.clear()
+        return features
+
+
+def _feature_name(properties: dict[str, Any]) -> str | None:
+    for key in _NAME_KEYS:
+        value = properties.get(key)
+        if value is not None and str(value).strip():
+            return str(value).strip()
+    return None
+
+
+class _PaddockImport:
+    def __init__(self, session: AsyncSession, owner_id: uuid.UUID, farm_id: uuid.UUID) -> None:
+        self.session = session
+        self.owner_id = owner_id
+        self.farm_id = farm_id
+        self.now = datetime.now(timezone.utc)
+        self.existing: dict[str, uuid.UUID | None] = {}
+        self.seen: set[str] = set()
+        self.pending: list[tuple[int, str, dict[str, Any], list[list[Any]]]] = []
+        self.count = 0
+        self.created = 0
+        self.updated = 0
+        self.errors: list[PaddockImportError] = []
+
+    async def load_existing(self) -> None:
+        rows = await self.session.execute(
+            select(Paddock.id, Paddock.name).where(Paddock.farm_id == self.farm_id, Paddock.owner_id == self.owner_id)
+        )
+        for paddock_id, name in rows:
+            # Two paddocks sharing a name cannot be matched; None marks that.
+            self.existing[name] = None if name in self.existing else paddock_id
+
+    def reject(self, index: int, name: str | None, error: str) -> None:
+        self.errors.append(PaddockImportError(index=index, name=name, error=error))
+
+    async def accept(self, feature: Any) -> None:
+        index = self.count
+        self.count += 1
+        if not isinstance(feature, dict):
+            self.reject(index, None, "Feature must be an object")
+            return
+        properties = feature.get("properties") or {}
+        if not isinstance(properties, dict):
+            self.reject(index, None, "Feature properties must be an object")
+            return
+        name = _feature_name(properties)
+        if "error" in feature:
+            self.reject(index, name, feature["error"])
+            return
+        if name is None:
+            self.reject(index, None, "Feature has no name property")
+            return
+        if name in self.seen:
+            self.reject(index, name, "Duplicate paddock name in file")
+            return
+        geometry = feature.get("geometry")
+        if not isinstance(geometry, dict):
+            self.reject(index, name, "Feature has no polygon geometry")
+            return
+        if name in self.existing and self.existing[name] is None:
+            self.reject(index, name, "Name matches more than one existing paddock")
+            return
+        try:
+            polygons = parse_boundary(geometry)
+        except HTTPException as e:
+            self.reject(index, name, str(e.detail))
+            return
+        self.seen.add(name)
+        self.pending.append((index, name, geometry, polygons))
+        if len(self.pending) >= _BATCH_SIZE:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        areas, lats, lngs = boundary_metrics([polygons for *_, polygons in batch])
+
+        new_rows: list[dict[str, Any]] = []
+        changed_rows: list[dict[str, Any]] = []
+        for (index, name, geometry, _), area, lat, lng in zip(batch, areas, lats, lngs):
+            if not area > 0 or math.isnan(lat):
+                self.reject(index, name, "Invalid boundary: polygon has no area")
+                continue
+            values = {
+                "area_hectares": round(float(area), 4),
+                "gps_latitude": float(lat),
+                "gps_longitude": float(lng),
+                "gps_updated_at": self.now,
+                "boundary": geometry,
+            }
+            paddock_id = self.existing.get(name)
+            if paddock_id is None:
+                new_rows.append(
+                    {
+                        "id": uuid.uuid4(),
+                        "owner_id": self.owner_id,
+                        "farm_id": self.farm_id,
+                        "name": name,
+                        "created_at": self.now,
+                        **values,
+                    }
+                )
+            else:
+                changed_rows.append({"id": paddock_id, **values})
+
+        # executemany on both: multi-row INSERTs and a primary-key bulk UPDATE.
+        if new_rows:
+            await self.session.execute(insert(Paddock), new_rows)
+        if changed_rows:
+            await self.session.execute(update(Paddock), changed_rows)
+        self.created += len(new_rows)
+        self.updated += len(changed_rows)
+
+
+async def import_paddocks(
+    session: AsyncSession,
+    owner_id: uuid.UUID,
+    farm_id: uuid.UUID,
+    chunks: AsyncIterable[bytes],
+    file_format: ImportFormat,
+) -> PaddockImportResponse:
+    """Stream-parse a GeoJSON or KML file and upsert its polygons as paddocks of ``farm_id``.
+
+    Paddocks are matched by name within the farm: matches get their boundary,
+    area and centroid replaced, and other names are created. Bad features are
+    reported by position and skipped. A file that cannot be parsed at all is a
+    400. Nothing is committed here.
+    """
+    parser = GeoJSONFeatureParser() if file_format == "geojson" else KMLPlacemarkParser()
+    job = _PaddockImport(session, owner_id, farm_id)
+    await job.load_existing()
+    try:
+        async for chunk in chunks:
+            for feature in parser.feed(chunk):
+                await job.accept(feature)
+        for feature in parser.close():
+            await job.accept(feature)
+    except (ValueError, ET.ParseError) as e:
+        label = "GeoJSON" if file_format == "geojson" else "KML"
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid {label}: {e}") from e
+    await job.flush()
+    errors = sorted(job.errors, key=lambda error: error.index)
+    return PaddockImportResponse(created=job.created, updated=job.updated, failed=len(errors), errors=errors)
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import math
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..models import Paddock
+from .ttl_cache import TTLCache
+
+_settings = get_settings()
+
+# Metres per degree, good enough at paddock scale for tolerances and areas.
+M_PER_DEG_LAT = 110_540.0
+M_PER_DEG_LNG_EQUATOR = 111_320.0
+# A shape spanning more grid cells than this is checked for every query instead.
+_MAX_CELLS_PER_SHAPE = 1024
+
+
+def _invalid(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid boundary: {detail}")
+
+
+def parse_boundary(geometry: dict[str, Any]) -> list[list[np.ndarray]]:
+    """Validate a GeoJSON Polygon or MultiPolygon and return its polygons as lists of rings.
+
+    Each ring is an ``(n, 2)`` array of ``(lng, lat)``, closed (first point
+    repeated last). The first ring of each polygon is its outline and any
+    others are holes.
+    """
+    kind = geometry.get("type")
+    coordinates = geometry.get("coordinates")
+    if kind == "Polygon":
+        polygons = [coordinates]
+    elif kind == "MultiPolygon":
+        polygons = coordinates
+    else:
+        raise _invalid("expected a GeoJSON Polygon or MultiPolygon")
+    if not isinstance(polygons, list) or not polygons:
+        raise _invalid("no coordinates")
+
+    parsed: list[list[np.ndarray]] = []
+    for polygon in polygons:
+        if not isinstance(polygon, list) or not polygon:
+            raise _invalid("polygon has no rings")
+        rings = []
+        for ring in polygon:
+            try:
+                points = np.asarray(ring, dtype=np.float64)
+            except (TypeError, ValueError) as e:
+                raise _invalid("coordinates must be [lng, lat] pairs") from e
+            if points.ndim != 2 or points.shape[1] < 2 or not np.isfinite(points[:, :2]).all():
+                raise _invalid("coordinates must be [lng, lat] pairs")
+            points = points[:, :2]
+            if not ((np.abs(points[:, 0]) <= 180).all() and (np.abs(points[:, 1]) <= 90).all()):
+                raise _invalid("coordinates out of range")
+            if not np.array_equal(points[0], points[-1]):
+                points = np.vstack((points, points[:1]))
+            if len(points) < 4:
+                raise _invalid("a ring needs at least three distinct points")
+            rings.append(points)
+        parsed.append(rings)
+    return parsed
+
+
+def boundary_metrics(boundaries: Sequence[list[list[np.ndarray]]]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Area in hectares and centroid ``(lat, lng)`` for many parsed boundaries at once.
+
+    Every vertex of every ring is projected to local metres around its
+    boundary's mean vertex and run through one shoelace pass. Outlines add and
+    holes subtract whatever their winding. Boundaries with no area get NaN
+    centroids.
+    """
+    rings: list[np.ndarray] = []
+    ring_owner: list[int] = []
+    ring_sign: list[float] = []
+    for i, polygons in enumerate(boundaries):
+        for polygon in polygons:
+            for r, ring in enumerate(polygon):
+                rings.append(ring)
+                ring_owner.append(i)
+                ring_sign.append(1.0 if r == 0 else -1.0)
+    count = len(boundaries)
+    if not rings:
+        return np.zeros(count), np.full(count, np.nan), np.full(count, np.nan)
+
+    points = np.vstack(rings)
+    ring_id = np.repeat(np.arange(len(rings)), [len(ring) for ring in rings])
+    owner = np.asarray(ring_owner)[ring_id]
+    vertices = np.bincount(owner, minlength=count)
+    with np.errstate(invalid="ignore"):
+        ref_lng = np.bincount(owner, weights=points[:, 0], minlength=count) / vertices
+        ref_lat = np.bincount(owner, weights=points[:, 1], minlength=count) / vertices
+    kx = M_PER_DEG_LNG_EQUATOR * np.cos(np.radians(ref_lat))
+    x = (points[:, 0] - ref_lng[owner]) * kx[owner]
+    y = (points[:, 1] - ref_lat[owner]) * M_PER_DEG_LAT
+
+    # Rings are closed, so consecutive vertices of one ring cover every edge.
+    same_ring = ring_id[:-1] == ring_id[1:]
+    x0, y0, x1, y1 = x[:-1], y[:-1], x[1:], y[1:]
+    cross = np.where(same_ring, x0 * y1 - x1 * y0, 0.0)
+    edge_ring = ring_id[:-1]
+    ring_area2 = np.bincount(edge_ring, weights=cross, minlength=len(rings))
+    orient = np.asarray(ring_sign) * np.sign(ring_area2)
+    ring_owner_arr = np.asarray(ring_owner)
+
+    area2 = np.bincount(ring_owner_arr, weights=ring_area2 * orient, minlength=count)
+    cx6 = np.bincount(
+        ring_owner_arr, weights=np.bincount(edge_ring, weights=(x0 + x1) * cross, minlength=len(rings)) * orient, minlength=count
+    )
+    cy6 = np.bincount(
+        ring_owner_arr, weights=np.bincount(edge_ring, weights=(y0 + y1) * cross, minlength=len(rings)) * orient, minlength=count
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lat = np.where(area2 > 0, ref_lat + cy6 / (3 * area2) / M_PER_DEG_LAT, np.nan)
+        lng = np.where(area2 > 0, ref_lng + cx6 / (3 * area2) / kx, np.nan)
+    return np.maximum(area2, 0.0) / 2 / 10_000, lat, lng
+
+
+@dataclass(frozen=True)
+class PaddockShape:
+    id: uuid.UUID
+    farm_id: uuid.UUID
+    name: str
+    bbox: tuple[float, float, float, float]
+    # One row per ring edge, (lng1, lat1, lng2, lat2), for every ring of every part.
+    edges: np.ndarray
+
+    @classmethod
+    def from_geometry(cls, paddock_id: uuid.UUID, farm_id: uuid.UUID, name: str, geometry: dict[str, Any]) -> PaddockShape:
+        rings = [ring for polygon in parse_boundary(geometry) for ring in polygon]
+        edges = np.vstack([np.hstack((ring[:-1], ring[1:])) for ring in rings])
+        points = np.vstack(rings)
+        (min_lng, min_lat), (max_lng, max_lat) = points.min(axis=0), points.max(axis=0)
+        return cls(paddock_id, farm_id, name, (float(min_lng), float(min_lat), float(max_lng), float(max_lat)), edges)
+
+    def contains(self, lat: float, lng: float) -> bool:
+        """Even-odd rule over all edges at once, so holes and multi-part paddocks just work."""
+        x1, y1, x2, y2 = self.edges.T
+        straddles = (y1 > lat) != (y2 > lat)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossing_x = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+        return bool(np.count_nonzero(straddles & (lng < crossing_x)) % 2)
+
+    def contains_many(self, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        """``contains`` for many points: vectorised over the points, one pass per edge."""
+        inside = np.zeros(len(lats), dtype=bool)
+        candidates = np.flatnonzero(
+            (lngs >= self.bbox[0]) & (lngs <= self.bbox[2]) & (lats >= self.bbox[1]) & (lats <= self.bbox[3])
+        )
+        if not len(candidates):
+            return inside
+        x, y = lngs[candidates], lats[candidates]
+        hits = np.zeros(len(candidates), dtype=bool)
+        for x1, y1, x2, y2 in self.edges:
+            if y1 == y2:
+                continue
+            hits ^= ((y1 > y) != (y2 > y)) & (x < x1 + (y - y1) * (x2 - x1) / (y2 - y1))
+        inside[candidates] = hits
+        return inside
+
+    def distance_m(self, lat: float, lng: float) -> float:
+        """Distance from the point to the nearest boundary edge, in metres."""
+        kx = M_PER_DEG_LNG_EQUATOR * math.cos(math.radians(lat))
+        ax = (self.edges[:, 0] - lng) * kx
+        ay = (self.edges[:, 1] - lat) * M_PER_DEG_LAT
+        dx = (self.edges[:, 2] - lng) * kx - ax
+        dy = (self.edges[:, 3] - lat) * M_PER_DEG_LAT - ay
+        length_sq = dx * dx + dy * dy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.clip(np.where(length_sq > 0, -(ax * dx + ay * dy) / length_sq, 0.0), 0.0, 1.0)
+        return float(np.sqrt(np.min((ax + t * dx) ** 2 + (ay + t * dy) ** 2)))
+
+
+class PaddockIndex:
+    """Uniform-grid spatial index over one owner's paddock boundaries.
+
+    The cell size follows the median paddock extent, so a point lookup touches
+    one cell holding a handful of candidates, whatever the number of paddocks.
+    Candidates are then filtered by bounding box before the exact test.
+    """
+
+    def __init__(self, shapes: Sequence[PaddockShape]) -> None:
+        self._shapes = {shape.id: shape for shape in shapes}
+        self._cells: dict[tuple[int, int], list[PaddockShape]] = defaultdict(list)
+        self._oversize: list[PaddockShape] = []
+        extents = [max(s.bbox[2] - s.bbox[0], s.bbox[3] - s.bbox[1]) for s in shapes]
+        self._cell = max(float(np.median(extents)) if extents else 0.0, 1e-4)
+        for shape in shapes:
+            (cx0, cy0), (cx1, cy1) = self._cell_of(shape.bbox[0], shape.bbox[1]), self._cell_of(shape.bbox[2], shape.bbox[3])
+            if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > _MAX_CELLS_PER_SHAPE:
+                self._oversize.append(shape)
+                continue
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    self._cells[(cx, cy)].append(shape)
+
+    def __len__(self) -> int:
+        return len(self._shapes)
+
+    def _cell_of(self, lng: float, lat: float) -> tuple[int, int]:
+        return math.floor(lng / self._cell), math.floor(lat / self._cell)
+
+    def get(self, paddock_id: uuid.UUID) -> PaddockShape | None:
+        return self._shapes.get(paddock_id)
+
+    def locate(self, lat: float, lng: float) -> list[PaddockShape]:
+        """Paddocks whose boundary contains the point (overlapping boundaries give several)."""
+        candidates = [*self._cells.get(self._cell_of(lng, lat), ()), *self._oversize]
+        return [
+            shape
+            for shape in candidates
+            if shape.bbox[0] <= lng <= shape.bbox[2] and shape.bbox[1] <= lat <= shape.bbox[3] and shape.contains(lat, lng)
+        ]
+
+    def contains(self, paddock_id: uuid.UUID, lat: float, lng: float, tolerance_m: float = 0.0) -> bool | None:
+        """Whether the point is inside the paddock or within ``tolerance_m`` of its edge.
+
+        ``None`` when the paddock has no boundary, so callers can skip the check.
+        """
+        shape = self._shapes.get(paddock_id)
+        if shape is None:
+            return None
+        if shape.contains(lat, lng):
+            return True
+        return tolerance_m > 0 and shape.distance_m(lat, lng) <= tolerance_m
+
+
+class PaddockIndexCache:
+    """Per-owner ``PaddockIndex`` cache.
+
+    Paddock writes in this process call ``invalidate``. Writes from other
+    processes are caught by a version check, the owner's paddock count and
+    newest ``updated_at``, which runs at most once per ``recheck_seconds``
+    per owner. Inserts and updates move the newest timestamp and deletes
+    change the count, so another process's edit shows up within that window.
+    """
+
+    def __init__(self, maxsize: int, recheck_seconds: float) -> None:
+        # Freshness comes from invalidation and the version check; the TTL only drops idle owners.
+        self._cache: TTLCache[tuple[tuple[int, Any], PaddockIndex, float]] = TTLCache(maxsize, ttl_seconds=3600)
+        self._recheck = recheck_seconds
+        self.builds = 0
+        self.version_checks = 0
+
+    def invalidate(self, owner_id: uuid.UUID) -> None:
+        self._cache.pop(owner_id)
+
+    async def get(self, session: AsyncSession, owner_id: uuid.UUID) -> PaddockIndex:
+        entry = self._cache.get(owner_id)
+        now = time.monotonic()
+        if entry is not None and now - entry[2] < self._recheck:
+            return entry[1]
+        self.version_checks += 1
+        version_row = (
+            await session.execute(
+                select(func.count(), func.max(Paddock.updated_at)).where(Paddock.owner_id == owner_id)
+            )
+        ).one()
+        version = (version_row[0], version_row[1])
+        if entry is not None and entry[0] == version:
+            self._cache.set(owner_id, (version, entry[1], now))
+            return entry[1]
+
+        rows = await session.execute(
+            select(Paddock.id, Paddock.farm_id, Paddock.name, Paddock.boundary).where(
+                Paddock.owner_id == owner_id, Paddock.boundary.isnot(None)
+            )
+        )
+        shapes = []
+        for row in rows:
+            try:
+                shapes.append(PaddockShape.from_geometry(row.id, row.farm_id, row.name, row.boundary))
+            except HTTPException:
+                # Written before validation or edited by hand; treat as having no boundary.
+                continue
+        index = PaddockIndex(shapes)
+        self.builds += 1
+        self._cache.set(owner_id, (version, index, now))
+        return index
+
+    def stats(self) -> dict[str, int]:
+        return {**self._cache.stats(), "builds": self.builds, "version_checks": self.version_checks}
+
+
+paddock_indexes = PaddockIndexCache(_settings.paddock_index_cache_size, _settings.paddock_index_recheck_seconds)
+
+
+def boundary_violation(index: PaddockIndex, link_rows: Sequence[dict[str, Any]]) -> str | None:
+    """Why the links' GPS fixes fail the boundary check, or ``None`` when they pass.
+
+    A fix passes within ``paddock_boundary_tolerance_m`` plus its own reported
+    accuracy of the edge. The accuracy comes from the client, so a fix
+    reporting worse than ``paddock_max_accuracy_m`` fails instead of widening
+    the tolerance. Links without a fix, and paddocks without a boundary, are
+    not checked.
+    """
+    max_accuracy = _settings.paddock_max_accuracy_m
+    outside: list[str] = []
+    imprecise: list[str] = []
+    for row in link_rows:
+        if row["gps_latitude"] is None or row["gps_longitude"] is None:
+            continue
+        accuracy = row["gps_accuracy_m"] or 0.0
+        inside = index.contains(
+            row["paddock_id"],
+            float(row["gps_latitude"]),
+            float(row["gps_longitude"]),
+            _settings.paddock_boundary_tolerance_m + min(accuracy, max_accuracy),
+        )
+        if inside is None:
+            continue
+        if accuracy > max_accuracy:
+            imprecise.append(str(row["paddock_id"]))
+        elif not inside:
+            outside.append(str(row["paddock_id"]))
+    problems = []
+    if imprecise:
+        problems.append(f"GPS accuracy is worse than {max_accuracy:g} m: {', '.join(imprecise)}")
+    if outside:
+        problems.append(f"GPS fix is outside the paddock boundary: {', '.join(outside)}")
+    return "; ".join(problems) or None
+
+
+async def ensure_fixes_within_boundaries(
+    session: AsyncSession, owner_id: uuid.UUID, link_rows: Sequence[dict[str, Any]]
+) -> None:
+    """Reject paddock links whose GPS fix fails ``boundary_violation``."""
+    if not any(row["gps_latitude"] is not None and row["gps_longitude"] is not None for row in link_rows):
+        return
+    index = await paddock_indexes.get(session, owner_id)
+    if not len(index):
+        return
+    problem = boundary_violation(index, link_rows)
+    if problem:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=problem)
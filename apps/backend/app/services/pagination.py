@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+
+def _encode(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> str:
+    return base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+
+
+def encode_cursor(started_at: datetime, row_id: uuid.UUID) -> str:
+    return _encode(f"{started_at.isoformat()}|{row_id}")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Inverse of ``encode_cursor``; a malformed cursor is a 400, not a 500."""
+    try:
+        started_at, row_id = _decode(cursor).split("|", 1)
+        return datetime.fromisoformat(started_at), uuid.UUID(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from e
+
+
+def encode_timestamp_cursor(at: datetime) -> str:
+    return _encode(at.isoformat())
+
+
+def decode_timestamp_cursor(cursor: str) -> datetime:
+    try:
+        at = datetime.fromisoformat(_decode(cursor))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from e
+    if at.tzinfo is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return at
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class PdfCache:
+    """Two-tier content-addressed cache for rendered PDFs.
+
+    The memory tier is an LRU bounded by total bytes. The optional disk tier
+    stores one file per key under ``disk_dir`` and evicts least recently used
+    files once ``disk_max_bytes`` is exceeded. Keys are expected to be hex
+    digests, so they are safe to use as file names.
+
+    The disk tier keeps an in-memory LRU index of file sizes and a running
+    byte total, built from one directory scan on first use. A write therefore
+    costs O(1) unless it pushes the total over the limit. Processes sharing
+    ``disk_dir`` each track the files present at their scan plus their own
+    writes.
+    """
+
+    def __init__(
+        self,
+        memory_max_bytes: int,
+        disk_dir: str | Path | None = None,
+        disk_max_bytes: int = 0,
+    ) -> None:
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._memory_max = max(0, memory_max_bytes)
+        self._disk_dir = Path(disk_dir) if disk_dir else None
+        self._disk_max = max(0, disk_max_bytes)
+        self._disk_lock = threading.Lock()
+        self._disk_index: OrderedDict[str, int] | None = None
+        self._disk_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # -- memory tier -------------------------------------------------------
+
+    def _memory_get(self, key: str) -> bytes | None:
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+        return data
+
+    def _memory_put(self, key: str, data: bytes) -> None:
+        if len(data) > self._memory_max:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self._memory_max:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    # -- disk tier ---------------------------------------------------------
+
+    def _disk_path(self, key: str) -> Path:
+        assert self._disk_dir is not None
+        return self._disk_dir / key[:2] / f"{key}.pdf"
+
+    def _load_disk_index(self) -> OrderedDict[str, int]:
+        """Scan ``disk_dir`` once, oldest first; call with ``_disk_lock`` held."""
+        if self._disk_index is None:
+            assert self._disk_dir is not None
+            entries = []
+            for path in self._disk_dir.glob("*/*.pdf"):
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, path.stem, st.st_size))
+            entries.sort()
+            self._disk_index = OrderedDict((key, size) for _, key, size in entries)
+            self._disk_bytes = sum(self._disk_index.values())
+        return self._disk_index
+
+    def _disk_get(self, key: str) -> bytes | None:
+        path = self._disk_path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            with self._disk_lock:
+                size = self._load_disk_index().pop(key, None)
+                if size is not None:
+                    self._disk_bytes -= size
+            return None
+        with self._disk_lock:
+            index = self._load_disk_index()
+            if key not in index:
+                index[key] = len(data)
+                self._disk_bytes += len(data)
+            index.move_to_end(key)
+        # Touch so the order survives the index being rebuilt after a restart.
+        os.utime(path)
+        return data
+
+    def _disk_put(self, key: str, data: bytes) -> None:
+        if len(data) > self._disk_max:
+            return
+        path = self._disk_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        with self._disk_lock:
+            index = self._load_disk_index()
+            self._disk_bytes += len(data) - index.pop(key, 0)
+            index[key] = len(data)
+            # Runs on the caller's worker thread (``put`` uses ``to_thread``), never on the event loop.
+            while self._disk_bytes > self._disk_max and len(index) > 1:
+                evicted, size = index.popitem(last=False)
+                self._disk_path(evicted).unlink(missing_ok=True)
+                self._disk_bytes -= size
+
+    # -- public API --------------------------------------------------------
+
+    async def get(self, key: str) -> bytes | None:
+        data = self._memory_get(key)
+        if data is not None:
+            self.hits += 1
+            return data
+        if self._disk_dir is not None and self._disk_max:
+            data = await asyncio.to_thread(self._disk_get, key)
+            if data is not None:
+                self.disk_hits += 1
+                self._memory_put(key, data)
+                return data
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, data: bytes) -> None:
+        self._memory_put(key, data)
+        if self._disk_dir is not None and self._disk_max:
+            try:
+                await asyncio.to_thread(self._disk_put, key, data)
+            except OSError as e:
+                logger.warning(f"PDF disk cache write failed: {e}")
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": len(self._disk_index or ()),
+            "disk_bytes": self._disk_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
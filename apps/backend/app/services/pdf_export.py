@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+import zipfile
+from collections.abc import AsyncIterator, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from ..db import AsyncSessionFactory
+from ..models import Application, ApplicationPaddock
+from ..pdf import build_application_context, render_context_pdf
+from .coverage_map import coverage_map_keys
+
+# Applications hydrated per query; bounds ORM memory regardless of export size.
+EXPORT_CHUNK_SIZE = 50
+_MAX_BUSY_RETRIES = 10
+
+
+class _ZipSink:
+    """Write-only buffer handed to ``zipfile``; drained after every entry.
+
+    It deliberately has no ``tell``/``seek`` so ``zipfile`` switches to
+    streaming mode (data descriptors after each entry).
+    """
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _render_with_backoff(context: dict) -> bytes:
+    # Export competes with interactive renders for the pool; wait out 429s
+    # rather than failing the whole archive.
+    for _ in range(_MAX_BUSY_RETRIES):
+        try:
+            return await render_context_pdf(context)
+        except HTTPException as exc:
+            if exc.status_code != status.HTTP_429_TOO_MANY_REQUESTS:
+                raise
+            await asyncio.sleep(float((exc.headers or {}).get("Retry-After", 1)))
+    return await render_context_pdf(context)
+
+
+async def _iter_contexts(owner_id: uuid.UUID, application_ids: Sequence[uuid.UUID]) -> AsyncIterator[tuple[uuid.UUID, dict]]:
+    # A short session per chunk: no pooled connection is held while a slow client drains the stream.
+    for start in range(0, len(application_ids), EXPORT_CHUNK_SIZE):
+        chunk = application_ids[start : start + EXPORT_CHUNK_SIZE]
+        query = (
+            select(Application)
+            .where(Application.id.in_(chunk), Application.owner_id == owner_id)
+            .options(
+                selectinload(Application.paddocks).selectinload(ApplicationPaddock.paddock),
+                selectinload(Application.owner),
+            )
+        )
+        async with AsyncSessionFactory() as session:
+            applications = (await session.execute(query)).scalars().all()
+            map_keys = await coverage_map_keys(session, applications)
+            contexts = [(app.id, build_application_context(app, map_keys.get(app.id))) for app in applications]
+        # Closing detached the loaded objects; templates only read their already-loaded attributes.
+        for item in contexts:
+            yield item
+
+
+async def stream_applications_zip(
+    owner_id: uuid.UUID,
+    application_ids: Sequence[uuid.UUID],
+    concurrency: int,
+) -> AsyncIterator[bytes]:
+    """Yield a ZIP archive of application PDFs, writing each entry as its render finishes."""
+    sink = _ZipSink()
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED)
+    pending: dict[asyncio.Task[bytes], uuid.UUID] = {}
+    failures: list[str] = []
+
+    def write_done(done: set[asyncio.Task[bytes]]) -> None:
+        for task in done:
+            application_id = pending.pop(task)
+            try:
+                archive.writestr(f"application-{application_id}.pdf", task.result())
+            except Exception as e:
+                failures.append(f"{application_id}: {e!s}")
+
+    try:
+        async for application_id, context in _iter_contexts(owner_id, application_ids):
+            pending[asyncio.create_task(_render_with_backoff(context))] = application_id
+            if len(pending) >= concurrency:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                write_done(done)
+                yield sink.drain()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            write_done(done)
+            yield sink.drain()
+        if failures:
+            archive.writestr("errors.txt", "\n".join(failures) + "\n")
+        archive.close()
+        yield sink.drain()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import signal
+import threading
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, TypeVar
+
+from fastapi import HTTPException, status
+
+logger = logging.getLogger("uvicorn.error")
+
+T = TypeVar("T")
+
+# How long past its deadline a job may keep its worker before the pool is recycled.
+_KILL_GRACE_SECONDS = 5.0
+
+
+def _deadline_exceeded(_signum: int, _frame: Any) -> None:
+    raise TimeoutError("render deadline exceeded")
+
+
+def _call_with_deadline(fn: Callable[..., T], seconds: float, *args: Any) -> T:
+    """Run ``fn`` in a worker, aborting it with ``TimeoutError`` once ``seconds`` pass.
+
+    Renders are pure Python between Pango calls, so the alarm interrupts them
+    and the worker is free for the next job.
+    """
+    previous = signal.signal(signal.SIGALRM, _deadline_exceeded)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class RenderPool:
+    """Bounded process pool that keeps CPU-heavy renders off the event loop.
+
+    Jobs beyond ``workers + max_queue`` are rejected with 429 so callers back off
+    instead of piling onto the pool. Workers are replaced after
+    ``max_tasks_per_worker`` jobs to cap memory growth in long-lived renderers.
+    With ``workers=0`` jobs run on the default thread pool instead (handy for
+    development where spawning processes is not worth it).
+
+    A job past its timeout is aborted inside its worker. If it is stuck where
+    the abort cannot reach it, the executor is replaced and its processes are
+    killed, so a few pathological documents cannot hold every slot. Threads
+    cannot be stopped, so with ``workers=0`` a timed-out job runs to the end.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_queue: int,
+        timeout_seconds: float,
+        max_tasks_per_worker: int | None = None,
+        retry_after_seconds: int = 5,
+        preload: Sequence[str] = (),
+    ) -> None:
+        self._workers = max(0, workers)
+        self._capacity = self._workers + max(0, max_queue) if self._workers else max(1, max_queue)
+        self._timeout = timeout_seconds
+        self._max_tasks_per_worker = max_tasks_per_worker or None
+        self._retry_after = retry_after_seconds
+        self._preload = list(preload)
+        self._executor: ProcessPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._recycled = 0
+
+    def _mp_context(self) -> multiprocessing.context.BaseContext:
+        # ``max_tasks_per_child`` is incompatible with "fork"; forkserver also lets
+        # every recycled worker start from a process that already imported WeasyPrint.
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context("forkserver")
+            if self._preload:
+                ctx.set_forkserver_preload(self._preload)
+            return ctx
+        return multiprocessing.get_context("spawn")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    mp_context=self._mp_context(),
+                    max_tasks_per_child=self._max_tasks_per_worker,
+                )
+            return self._executor
+
+    def _reset_executor(self, broken: ProcessPoolExecutor) -> None:
+        with self._executor_lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _kill_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Replace ``executor`` and terminate its workers; their jobs fail with ``BrokenProcessPool``."""
+        # The executor has no public way to stop a running job, so reach for its worker processes.
+        # ``_processes`` is private to ProcessPoolExecutor (pid -> Process) and may change or go
+        # away between Python versions; without it the executor is still replaced, just not killed.
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        self._reset_executor(executor)
+        for process in processes:
+            process.terminate()
+        with self._pending_lock:
+            self._recycled += 1
+        logger.warning("Render job stuck past its deadline; killed %d render workers", len(processes))
+
+    def _acquire_slot(self) -> None:
+        with self._pending_lock:
+            if self._pending >= self._capacity:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Renderer busy, retry shortly",
+                    headers={"Retry-After": str(self._retry_after)},
+                )
+            self._pending += 1
+
+    def _release_slot(self, _future: Future[Any] | None = None) -> None:
+        with self._pending_lock:
+            self._pending -= 1
+
+    def _count(self, outcome: str) -> None:
+        with self._pending_lock:
+            setattr(self, f"_{outcome}", getattr(self, f"_{outcome}") + 1)
+
+    def _submit(self, fn: Callable[..., T], *args: Any) -> tuple[ProcessPoolExecutor, Future[T]]:
+        if not self._workers:
+            raise RuntimeError("process pool disabled")
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._reset_executor(executor)
+            executor = self._get_executor()
+            return executor, executor.submit(fn, *args)
+
+    async def run(self, fn: Callable[..., T], *args: Any, timeout: float | None = None) -> T:
+        """Run ``fn(*args)`` in the pool; ``fn`` and its arguments must be picklable."""
+        seconds = timeout or self._timeout
+        self._acquire_slot()
+        executor: ProcessPoolExecutor | None = None
+        try:
+            if self._workers:
+                executor, future = self._submit(_call_with_deadline, fn, seconds, *args)
+            else:
+                future = asyncio.get_running_loop().run_in_executor(None, fn, *args)
+        except BaseException:
+            self._release_slot()
+            self._count("failed")
+            raise
+        # The slot is only freed once the job really stops, so a timed-out render
+        # still counts against capacity until its worker is done with it.
+        future.add_done_callback(self._release_slot)
+
+        wait = seconds + _KILL_GRACE_SECONDS if executor is not None else seconds
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout=wait)
+        except TimeoutError as exc:
+            # Either the worker aborted the job at its deadline, or it is stuck and must be killed.
+            if executor is not None and not future.done():
+                self._kill_executor(executor)
+            self._count("timed_out")
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Render timed out") from exc
+        except BrokenProcessPool as exc:
+            self._count("failed")
+            if executor is not None:
+                self._reset_executor(executor)
+            logger.warning("Render pool worker died; pool will be recreated")
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Renderer restarting") from exc
+        except asyncio.CancelledError:
+            self._count("cancelled")
+            raise
+        except Exception:
+            self._count("failed")
+            raise
+        self._count("completed")
+        return result
+
+    def stats(self) -> dict[str, int | float]:
+        with self._pending_lock:
+            return {
+                "workers": self._workers,
+                "capacity": self._capacity,
+                "pending": self._pending,
+                "completed": self._completed,
+                "failed": self._failed,
+                "cancelled": self._cancelled,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "recycled": self._recycled,
+            }
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
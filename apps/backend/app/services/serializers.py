@@ -1,18 +1,20 @@
 from __future__ import annotations
 
-from typing import Iterable
+from typing import Any, Iterable
 
 from ..models import Application, ApplicationPaddock, Mix, Paddock
 from ..schemas import (
     ApplicationPaddockResponse,
     ApplicationResponse,
     ApplicationSummary,
+    JobResponse,
     MixItemResponse,
     MixResponse,
     PaddockResponse,
     WeatherSummary,
 )
 from ..utils import to_float
+from .jobs import Job
 
 
 def serialize_paddock(paddock: Paddock) -> PaddockResponse:
@@ -25,6 +27,7 @@ def serialize_paddock(paddock: Paddock) -> PaddockResponse:
         gps_longitude=to_float(paddock.gps_longitude),
         gps_accuracy_m=to_float(paddock.gps_accuracy_m),
         gps_updated_at=paddock.gps_updated_at,
+        boundary=paddock.boundary,
         created_at=paddock.created_at,
     )
 
@@ -59,29 +62,45 @@ def serialize_application(application: Application) -> ApplicationResponse:
     )
 
 
+def _weather_summary(source: Any) -> WeatherSummary | None:
+    wind_speed = to_float(source.wind_speed_ms)
+    wind_direction = to_float(source.wind_direction_deg)
+    temperature = to_float(source.temp_c)
+    humidity = to_float(source.humidity_pct)
+    if all(value is None for value in (wind_speed, wind_direction, temperature, humidity)):
+        return None
+    return WeatherSummary(
+        wind_speed_ms=wind_speed,
+        wind_direction_deg=wind_direction,
+        temp_c=temperature,
+        humidity_pct=humidity,
+    )
+
+
 def serialize_application_summary(application: Application) -> ApplicationSummary:
-    paddock_ids = [link.paddock_id for link in application.paddocks]
-    wind_speed = to_float(application.wind_speed_ms)
-    wind_direction = to_float(application.wind_direction_deg)
-    temperature = to_float(application.temp_c)
-    humidity = to_float(application.humidity_pct)
-    weather: WeatherSummary | None = None
-    if any(value is not None for value in (wind_speed, wind_direction, temperature, humidity)):
-        weather = WeatherSummary(
-            wind_speed_ms=wind_speed,
-            wind_direction_deg=wind_direction,
-            temp_c=temperature,
-            humidity_pct=humidity,
-        )
     return ApplicationSummary(
         id=application.id,
         owner_id=application.owner_id,
         mix_id=application.mix_id,
-        paddock_ids=paddock_ids,
+        paddock_ids=[link.paddock_id for link in application.paddocks],
         started_at=application.started_at,
         finished_at=application.finished_at,
         finalized=application.finalized,
-        weather=weather,
+        weather=_weather_summary(application),
+    )
+
+
+def serialize_application_summary_row(row: Any) -> ApplicationSummary:
+    """Serialize a summary projection row (columns plus aggregated ``paddock_ids``)."""
+    return ApplicationSummary(
+        id=row.id,
+        owner_id=row.owner_id,
+        mix_id=row.mix_id,
+        paddock_ids=list(row.paddock_ids or []),
+        started_at=row.started_at,
+        finished_at=row.finished_at,
+        finalized=row.finalized,
+        weather=_weather_summary(row),
     )
 
 
@@ -106,3 +125,18 @@ def serialize_mix(mix: Mix) -> MixResponse:
         created_at=mix.created_at,
         items=items,
     )
+
+
+def serialize_job(job: Job) -> JobResponse:
+    return JobResponse(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        stage=job.stage,
+        completed_stages=list(job.completed_stages),
+        attempts=job.attempts,
+        error=job.error,
+        result=job.result,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import Select, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from ..auth import AuthContext
+from ..config import get_settings
+from ..models import Application, BlynkStation, Farm, Mix, Paddock, SyncReceipt, SyncTombstone
+from ..schemas import (
+    FarmResponse,
+    SyncApplicationItem,
+    SyncChangesResponse,
+    SyncItemResult,
+    SyncPaddockLinkItem,
+    SyncPushRequest,
+    SyncTombstoneResponse,
+    SyncWeatherItem,
+)
+from .applications import application_rows, application_summary_select, insert_application_rows, paddock_link_row
+from .paddock_index import PaddockIndex, boundary_violation, paddock_indexes
+from .pagination import decode_timestamp_cursor, encode_timestamp_cursor
+from .serializers import serialize_application_summary_row, serialize_mix, serialize_paddock
+from .weather import WeatherPayload, store_readings
+
+_settings = get_settings()
+
+SyncItem = SyncApplicationItem | SyncPaddockLinkItem | SyncWeatherItem
+
+_KINDS: dict[type, str] = {
+    SyncApplicationItem: "application",
+    SyncPaddockLinkItem: "paddock_link",
+    SyncWeatherItem: "weather",
+}
+
+
+def _rejected(key: str, kind: str, error: str) -> SyncItemResult:
+    return SyncItemResult(idempotency_key=key, kind=kind, status="rejected", error=error)
+
+
+async def apply_sync_batch(session: AsyncSession, batch: SyncPushRequest, auth: AuthContext) -> list[SyncItemResult]:
+    """Apply an offline batch in the caller's transaction and return one result per item.
+
+    Keys seen before (in ``sync_receipts`` or earlier in the same batch) are
+    answered as duplicates without writing anything, so a replayed batch costs
+    two small queries. Invalid items, including GPS fixes that fail the
+    paddock boundary check, are rejected individually and get no receipt, so
+    the client can fix and resend them. Weather that names its station and
+    fetch time is also stored as that station's reading, as a live fetch is.
+    Everything else is written with one multi-row statement per table.
+    """
+    owner_id = auth.owner_id
+    now = datetime.now(timezone.utc)
+    items: list[SyncItem] = [*batch.applications, *batch.paddock_links, *batch.weather]
+    if not items:
+        return []
+
+    # Serialise pushes per owner so two replays of one batch cannot both miss
+    # the receipts check; held only until this transaction ends.
+    await session.execute(select(func.pg_advisory_xact_lock(func.hashtextextended(f"sync:{owner_id}", 0))))
+
+    wanted_keys = {item.idempotency_key for item in items}
+    wanted_keys.update(
+        item.application_key for item in items if not isinstance(item, SyncApplicationItem) and item.application_key
+    )
+    receipt_rows = await session.execute(
+        select(SyncReceipt.idempotency_key, SyncReceipt.kind, SyncReceipt.entity_id).where(
+            SyncReceipt.owner_id == owner_id, SyncReceipt.idempotency_key.in_(wanted_keys)
+        )
+    )
+    receipts: dict[str, tuple[str, uuid.UUID]] = {row.idempotency_key: (row.kind, row.entity_id) for row in receipt_rows}
+
+    results: dict[int, SyncItemResult] = {}
+    pending: list[tuple[int, SyncItem]] = []
+    first_index: dict[str, int] = {}
+    repeats: list[tuple[int, int]] = []
+    for index, item in enumerate(items):
+        key, kind = item.idempotency_key, _KINDS[type(item)]
+        if key in receipts:
+            results[index] = SyncItemResult(
+                idempotency_key=key, kind=receipts[key][0], status="duplicate", entity_id=receipts[key][1]
+            )
+        elif key in first_index:
+            repeats.append((index, first_index[key]))
+        else:
+            first_index[key] = index
+            pending.append((index, item))
+    if not pending:
+        return _ordered(results, repeats, len(items))
+
+    # Validate new applications and collect everything that needs a lookup.
+    app_rows: dict[int, tuple[dict[str, Any], list[dict[str, Any]]]] = {}
+    app_id_by_key = {key: entity_id for key, (kind, entity_id) in receipts.items() if kind == "application"}
+    paddock_ids: set[uuid.UUID] = set()
+    station_keys: set[str] = set()
+    # Applications from earlier pushes may have been deleted since; check them too.
+    application_ids: set[uuid.UUID] = set(app_id_by_key.values())
+    for index, item in pending:
+        if isinstance(item, SyncApplicationItem):
+            try:
+                row, links = application_rows(item.application, auth, now)
+            except HTTPException as e:
+                results[index] = _rejected(item.idempotency_key, "application", str(e.detail))
+                continue
+            app_rows[index] = (row, links)
+            app_id_by_key[item.idempotency_key] = row["id"]
+            paddock_ids.update(link["paddock_id"] for link in links)
+        else:
+            if isinstance(item, SyncPaddockLinkItem):
+                paddock_ids.add(item.paddock.paddock_id)
+            elif item.station_id is not None:
+                station_keys.add(item.station_id)
+            if item.application_id is not None:
+                application_ids.add(item.application_id)
+
+    owned_paddocks: set[uuid.UUID] = set()
+    if paddock_ids:
+        found = await session.execute(select(Paddock.id).where(Paddock.id.in_(paddock_ids), Paddock.owner_id == owner_id))
+        owned_paddocks = set(found.scalars().all())
+    owned_stations: dict[str, uuid.UUID] = {}
+    if station_keys:
+        found = await session.execute(
+            select(BlynkStation.station_id, BlynkStation.id).where(
+                BlynkStation.station_id.in_(station_keys), BlynkStation.owner_id == owner_id
+            )
+        )
+        owned_stations = {station_key: station_id for station_key, station_id in found}
+    owned_applications = {row["id"] for row, _ in app_rows.values()}
+    if application_ids:
+        found = await session.execute(
+            select(Application.id).where(Application.id.in_(application_ids), Application.owner_id == owner_id)
+        )
+        owned_applications.update(found.scalars().all())
+
+    boundaries: PaddockIndex | None = None
+    if any(link["gps_latitude"] is not None for _, links in app_rows.values() for link in links) or any(
+        isinstance(item, SyncPaddockLinkItem) and item.paddock.gps_lat is not None for _, item in pending
+    ):
+        boundaries = await paddock_indexes.get(session, owner_id)
+
+    new_app_rows: list[dict[str, Any]] = []
+    link_rows: list[dict[str, Any]] = []
+    weather_rows: list[dict[str, Any]] = []
+    readings: list[tuple[uuid.UUID, datetime, WeatherPayload]] = []
+    accepted: dict[int, tuple[str, uuid.UUID]] = {}
+    for index, item in pending:
+        if index in results:
+            continue
+        key = item.idempotency_key
+        if isinstance(item, SyncApplicationItem):
+            row, links = app_rows[index]
+            missing = [link["paddock_id"] for link in links if link["paddock_id"] not in owned_paddocks]
+            if missing:
+                app_id_by_key.pop(key, None)
+                owned_applications.discard(row["id"])
+                results[index] = _rejected(key, "application", f"Paddock not found: {', '.join(map(str, missing))}")
+                continue
+            problem = boundary_violation(boundaries, links) if boundaries is not None else None
+            if problem:
+                app_id_by_key.pop(key, None)
+                owned_applications.discard(row["id"])
+                results[index] = _rejected(key, "application", problem)
+                continue
+            new_app_rows.append(row)
+            link_rows.extend(links)
+            accepted[index] = ("application", row["id"])
+            continue
+
+        kind = _KINDS[type(item)]
+        if item.application_id is not None:
+            target = item.application_id
+        elif item.application_key is not None:
+            target = app_id_by_key.get(item.application_key)
+        else:
+            results[index] = _rejected(key, kind, "applicationId or applicationKey is required")
+            continue
+        if target is None or target not in owned_applications:
+            results[index] = _rejected(key, kind, "Application not found")
+            continue
+
+        if isinstance(item, SyncPaddockLinkItem):
+            if item.paddock.paddock_id not in owned_paddocks:
+                results[index] = _rejected(key, kind, f"Paddock not found: {item.paddock.paddock_id}")
+                continue
+            link = paddock_link_row(owner_id, target, item.paddock, now)
+            problem = boundary_violation(boundaries, [link]) if boundaries is not None else None
+            if problem:
+                results[index] = _rejected(key, kind, problem)
+                continue
+            link_rows.append(link)
+            accepted[index] = (kind, link["id"])
+        else:
+            if (item.station_id is None) != (item.fetched_at is None):
+                results[index] = _rejected(key, kind, "stationId and fetchedAt must be sent together")
+                continue
+            if item.fetched_at is not None and item.fetched_at.tzinfo is None:
+                results[index] = _rejected(key, kind, "fetchedAt needs a UTC offset")
+                continue
+            if item.station_id is not None and item.station_id not in owned_stations:
+                results[index] = _rejected(key, kind, f"Weather station not found: {item.station_id}")
+                continue
+            payload: WeatherPayload = {
+                "wind_speed_ms": item.wind_speed_ms,
+                "wind_direction_deg": item.wind_direction_deg,
+                "temp_c": item.temp_c,
+                "humidity_pct": item.humidity_pct,
+            }
+            weather_rows.append({"id": target, **payload})
+            if item.station_id is not None and item.fetched_at is not None:
+                readings.append((owned_stations[item.station_id], item.fetched_at, payload))
+            accepted[index] = (kind, target)
+
+    await insert_application_rows(session, new_app_rows, link_rows)
+    if weather_rows:
+        # ORM bulk UPDATE by primary key; ownership was checked above.
+        await session.execute(update(Application), weather_rows)
+    # A sample the poller already stored for the same instant is kept as is.
+    await store_readings(session, readings)
+    new_app_ids = {row["id"] for row in new_app_rows}
+    await touch_applications(
+        session,
+        {row["application_id"] for row in link_rows if row["application_id"] not in new_app_ids}
+        | {row["id"] for row in weather_rows},
+    )
+    if accepted:
+        await session.execute(
+            insert(SyncReceipt),
+            [
+                {
+                    "owner_id": owner_id,
+                    "idempotency_key": items[index].idempotency_key,
+                    "kind": kind,
+                    "entity_id": entity_id,
+                }
+                for index, (kind, entity_id) in accepted.items()
+            ],
+        )
+    for index, (kind, entity_id) in accepted.items():
+        results[index] = SyncItemResult(
+            idempotency_key=items[index].idempotency_key, kind=kind, status="created", entity_id=entity_id
+        )
+    return _ordered(results, repeats, len(items))
+
+
+def _ordered(results: dict[int, SyncItemResult], repeats: list[tuple[int, int]], count: int) -> list[SyncItemResult]:
+    for index, first in repeats:
+        original = results[first]
+        if original.status == "rejected":
+            results[index] = original
+        else:
+            results[index] = original.model_copy(update={"status": "duplicate"})
+    return [results[index] for index in range(count)]
+
+
+async def touch_applications(session: AsyncSession, application_ids: Iterable[uuid.UUID] | Select) -> None:
+    """Bump ``updated_at`` on applications whose paddock links or weather changed.
+
+    Accepts ids or a SELECT of ids, so callers can avoid fetching them first.
+    """
+    ids = application_ids if isinstance(application_ids, Select) else set(application_ids)
+    if isinstance(ids, Select) or ids:
+        await session.execute(update(Application).where(Application.id.in_(ids)).values(updated_at=func.now()))
+
+
+async def record_tombstone(session: AsyncSession, owner_id: uuid.UUID, entity: str, entity_id: uuid.UUID) -> None:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=_settings.sync_tombstone_retention_days)
+    await session.execute(
+        delete(SyncTombstone).where(SyncTombstone.owner_id == owner_id, SyncTombstone.deleted_at < cutoff)
+    )
+    session.add(SyncTombstone(owner_id=owner_id, entity=entity, entity_id=entity_id))
+
+
+async def collect_changes(session: AsyncSession, owner_id: uuid.UUID, cursor: str | None) -> SyncChangesResponse:
+    """Everything the owner created, updated or deleted after ``cursor``.
+
+    The returned cursor trails the database clock by
+    ``sync_cursor_settle_seconds`` so rows from transactions still in flight
+    are picked up next time. The cost is that recent rows may be sent twice;
+    clients upsert by id, so that is harmless. A missing cursor, or one older
+    than the tombstone retention, returns a full snapshot with ``reset`` set.
+    """
+    db_now = (await session.execute(select(func.now()))).scalar_one()
+    since = decode_timestamp_cursor(cursor) if cursor else None
+    retention = timedelta(days=_settings.sync_tombstone_retention_days)
+    reset = since is None or since < db_now - retention
+    next_cursor = encode_timestamp_cursor(db_now - timedelta(seconds=_settings.sync_cursor_settle_seconds))
+
+    def changed(query: Any, model: Any) -> Any:
+        query = query.where(model.owner_id == owner_id)
+        return query if reset else query.where(model.updated_at > since)
+
+    farms = (await session.execute(changed(select(Farm), Farm).order_by(Farm.updated_at))).scalars().all()
+    paddocks = (await session.execute(changed(select(Paddock), Paddock).order_by(Paddock.updated_at))).scalars().all()
+    mixes = (
+        (await session.execute(changed(select(Mix).options(selectinload(Mix.items)), Mix).order_by(Mix.updated_at)))
+        .scalars()
+        .all()
+    )
+    applications = (
+        await session.execute(changed(application_summary_select(), Application).order_by(Application.updated_at))
+    ).all()
+
+    deleted: list[SyncTombstoneResponse] = []
+    if not reset:
+        tombstones = await session.execute(
+            select(SyncTombstone)
+            .where(SyncTombstone.owner_id == owner_id, SyncTombstone.deleted_at > since)
+            .order_by(SyncTombstone.deleted_at)
+        )
+        deleted = [
+            SyncTombstoneResponse(entity=t.entity, id=t.entity_id, deleted_at=t.deleted_at)
+            for t in tombstones.scalars().all()
+        ]
+
+    return SyncChangesResponse(
+        cursor=next_cursor,
+        reset=reset,
+        farms=[FarmResponse.model_validate(farm) for farm in farms],
+        paddocks=[serialize_paddock(paddock) for paddock in paddocks],
+        mixes=[serialize_mix(mix) for mix in mixes],
+        applications=[serialize_application_summary_row(row) for row in applications],
+        deleted=deleted,
+    )
@@ -0,0 +1,234 @@
+"""Tank mix calculator: how much of each product goes into each tank.
+
+A job's spray volume is either the mix's ``total_water_l`` or, when a water
+rate is given, that rate times the paddocks' area. The volume is split into
+full tanks plus a final partial tank, and each product (``rate_l_per_ha``
+times the area) is dosed in proportion to the volume each tank holds.
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..models import Mix, MixItem, Paddock
+from ..schemas import TankCalculation, TankProductAmount
+from ..utils import to_float
+from .ttl_cache import TTLCache
+
+_settings = get_settings()
+
+# A remainder this small (relative to the tank) is float noise, not another tank.
+_REMAINDER_EPSILON = 1e-9
+# Larger plans are computed fresh; caching them would push every other entry out of ``tank_plans``.
+_CACHE_MAX_COMBINATIONS = 16
+
+
+def tank_quantities(
+    water_l: np.ndarray,
+    tank_capacity_l: float,
+    area_ha: np.ndarray,
+    item_mix: np.ndarray,
+    item_rate: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """Tank counts and product volumes for every mix × paddock set at once.
+
+    ``water_l`` is the spray volume per (mix, set), shape ``(M, S)``, and must
+    be positive. ``area_ha`` has one entry per set, and products are given as
+    parallel ``item_mix`` (row into ``water_l``) and ``item_rate`` arrays of
+    length ``I``. Per-mix results are ``(M, S)``; per-product ones ``(I, S)``.
+    """
+    full = np.floor(water_l / tank_capacity_l)
+    remainder = water_l - full * tank_capacity_l
+    # Both edges of the floor can be off by rounding: 1000 / 500 may land a hair under 2.
+    whole = remainder >= tank_capacity_l * (1 - _REMAINDER_EPSILON)
+    full = np.where(whole, full + 1, full)
+    remainder = np.where(whole | (remainder <= tank_capacity_l * _REMAINDER_EPSILON), 0.0, remainder)
+
+    total = item_rate[:, None] * area_ha[None, :]
+    per_litre = total / water_l[item_mix]
+    return {
+        "full_tanks": full.astype(np.int64),
+        "tank_count": full.astype(np.int64) + (remainder > 0),
+        "final_tank_water_l": remainder,
+        "total_l": total,
+        "per_full_tank_l": per_litre * tank_capacity_l,
+        "final_tank_l": per_litre * remainder[item_mix],
+    }
+
+
+PaddockSet = tuple[uuid.UUID, ...]
+_PlanKey = tuple[uuid.UUID, PaddockSet, float, float | None]
+_PlanVersion = tuple[datetime, tuple[datetime, ...]]
+
+
+class TankPlanCache:
+    """Calculations per (mix, paddock set, tank, water rate), validated on each use.
+
+    Each entry stores the mix's and paddocks' ``updated_at``, read by the same
+    queries that check ownership, and is recomputed when any of them moved.
+    Mix items are only written together with their mix, so the mix's
+    timestamp covers them.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        # Freshness comes from the version check; the TTL only drops idle plans.
+        self._cache: TTLCache[tuple[_PlanVersion, TankCalculation]] = TTLCache(maxsize, ttl_seconds=3600)
+        self.computed = 0
+
+    def get(self, key: _PlanKey, version: _PlanVersion) -> TankCalculation | None:
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        return None
+
+    def set(self, key: _PlanKey, version: _PlanVersion, calculation: TankCalculation) -> None:
+        self._cache.set(key, (version, calculation))
+
+    def stats(self) -> dict[str, int]:
+        return {**self._cache.stats(), "computed": self.computed}
+
+
+tank_plans = TankPlanCache(_settings.tank_plan_cache_size)
+
+
+def _round(values: np.ndarray) -> list[Any]:
+    return np.round(values, 3).tolist()
+
+
+async def plan_tanks(
+    session: AsyncSession,
+    owner_id: uuid.UUID,
+    mix_ids: Sequence[uuid.UUID],
+    paddock_sets: Sequence[Sequence[uuid.UUID]],
+    tank_capacity_l: float,
+    water_rate_l_per_ha: float | None = None,
+) -> list[TankCalculation]:
+    """Calculate every mix against every paddock set, mix-major in request order.
+
+    Combinations cached with unchanged inputs are reused; the rest are
+    computed in one ``tank_quantities`` call. Only small requests (the single
+    mix endpoint, short plans) store their results.
+    """
+    mix_order = list(dict.fromkeys(mix_ids))
+    sets: list[PaddockSet] = [tuple(sorted(set(paddock_ids))) for paddock_ids in paddock_sets]
+    if any(not paddock_ids for paddock_ids in sets):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Paddock sets must not be empty")
+
+    mixes = {
+        row.id: row
+        for row in await session.execute(
+            select(Mix.id, Mix.updated_at, Mix.total_water_l).where(Mix.id.in_(mix_order), Mix.owner_id == owner_id)
+        )
+    }
+    missing_mixes = [str(mix_id) for mix_id in mix_order if mix_id not in mixes]
+    if missing_mixes:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Mix not found: {', '.join(missing_mixes)}")
+    if water_rate_l_per_ha is None:
+        dry = [str(mix_id) for mix_id in mix_order if not (to_float(mixes[mix_id].total_water_l) or 0) > 0]
+        if dry:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Mix has no water volume; pass waterRateLPerHa: {', '.join(dry)}",
+            )
+
+    wanted = {paddock_id for paddock_ids in sets for paddock_id in paddock_ids}
+    paddocks = {
+        row.id: row
+        for row in await session.execute(
+            select(Paddock.id, Paddock.updated_at, Paddock.area_hectares).where(
+                Paddock.id.in_(wanted), Paddock.owner_id == owner_id
+            )
+        )
+    }
+    missing = wanted.difference(paddocks)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Paddock not found: {', '.join(sorted(str(pid) for pid in missing))}",
+        )
+    no_area = [str(pid) for pid in sorted(wanted, key=str) if not (to_float(paddocks[pid].area_hectares) or 0) > 0]
+    if no_area:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Paddock has no area: {', '.join(no_area)}"
+        )
+
+    def plan_key(mix_id: uuid.UUID, paddock_ids: PaddockSet) -> tuple[_PlanKey, _PlanVersion]:
+        version = (mixes[mix_id].updated_at, tuple(paddocks[pid].updated_at for pid in paddock_ids))
+        return (mix_id, paddock_ids, tank_capacity_l, water_rate_l_per_ha), version
+
+    results: dict[tuple[uuid.UUID, PaddockSet], TankCalculation] = {}
+    stale_mixes: dict[uuid.UUID, None] = {}
+    stale_sets: dict[PaddockSet, None] = {}
+    for mix_id in mix_order:
+        for paddock_ids in sets:
+            cached = tank_plans.get(*plan_key(mix_id, paddock_ids))
+            if cached is None:
+                stale_mixes[mix_id] = None
+                stale_sets[paddock_ids] = None
+            else:
+                results[(mix_id, paddock_ids)] = cached
+
+    cache_results = len(mix_order) * len(sets) <= _CACHE_MAX_COMBINATIONS
+    if stale_mixes:
+        compute_mixes, compute_sets = list(stale_mixes), list(stale_sets)
+        items = (
+            await session.execute(
+                select(MixItem.mix_id, MixItem.chemical, MixItem.rate_l_per_ha)
+                .where(MixItem.mix_id.in_(compute_mixes))
+                .order_by(MixItem.mix_id, MixItem.chemical, MixItem.id)
+            )
+        ).all()
+        row_of = {mix_id: i for i, mix_id in enumerate(compute_mixes)}
+        item_mix = np.array([row_of[item.mix_id] for item in items], dtype=np.int64)
+        item_rate = np.array([to_float(item.rate_l_per_ha) for item in items], dtype=np.float64)
+        area = np.array([sum(to_float(paddocks[pid].area_hectares) for pid in ids) for ids in compute_sets])
+        if water_rate_l_per_ha is None:
+            totals = np.array([to_float(mixes[mix_id].total_water_l) for mix_id in compute_mixes])
+            water = np.repeat(totals[:, None], len(compute_sets), axis=1)
+        else:
+            water = np.repeat((water_rate_l_per_ha * area)[None, :], len(compute_mixes), axis=0)
+        q = tank_quantities(water, tank_capacity_l, area, item_mix, item_rate)
+        tank_plans.computed += len(compute_mixes) * len(compute_sets)
+
+        columns = {name: _round(values) if values.dtype.kind == "f" else values.tolist() for name, values in q.items()}
+        water_l, area_ha = _round(water), _round(area)
+        items_of: dict[int, list[int]] = {}
+        for index, row in enumerate(item_mix.tolist()):
+            items_of.setdefault(row, []).append(index)
+        for m, mix_id in enumerate(compute_mixes):
+            for s, paddock_ids in enumerate(compute_sets):
+                calculation = TankCalculation(
+                    mix_id=mix_id,
+                    paddock_ids=list(paddock_ids),
+                    area_ha=area_ha[s],
+                    water_l=water_l[m][s],
+                    tank_capacity_l=tank_capacity_l,
+                    tank_count=columns["tank_count"][m][s],
+                    full_tanks=columns["full_tanks"][m][s],
+                    final_tank_water_l=columns["final_tank_water_l"][m][s],
+                    products=[
+                        TankProductAmount(
+                            chemical=items[i].chemical,
+                            rate_l_per_ha=float(item_rate[i]),
+                            total_l=columns["total_l"][i][s],
+                            per_full_tank_l=columns["per_full_tank_l"][i][s],
+                            final_tank_l=columns["final_tank_l"][i][s],
+                        )
+                        for i in items_of.get(m, [])
+                    ],
+                )
+                if cache_results:
+                    # Stale mixes × stale sets can include combinations that were cached; refresh them too.
+                    tank_plans.set(*plan_key(mix_id, paddock_ids), calculation)
+                results[(mix_id, paddock_ids)] = calculation
+
+    return [results[(mix_id, paddock_ids)] for mix_id in mix_order for paddock_ids in sets]
@@ -0,0 +1,284 @@
+"""Sprayer GPS tracks: the packed binary format and the maths run over it.
+
+Wire and storage format (little-endian), version 1::
+
+    offset  size  field
+    0       4     magic b"SPTK"
+    4       1     version (1)
+    5       1     flags; bit 0 set = a boom-state column follows the deltas
+    6       2     reserved, 0
+    8       4     point count N (uint32)
+    12      8     first fix time, ms since the Unix epoch (int64)
+    20      4     first fix latitude, 1e-7 degrees (int32)
+    24      4     first fix longitude, 1e-7 degrees (int32)
+    28      4N    time deltas in ms from the previous fix (int32; the first is 0)
+    ...     4N    latitude deltas, 1e-7 degrees (int32)
+    ...     4N    longitude deltas, 1e-7 degrees (int32)
+    ...     N     boom state, 0 = off, 1 = on (uint8; only with flag bit 0)
+
+At 1 Hz a full day is about 1 MB, and the deltas compress well, so uploads may
+also be gzipped. Decoding is a ``frombuffer`` plus a ``cumsum`` per column.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+import numpy as np
+from fastapi import HTTPException, status
+
+from .paddock_index import M_PER_DEG_LAT, M_PER_DEG_LNG_EQUATOR, PaddockShape
+
+MAGIC = b"SPTK"
+VERSION = 1
+FLAG_BOOM = 0x01
+_HEADER = struct.Struct("<4sBBHIqii")
+_SCALE = 1e-7
+
+# Segments longer than this in time, or faster than this, are GPS dropouts or
+# jumps; they are left out of distance, coverage and time-in-paddock.
+_MAX_GAP_SECONDS = 30.0
+_MAX_SPEED_MS = 30.0
+# Most raster cells the swept area may span; the cell grows to fit, which
+# bounds the set of covered cells kept while rasterising.
+_MAX_RASTER_CELLS = 500_000
+# Swath sample points generated per batch, which bounds the temporaries.
+_RASTER_BATCH_POINTS = 262_144
+
+
+def _invalid(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid track: {detail}")
+
+
+@dataclass(frozen=True)
+class Track:
+    t_ms: np.ndarray
+    lat: np.ndarray
+    lng: np.ndarray
+    boom_on: np.ndarray | None
+
+    def __len__(self) -> int:
+        return len(self.t_ms)
+
+    @property
+    def started_at(self) -> datetime:
+        return datetime.fromtimestamp(int(self.t_ms[0]) / 1000, tz=timezone.utc)
+
+    @property
+    def ended_at(self) -> datetime:
+        return datetime.fromtimestamp(int(self.t_ms[-1]) / 1000, tz=timezone.utc)
+
+
+def max_track_bytes(max_points: int) -> int:
+    return _HEADER.size + 13 * max_points
+
+
+def encode_track(t_ms: Any, lat: Any, lng: Any, boom_on: Any = None) -> bytes:
+    """Pack fixes into the version 1 format; mostly for clients, tools and fixtures."""
+    t = np.asarray(t_ms, dtype=np.int64)
+    la = np.round(np.asarray(lat, dtype=np.float64) / _SCALE).astype(np.int64)
+    ln = np.round(np.asarray(lng, dtype=np.float64) / _SCALE).astype(np.int64)
+    columns = [np.diff(values, prepend=values[:1]).astype("<i4") for values in (t, la, ln)]
+    flags = 0
+    if boom_on is not None:
+        flags |= FLAG_BOOM
+        columns.append(np.asarray(boom_on, dtype="u1"))
+    header = _HEADER.pack(MAGIC, VERSION, flags, 0, len(t), int(t[0]), int(la[0]), int(ln[0]))
+    return header + b"".join(column.tobytes() for column in columns)
+
+
+def decode_track(data: bytes, max_points: int) -> tuple[Track, bytes]:
+    """Validate and unpack an upload; returns the track and its uncompressed bytes for storage."""
+    limit = max_track_bytes(max_points)
+    if data[:2] == b"\x1f\x8b":
+        decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        try:
+            data = decompressor.decompress(data, limit + 1)
+        except zlib.error as e:
+            raise _invalid("bad gzip data") from e
+        if len(data) > limit:
+            raise _invalid(f"more than {max_points} points")
+    if len(data) < _HEADER.size:
+        raise _invalid("too short")
+    magic, version, flags, _, count, t0, lat0, lng0 = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise _invalid("unknown format or version")
+    if count < 2:
+        raise _invalid("at least two fixes are needed")
+    if count > max_points:
+        raise _invalid(f"more than {max_points} points")
+    has_boom = bool(flags & FLAG_BOOM)
+    expected = _HEADER.size + count * (12 + (1 if has_boom else 0))
+    if len(data) != expected:
+        raise _invalid(f"expected {expected} bytes for {count} points, got {len(data)}")
+
+    deltas = np.frombuffer(data, dtype="<i4", count=3 * count, offset=_HEADER.size).reshape(3, count).astype(np.int64)
+    t_ms = t0 + np.cumsum(deltas[0])
+    lat = (lat0 + np.cumsum(deltas[1])) * _SCALE
+    lng = (lng0 + np.cumsum(deltas[2])) * _SCALE
+    if (deltas[0, 1:] < 0).any():
+        raise _invalid("fix times must not go backwards")
+    if np.abs(lat).max() > 90 or np.abs(lng).max() > 180:
+        raise _invalid("coordinates out of range")
+    boom_on = None
+    if has_boom:
+        boom_on = np.frombuffer(data, dtype="u1", count=count, offset=_HEADER.size + 12 * count) != 0
+    return Track(t_ms, lat, lng, boom_on), data
+
+
+def _sorted_unique(keys: np.ndarray) -> np.ndarray:
+    # A stable sort of int64 is a radix sort, several times faster than np.unique here.
+    keys = np.sort(keys, kind="stable")
+    return keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+
+
+def _swath_cells(
+    x0: np.ndarray,
+    y0: np.ndarray,
+    dx: np.ndarray,
+    dy: np.ndarray,
+    length: np.ndarray,
+    along: np.ndarray,
+    offsets: np.ndarray,
+    cell: float,
+    rows: int,
+) -> np.ndarray:
+    """Sorted distinct cell keys hit by the swath samples of some segments."""
+    segment = np.repeat(np.arange(len(length)), along)
+    first = np.repeat(np.cumsum(along) - along, along)
+    # Sample centres of equal sub-steps, so nothing lands past a segment's end.
+    fraction = (np.arange(len(segment)) - first + 0.5) / along[segment]
+    px = x0[segment] + fraction * dx[segment]
+    py = y0[segment] + fraction * dy[segment]
+    nx, ny = -dy[segment] / length[segment], dx[segment] / length[segment]
+    ix = np.floor((px[:, None] + nx[:, None] * offsets) / cell).astype(np.int64)
+    iy = np.floor((py[:, None] + ny[:, None] * offsets) / cell).astype(np.int64)
+    return _sorted_unique((ix * rows + iy).ravel())
+
+
+def _covered_area_m2(x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray, boom_width_m: float) -> float:
+    """Area swept by a boom along the given segments, counting overlaps once.
+
+    The swath is sampled on a grid a sixteenth of the boom wide, coarsened
+    until the swept area spans at most ``_MAX_RASTER_CELLS`` cells: points are
+    laid at half-cell spacing along each segment and across the boom, and the
+    distinct cells hit are counted. Samples are generated in batches and only
+    the set of covered cells is kept between them, so memory stays at a few
+    MB however long the track is.
+    """
+    if len(x0) == 0 or boom_width_m <= 0:
+        return 0.0
+    dx, dy = x1 - x0, y1 - y0
+    length = np.hypot(dx, dy)
+    keep = length > 0
+    x0, y0, dx, dy, length = x0[keep], y0[keep], dx[keep], dy[keep], length[keep]
+    if len(length) == 0:
+        return 0.0
+
+    swept_m2 = float(length.sum()) * boom_width_m
+    cell = max(boom_width_m / 16, 0.25, math.sqrt(swept_m2 / _MAX_RASTER_CELLS))
+    step = cell / 2
+    along = np.ceil(length / step).astype(np.int64)
+    across = int(math.ceil(boom_width_m / step))
+    offsets = (np.arange(across) + 0.5) * (boom_width_m / across) - boom_width_m / 2
+
+    # Cells are numbered from the corner of the track's bounding box, padded by half a boom.
+    pad = boom_width_m / 2 + cell
+    min_x = min(float(x0.min()), float((x0 + dx).min())) - pad
+    min_y = min(float(y0.min()), float((y0 + dy).min())) - pad
+    max_y = max(float(y0.max()), float((y0 + dy).max())) + pad
+    x0, y0 = x0 - min_x, y0 - min_y
+    rows = int((max_y - min_y) / cell) + 1
+
+    points = np.cumsum(along) * across
+    covered = np.empty(0, dtype=np.int64)
+    start = 0
+    while start < len(along):
+        done = int(points[start - 1]) if start else 0
+        stop = max(start + 1, int(np.searchsorted(points, done + _RASTER_BATCH_POINTS, side="right")))
+        batch = slice(start, stop)
+        cells = _swath_cells(
+            x0[batch], y0[batch], dx[batch], dy[batch], length[batch], along[batch], offsets, cell, rows
+        )
+        covered = _sorted_unique(np.concatenate((covered, cells)))
+        start = stop
+    return float(covered.size * cell * cell)
+
+
+def segment_flags(track: Track, x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Per-segment ``(dt seconds, length m, valid, sprayed)`` for a track projected to metres.
+
+    A segment is valid unless it is a dropout or a jump. It is sprayed when
+    valid and the boom is on at its start; tracks without a boom column count
+    as sprayed throughout.
+    """
+    dt = np.diff(track.t_ms) / 1000.0
+    step = np.hypot(np.diff(x), np.diff(y))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        speed = np.where(dt > 0, step / dt, np.where(step > 0, np.inf, 0.0))
+    valid = (dt <= _MAX_GAP_SECONDS) & (speed <= _MAX_SPEED_MS)
+    sprayed = valid & (track.boom_on[:-1] if track.boom_on is not None else True)
+    return dt, step, valid, sprayed
+
+
+def track_metrics(track: Track, boom_width_m: float | None, shapes: list[PaddockShape]) -> dict[str, Any]:
+    """Distance, sprayed distance, covered area and time per paddock for one track.
+
+    Segments are classified by ``segment_flags``. Time in a paddock is the
+    duration of valid segments starting inside its boundary. A paddock
+    overlapping an earlier one only gets the time outside it.
+    """
+    ref_lat = float(track.lat.mean())
+    kx = M_PER_DEG_LNG_EQUATOR * math.cos(math.radians(ref_lat))
+    x = (track.lng - track.lng.mean()) * kx
+    y = (track.lat - ref_lat) * M_PER_DEG_LAT
+
+    dt, step, valid, sprayed = segment_flags(track, x, y)
+
+    covered_ha = None
+    if boom_width_m:
+        covered_ha = (
+            _covered_area_m2(x[:-1][sprayed], y[:-1][sprayed], x[1:][sprayed], y[1:][sprayed], boom_width_m) / 10_000
+        )
+
+    paddock_seconds: dict[str, float] = {}
+    unassigned = valid.copy()
+    for shape in shapes:
+        inside = unassigned & shape.contains_many(track.lat[:-1], track.lng[:-1])
+        paddock_seconds[str(shape.id)] = round(float(dt[inside].sum()), 1)
+        unassigned &= ~inside
+
+    return {
+        "distance_m": float(step[valid].sum()),
+        "sprayed_distance_m": float(step[sprayed].sum()),
+        "covered_area_ha": covered_ha,
+        "tracked_seconds": float(dt[valid].sum()),
+        "paddock_seconds": paddock_seconds,
+    }
+
+
+def new_track_row(
+    owner_id: uuid.UUID,
+    application_id: uuid.UUID,
+    track: Track,
+    data: bytes,
+    boom_width_m: float | None,
+    metrics: dict[str, Any],
+) -> dict[str, Any]:
+    return {
+        "id": uuid.uuid4(),
+        "owner_id": owner_id,
+        "application_id": application_id,
+        "started_at": track.started_at,
+        "ended_at": track.ended_at,
+        "point_count": len(track),
+        "boom_width_m": boom_width_m,
+        "data": data,
+        **metrics,
+    }
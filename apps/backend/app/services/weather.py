@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import httpx
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..db import AsyncSessionFactory
+from ..http_client import http_client
+from ..models import BlynkStation, WeatherReading, WorkerLease
+from ..utils import to_float
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger("uvicorn.error")
+
+_settings = get_settings()
+
+WeatherPayload = dict[str, float | None]
+
+
+async def fetch_station_payload(read_url: str, auth_token: str | None) -> WeatherPayload:
+    params: dict[str, str] = {}
+    headers: dict[str, str] = {}
+    if auth_token:
+        params["token"] = auth_token
+    response = await http_client.request("weather", "GET", read_url, params=params, headers=headers)
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Failed to fetch weather") from exc
+    try:
+        data = response.json()
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Invalid weather payload") from exc
+    return {
+        "wind_speed_ms": to_float(data.get("wind_speed_ms")),
+        "wind_direction_deg": to_float(data.get("wind_direction_deg")),
+        "temp_c": to_float(data.get("temp_c")),
+        "humidity_pct": to_float(data.get("humidity_pct")),
+    }
+
+
+class StationReadingCache:
+    """Per-station reading cache with single-flight fetches.
+
+    A reading younger than ``max_age_seconds`` is served from memory. On a
+    miss, the first caller starts the upstream fetch and everyone else asking
+    for the same station awaits that same fetch. Failed fetches are not
+    cached.
+    """
+
+    def __init__(self, max_age_seconds: float, maxsize: int = 1000) -> None:
+        self._max_age = max_age_seconds
+        self._cache: TTLCache[tuple[WeatherPayload, datetime]] = TTLCache(maxsize, max_age_seconds)
+        self._inflight: dict[uuid.UUID, asyncio.Task[tuple[WeatherPayload, datetime]]] = {}
+        self.fetches = 0
+        self.coalesced = 0
+
+    async def _fetch(
+        self, key: uuid.UUID, read_url: str, auth_token: str | None
+    ) -> tuple[WeatherPayload, datetime]:
+        self.fetches += 1
+        reading = (await fetch_station_payload(read_url, auth_token), datetime.now(timezone.utc))
+        self._cache.set(key, reading)
+        return reading
+
+    async def get(self, station: BlynkStation) -> tuple[WeatherPayload, datetime, bool]:
+        """Return ``(payload, fetched_at, cached)``; ``cached`` is False only for the caller that fetched."""
+        key = station.id
+        hit = self._cache.get(key)
+        if hit is not None:
+            return hit[0], hit[1], True
+
+        task = self._inflight.get(key)
+        leader = task is None
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, station.read_url, station.auth_token))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        # Shielded so one caller disconnecting does not cancel the fetch for the others.
+        payload, fetched_at = await asyncio.shield(task)
+        return payload, fetched_at, not leader
+
+    def prime(self, station_id: uuid.UUID, payload: WeatherPayload, fetched_at: datetime) -> None:
+        age = (datetime.now(timezone.utc) - fetched_at).total_seconds()
+        self._cache.set(station_id, (payload, fetched_at), ttl_seconds=self._max_age - age)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            **self._cache.stats(),
+            "fetches": self.fetches,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+
+station_readings = StationReadingCache(_settings.weather_cache_max_age_seconds)
+
+
+def reading_payload(reading: WeatherReading) -> WeatherPayload:
+    return {
+        "wind_speed_ms": reading.wind_speed_ms,
+        "wind_direction_deg": reading.wind_direction_deg,
+        "temp_c": reading.temp_c,
+        "humidity_pct": reading.humidity_pct,
+    }
+
+
+async def store_readings(
+    session: AsyncSession, readings: Sequence[tuple[uuid.UUID, datetime, WeatherPayload]]
+) -> None:
+    """Append samples with one multi-row INSERT; a repeated (station, time) is ignored."""
+    if not readings:
+        return
+    rows = [{"station_id": station_id, "observed_at": at, **payload} for station_id, at, payload in readings]
+    await session.execute(
+        pg_insert(WeatherReading).values(rows).on_conflict_do_nothing(index_elements=["station_id", "observed_at"])
+    )
+
+
+async def latest_reading(session: AsyncSession, station_id: uuid.UUID, max_age_seconds: float) -> WeatherReading | None:
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)
+    query = (
+        select(WeatherReading)
+        .where(WeatherReading.station_id == station_id, WeatherReading.observed_at >= cutoff)
+        .order_by(WeatherReading.observed_at.desc())
+        .limit(1)
+    )
+    return (await session.execute(query)).scalar_one_or_none()
+
+
+async def nearest_reading(
+    session: AsyncSession, station_id: uuid.UUID, at: datetime, max_gap_seconds: float
+) -> WeatherReading | None:
+    gap = timedelta(seconds=max_gap_seconds)
+    query = (
+        select(WeatherReading)
+        .where(
+            WeatherReading.station_id == station_id,
+            WeatherReading.observed_at.between(at - gap, at + gap),
+        )
+        .order_by(func.abs(func.extract("epoch", WeatherReading.observed_at - at)))
+        .limit(1)
+    )
+    return (await session.execute(query)).scalar_one_or_none()
+
+
+class WeatherPoller:
+    """Polls every registered station on a fixed interval and stores the samples.
+
+    A ``worker_leases`` row, claimed or renewed in a short transaction at the
+    start of each cycle, makes one app process the poller while the others
+    skip. The station fetches run with no transaction or connection held; the
+    samples are written afterwards in a second short transaction. Stations are
+    fetched concurrently up to ``concurrency``. A failing station is logged and
+    skipped and does not stop the cycle. Fresh readings also prime
+    ``station_readings``.
+    """
+
+    _LEASE_NAME = "weather_poller"
+
+    def __init__(self, interval_seconds: float, concurrency: int) -> None:
+        self._interval = interval_seconds
+        self._holder = uuid.uuid4()
+        self._concurrency = max(1, concurrency)
+        self._task: asyncio.Task[None] | None = None
+        self.cycles = 0
+        self.samples = 0
+        self.failures = 0
+        self.last_cycle_ms = 0.0
+        self.last_error: str | None = None
+
+    async def _claim_lease(self, session: AsyncSession) -> bool:
+        # Two intervals, so the holder renews in time despite jitter and a dead holder is replaced soon.
+        expires_at = func.now() + timedelta(seconds=max(2 * self._interval, 1.0))
+        stmt = pg_insert(WorkerLease).values(name=self._LEASE_NAME, holder=self._holder, expires_at=expires_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[WorkerLease.name],
+            set_={"holder": stmt.excluded.holder, "expires_at": stmt.excluded.expires_at},
+            where=(WorkerLease.holder == self._holder) | (WorkerLease.expires_at < func.now()),
+        ).returning(WorkerLease.holder)
+        return (await session.execute(stmt)).scalar_one_or_none() is not None
+
+    async def poll_once(self) -> int:
+        async with AsyncSessionFactory() as session:
+            async with session.begin():
+                if not await self._claim_lease(session):
+                    return 0
+                stations = (
+                    await session.execute(select(BlynkStation.id, BlynkStation.read_url, BlynkStation.auth_token))
+                ).all()
+            # The session's connection goes back to the pool between the two transactions.
+            semaphore = asyncio.Semaphore(self._concurrency)
+
+            async def poll(station: Any) -> tuple[uuid.UUID, datetime, WeatherPayload] | None:
+                async with semaphore:
+                    try:
+                        payload = await fetch_station_payload(station.read_url, station.auth_token)
+                    except (HTTPException, httpx.HTTPError) as e:
+                        self.failures += 1
+                        detail = e.detail if isinstance(e, HTTPException) else str(e)
+                        logger.warning(f"Weather poll failed for station {station.id}: {detail}")
+                        return None
+                    return station.id, datetime.now(timezone.utc), payload
+
+            readings = [r for r in await asyncio.gather(*(poll(st) for st in stations)) if r is not None]
+            async with session.begin():
+                await store_readings(session, readings)
+        for station_id, observed_at, payload in readings:
+            station_readings.prime(station_id, payload, observed_at)
+        self.samples += len(readings)
+        return len(readings)
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            try:
+                await self.poll_once()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"Weather poll cycle failed: {e}")
+            self.cycles += 1
+            elapsed = time.perf_counter() - started
+            self.last_cycle_ms = elapsed * 1000
+            await asyncio.sleep(max(0.0, self._interval - elapsed))
+
+    def start(self) -> None:
+        if self._interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self._interval,
+            "cycles": self.cycles,
+            "samples": self.samples,
+            "failures": self.failures,
+            "last_cycle_ms": self.last_cycle_ms,
+            "last_error": self.last_error,
+        }
+
+
+weather_poller = WeatherPoller(_settings.weather_poll_interval_seconds, _settings.weather_poll_concurrency)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from typing import Any
+
+import numpy as np
+
+# Column order of the sample matrix built from weather_readings rows.
+_T, _WIND, _DIR, _TEMP, _HUM = range(5)
+
+
+def _utc(epoch: float) -> datetime:
+    return datetime.fromtimestamp(float(epoch), tz=timezone.utc)
+
+
+def _nan_to_none(values: np.ndarray) -> list[float | None]:
+    return [None if np.isnan(v) else float(v) for v in values]
+
+
+def _stats(values: np.ndarray, bucket: np.ndarray, starts: np.ndarray, buckets: int) -> dict[str, np.ndarray]:
+    valid = ~np.isnan(values)
+    count = np.bincount(bucket[valid], minlength=buckets)
+    total = np.bincount(bucket[valid], weights=values[valid], minlength=buckets)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+    # Samples are time-ordered, so each bucket is a contiguous run starting at
+    # ``starts``; fmin/fmax skip NaNs unless a whole run is NaN.
+    return {
+        "min": np.fmin.reduceat(values, starts),
+        "max": np.fmax.reduceat(values, starts),
+        "mean": mean[bucket[starts]],
+    }
+
+
+def downsample(
+    rows: Sequence[Sequence[Any]],
+    start: datetime,
+    end: datetime,
+    buckets: int,
+    wind_limit_ms: float | None = None,
+) -> dict[str, Any]:
+    """Reduce time-ordered ``(epoch, wind, direction, temp, humidity)`` rows to per-bucket stats.
+
+    The range is cut into ``buckets`` equal-width buckets and only buckets with
+    samples are returned. Wind direction is averaged as a unit vector, so 350°
+    and 10° average to 0° instead of 180°. With ``wind_limit_ms``, buckets whose
+    peak wind exceeds the limit are flagged, and contiguous runs of exceeding
+    raw samples are returned as intervals.
+    """
+    result: dict[str, Any] = {"buckets": [], "exceedances": []}
+    if not rows:
+        return result
+
+    data = np.asarray(rows, dtype=np.float64)
+    t = data[:, _T]
+    t0, t1 = start.timestamp(), end.timestamp()
+    width = max((t1 - t0) / buckets, 1e-9)
+    bucket = np.clip(((t - t0) // width).astype(np.int64), 0, buckets - 1)
+    occupied, starts = np.unique(bucket, return_index=True)
+
+    wind = _stats(data[:, _WIND], bucket, starts, buckets)
+    temp = _stats(data[:, _TEMP], bucket, starts, buckets)
+    hum = _stats(data[:, _HUM], bucket, starts, buckets)
+
+    radians = np.deg2rad(data[:, _DIR])
+    valid_dir = ~np.isnan(radians)
+    sin_sum = np.bincount(bucket[valid_dir], weights=np.sin(radians[valid_dir]), minlength=buckets)[occupied]
+    cos_sum = np.bincount(bucket[valid_dir], weights=np.cos(radians[valid_dir]), minlength=buckets)[occupied]
+    has_dir = np.bincount(bucket[valid_dir], minlength=buckets)[occupied] > 0
+    # Rounded first so a mean a hair below 0° reports as 0, not 360.
+    direction = np.where(has_dir, np.round(np.rad2deg(np.arctan2(sin_sum, cos_sum)), 6) % 360.0, np.nan)
+
+    counts = np.diff(np.append(starts, len(t)))
+    bucket_start = t0 + occupied * width
+    exceeded = wind["max"] > wind_limit_ms if wind_limit_ms is not None else np.zeros(len(occupied), dtype=bool)
+
+    columns = {
+        "wind_speed_min": _nan_to_none(wind["min"]),
+        "wind_speed_max": _nan_to_none(wind["max"]),
+        "wind_speed_mean": _nan_to_none(wind["mean"]),
+        "wind_direction_mean": _nan_to_none(direction),
+        "temp_min": _nan_to_none(temp["min"]),
+        "temp_max": _nan_to_none(temp["max"]),
+        "temp_mean": _nan_to_none(temp["mean"]),
+        "humidity_min": _nan_to_none(hum["min"]),
+        "humidity_max": _nan_to_none(hum["max"]),
+        "humidity_mean": _nan_to_none(hum["mean"]),
+    }
+    for i in range(len(occupied)):
+        result["buckets"].append(
+            {
+                "start": _utc(bucket_start[i]),
+                "end": _utc(bucket_start[i] + width),
+                "samples": int(counts[i]),
+                "wind_exceeded": bool(exceeded[i]),
+                **{name: values[i] for name, values in columns.items()},
+            }
+        )
+
+    if wind_limit_ms is not None:
+        over = np.nan_to_num(data[:, _WIND], nan=-np.inf) > wind_limit_ms
+        edges = np.diff(np.concatenate(([0], over.astype(np.int8), [0])))
+        run_starts, run_ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        # Reduce over [start, end) pairs; the NaN sentinel keeps a run ending at the last sample in range.
+        padded = np.append(data[:, _WIND], np.nan)
+        bounds = np.column_stack((run_starts, run_ends)).ravel()
+        peaks = np.fmax.reduceat(padded, bounds)[::2] if len(bounds) else []
+        result["exceedances"] = [
+            {"start": _utc(t[s]), "end": _utc(t[e - 1]), "max_wind_speed_ms": float(peak)}
+            for s, e, peak in zip(run_starts, run_ends, peaks)
+        ]
+    return result
@@ -0,0 +1,24 @@
+import pytest
+from pydantic import ValidationError
+
+from app.config import Settings
+
+
+def _settings(**overrides):
+    return Settings(_env_file=None, **overrides)
+
+
+def test_default_weather_cache_outlives_two_polls():
+    settings = _settings()
+    assert settings.weather_cache_max_age_seconds >= 2 * settings.weather_poll_interval_seconds
+
+
+@pytest.mark.parametrize("interval", [150.0, 300.0])
+def test_poll_interval_must_be_below_cache_max_age(interval):
+    with pytest.raises(ValidationError, match="WEATHER_POLL_INTERVAL_SECONDS"):
+        _settings(weather_poll_interval_seconds=interval, weather_cache_max_age_seconds=150.0)
+
+
+@pytest.mark.parametrize(("interval", "max_age"), [(0.0, 30.0), (60.0, 0.0), (60.0, 61.0)])
+def test_poll_settings_accepted_when_disabled_or_below_max_age(interval, max_age):
+    _settings(weather_poll_interval_seconds=interval, weather_cache_max_age_seconds=max_age)
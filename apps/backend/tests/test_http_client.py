@@ -0,0 +1,98 @@
+import asyncio
+import socket
+
+import httpx
+import pytest
+
+from app.config import get_settings
+from app.http_client import HttpClient
+
+
+@pytest.fixture
+def keepalive_expiry(monkeypatch):
+    def configure(seconds):
+        monkeypatch.setenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", str(seconds))
+        get_settings.cache_clear()
+
+    yield configure
+    get_settings.cache_clear()
+
+
+async def _serve(connections):
+    """A keep-alive HTTP/1.1 server on localhost that counts the connections it accepts."""
+
+    async def handle(reader, writer):
+        connections.append(writer)
+        while await reader.readuntil(b"\r\n\r\n"):
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+
+    async def guarded(reader, writer):
+        try:
+            await handle(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    server = await asyncio.start_server(guarded, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def test_stats_report_the_pools_idle_connections(keepalive_expiry):
+    keepalive_expiry(30)
+    client = HttpClient()
+    accepted = []
+
+    async def scenario():
+        server, port = await _serve(accepted)
+        async with server:
+            first = await client.request("weather", "GET", f"http://127.0.0.1:{port}/a")
+            second = await client.request("weather", "GET", f"http://127.0.0.1:{port}/b")
+            assert first.text == second.text == "ok"
+            after_requests = client.stats()
+            await client.aclose()
+            return after_requests, client.stats()
+
+    stats, closed = asyncio.run(scenario())
+    # The second request reused the first one's connection, which is now idle.
+    assert len(accepted) == 1
+    assert stats["open"] == 1 and stats["idle"] == 1 and stats["in_use"] == 0
+    assert stats["hosts"]["127.0.0.1"]["idle"] == 1
+    assert stats["hosts"]["127.0.0.1"]["requests"] == 2
+    assert closed["open"] == 0 and closed["idle"] == 0
+
+
+def test_expired_connections_are_not_idle(keepalive_expiry):
+    keepalive_expiry(0.05)
+    client = HttpClient()
+
+    async def scenario():
+        server, port = await _serve([])
+        async with server:
+            await client.request("weather", "GET", f"http://127.0.0.1:{port}/a")
+            fresh = client.stats()
+            await asyncio.sleep(0.1)
+            stale = client.stats()
+            await client.aclose()
+            return fresh, stale
+
+    fresh, stale = asyncio.run(scenario())
+    assert fresh["idle"] == 1
+    assert stale["idle"] == 0
+
+
+def test_failed_requests_count_as_errors_not_connections():
+    client = HttpClient()
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    async def scenario():
+        with pytest.raises(httpx.ConnectError):
+            await client.request("weather", "GET", f"http://127.0.0.1:{port}/x")
+        stats = client.stats()
+        await client.aclose()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["open"] == 0 and stats["idle"] == 0
+    assert stats["hosts"]["127.0.0.1"]["errors"] == 1
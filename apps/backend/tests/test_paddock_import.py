@@ -0,0 +1,102 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.paddock_import import GeoJSONFeatureParser, import_paddocks
+
+SQUARE = {
+    "type": "Polygon",
+    "coordinates": [[[144.0, -36.0], [144.01, -36.0], [144.01, -35.99], [144.0, -35.99], [144.0, -36.0]]],
+}
+
+
+class _Session:
+    """Records statements; the farm has no paddocks yet."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append((statement, params))
+        return []
+
+
+def _import(document, chunk_size=64):
+    data = json.dumps(document).encode()
+
+    async def chunks():
+        for start in range(0, len(data), chunk_size):
+            yield data[start : start + chunk_size]
+
+    session = _Session()
+    result = asyncio.run(import_paddocks(session, uuid.uuid4(), uuid.uuid4(), chunks(), "geojson"))
+    return result, session
+
+
+def _parse(data, chunk_size):
+    parser = GeoJSONFeatureParser()
+    features = []
+    for start in range(0, len(data), chunk_size):
+        features.extend(parser.feed(data[start : start + chunk_size]))
+    return features + parser.close()
+
+
+def test_parser_yields_the_same_features_whatever_the_chunking():
+    document = {
+        "type": "FeatureCollection",
+        "name": "Farm — north",
+        "features": [
+            {"type": "Feature", "properties": {"name": "Dam paddock", "id": 12345}, "geometry": SQUARE},
+            {"type": "Feature", "properties": {"name": "Créek flat"}, "geometry": None},
+        ],
+        "crs": {"type": "name", "properties": {"name": "EPSG:4326"}},
+    }
+    data = ("﻿" + json.dumps(document, ensure_ascii=False)).encode()
+    for chunk_size in (1, 3, 7, len(data)):
+        assert _parse(data, chunk_size) == document["features"]
+
+
+def test_parser_rejects_a_truncated_file():
+    data = json.dumps({"type": "FeatureCollection", "features": [{"type": "Feature"}]}).encode()
+    with pytest.raises(ValueError):
+        _parse(data[:-5], 4)
+    with pytest.raises(ValueError, match="FeatureCollection"):
+        _parse(b'{"type": "Feature"}', 4)
+
+
+def test_a_bad_feature_is_reported_not_fatal():
+    result, session = _import(
+        {
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature", "properties": ["a"], "geometry": SQUARE},
+                {"type": "Feature", "properties": "North", "geometry": SQUARE},
+                {"type": "Feature", "properties": {"name": "North"}, "geometry": SQUARE},
+                {"type": "Feature", "properties": {"name": "North"}, "geometry": SQUARE},
+                {"type": "Feature", "properties": {"name": "South"}},
+            ],
+        }
+    )
+    assert result.created == 1 and result.updated == 0 and result.failed == 4
+    assert [(error.index, error.name, error.error) for error in result.errors] == [
+        (0, None, "Feature properties must be an object"),
+        (1, None, "Feature properties must be an object"),
+        (3, "North", "Duplicate paddock name in file"),
+        (4, "South", "Feature has no polygon geometry"),
+    ]
+    # One lookup of existing paddocks, then one insert for the good feature.
+    assert len(session.statements) == 2
+    assert [row["name"] for row in session.statements[1][1]] == ["North"]
+
+
+def test_unparseable_file_is_a_400():
+    async def chunks():
+        yield b'{"type": "FeatureCollection", "features": [}'
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(import_paddocks(_Session(), uuid.uuid4(), uuid.uuid4(), chunks(), "geojson"))
+    assert exc.value.status_code == 400
+    assert exc.value.detail.startswith("Invalid GeoJSON")
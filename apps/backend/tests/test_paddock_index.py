@@ -0,0 +1,160 @@
+import math
+import uuid
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.services.paddock_index import (
+    M_PER_DEG_LAT,
+    M_PER_DEG_LNG_EQUATOR,
+    PaddockIndex,
+    PaddockShape,
+    boundary_metrics,
+    boundary_violation,
+    parse_boundary,
+)
+
+SQUARE_WITH_HOLE = {
+    "type": "Polygon",
+    "coordinates": [
+        [[144.0, -36.0], [144.01, -36.0], [144.01, -35.99], [144.0, -35.99], [144.0, -36.0]],
+        [[144.004, -35.996], [144.006, -35.996], [144.006, -35.994], [144.004, -35.994], [144.004, -35.996]],
+    ],
+}
+TWO_PARTS = {
+    "type": "MultiPolygon",
+    "coordinates": [
+        [[[144.0, -36.0], [144.001, -36.0], [144.001, -35.999], [144.0, -35.999]]],
+        [[[144.002, -36.0], [144.003, -36.0], [144.003, -35.999], [144.002, -35.999]]],
+    ],
+}
+
+
+def _shape(geometry, paddock_id=None):
+    return PaddockShape.from_geometry(paddock_id or uuid.uuid4(), uuid.uuid4(), "Paddock", geometry)
+
+
+def _link(paddock_id, lat, lng, accuracy=None):
+    return {"paddock_id": paddock_id, "gps_latitude": lat, "gps_longitude": lng, "gps_accuracy_m": accuracy}
+
+
+def test_parse_boundary_closes_rings_and_drops_altitude():
+    rings = parse_boundary({"type": "Polygon", "coordinates": [[[144, -36, 120], [145, -36, 121], [145, -35, 119]]]})
+    assert len(rings) == 1 and len(rings[0]) == 1
+    np.testing.assert_array_equal(rings[0][0], [[144, -36], [145, -36], [145, -35], [144, -36]])
+    assert [len(polygon) for polygon in parse_boundary(SQUARE_WITH_HOLE)] == [2]
+    assert [len(polygon) for polygon in parse_boundary(TWO_PARTS)] == [1, 1]
+
+
+@pytest.mark.parametrize(
+    ("geometry", "message"),
+    [
+        ({"type": "Point", "coordinates": [144, -36]}, "Polygon or MultiPolygon"),
+        ({"type": "MultiPolygon", "coordinates": []}, "no coordinates"),
+        ({"type": "Polygon", "coordinates": []}, "no rings"),
+        ({"type": "Polygon", "coordinates": [[[144, -36], [145]]]}, "[lng, lat] pairs"),
+        ({"type": "Polygon", "coordinates": [[[144, -36], ["a", "b"], [145, -35]]]}, "[lng, lat] pairs"),
+        ({"type": "Polygon", "coordinates": [[[144, -36], [145, float("nan")], [145, -35]]]}, "[lng, lat] pairs"),
+        ({"type": "Polygon", "coordinates": [[[144, -36], [145, -95], [145, -35]]]}, "out of range"),
+        ({"type": "Polygon", "coordinates": [[[144, -36], [145, -36], [144, -36]]]}, "three distinct points"),
+    ],
+)
+def test_parse_boundary_rejects_bad_geometry(geometry, message):
+    with pytest.raises(HTTPException) as exc:
+        parse_boundary(geometry)
+    assert exc.value.status_code == 400
+    assert message in exc.value.detail
+
+
+def test_boundary_metrics_subtracts_holes_whatever_the_winding():
+    kx = M_PER_DEG_LNG_EQUATOR * math.cos(math.radians(-35.995))
+    outer_ha = 0.01 * kx * 0.01 * M_PER_DEG_LAT / 10_000
+    hole_ha = 0.002 * kx * 0.002 * M_PER_DEG_LAT / 10_000
+    reversed_hole = {
+        "type": "Polygon",
+        "coordinates": [SQUARE_WITH_HOLE["coordinates"][0], SQUARE_WITH_HOLE["coordinates"][1][::-1]],
+    }
+    areas, lats, lngs = boundary_metrics(
+        [parse_boundary(SQUARE_WITH_HOLE), parse_boundary(reversed_hole), parse_boundary(TWO_PARTS), []]
+    )
+    assert areas[0] == pytest.approx(outer_ha - hole_ha, rel=1e-3)
+    assert areas[1] == pytest.approx(areas[0])
+    assert lats[0] == pytest.approx(-35.995) and lngs[0] == pytest.approx(144.005)
+    # Two equal squares, so the centroid lies midway between them.
+    assert lats[2] == pytest.approx(-35.9995) and lngs[2] == pytest.approx(144.0015)
+    assert areas[3] == 0 and math.isnan(lats[3]) and math.isnan(lngs[3])
+
+
+@pytest.mark.parametrize(
+    ("lat", "lng", "inside"),
+    [
+        (-35.998, 144.002, True),  # in the outline
+        (-35.995, 144.005, False),  # in the hole
+        (-35.985, 144.005, False),  # north of the paddock
+        (-35.995, 144.02, False),  # east of the paddock
+    ],
+)
+def test_contains_handles_holes(lat, lng, inside):
+    shape = _shape(SQUARE_WITH_HOLE)
+    assert shape.contains(lat, lng) is inside
+    assert shape.contains_many(np.array([lat]), np.array([lng])).tolist() == [inside]
+
+
+def test_contains_handles_every_part_of_a_multipolygon():
+    shape = _shape(TWO_PARTS)
+    assert shape.contains(-35.9995, 144.0005)
+    assert shape.contains(-35.9995, 144.0025)
+    assert not shape.contains(-35.9995, 144.0015)
+
+
+def test_contains_many_agrees_with_contains_including_edges_and_vertices():
+    shape = _shape(SQUARE_WITH_HOLE)
+    # A grid whose lines fall exactly on every edge and vertex of both rings.
+    lats, lngs = np.meshgrid(np.linspace(-36.001, -35.989, 13), np.linspace(143.999, 144.011, 13))
+    lats, lngs = np.round(lats.ravel(), 3), np.round(lngs.ravel(), 3)
+    assert {-36.0, -35.996, -35.994, -35.99} <= set(lats.tolist())
+    expected = [shape.contains(lat, lng) for lat, lng in zip(lats, lngs)]
+    assert shape.contains_many(lats, lngs).tolist() == expected
+
+
+def test_distance_to_the_nearest_edge():
+    shape = _shape(SQUARE_WITH_HOLE)
+    assert shape.distance_m(-36.0, 144.005) == pytest.approx(0.0, abs=1e-6)
+    assert shape.distance_m(-36.0001, 144.005) == pytest.approx(0.0001 * M_PER_DEG_LAT, rel=1e-6)
+    # From the middle of the hole, the nearest edges are the hole's east and west sides.
+    kx = M_PER_DEG_LNG_EQUATOR * math.cos(math.radians(-35.995))
+    assert shape.distance_m(-35.995, 144.005) == pytest.approx(0.001 * kx, rel=1e-6)
+
+
+def test_index_locates_and_checks_with_tolerance():
+    holed, parts = uuid.uuid4(), uuid.uuid4()
+    index = PaddockIndex([_shape(SQUARE_WITH_HOLE, holed), _shape(TWO_PARTS, parts)])
+    assert len(index) == 2
+    assert [shape.id for shape in index.locate(-35.998, 144.002)] == [holed]
+    assert index.locate(-35.995, 144.005) == []
+    assert index.contains(uuid.uuid4(), -35.998, 144.002) is None
+
+    # On the edge counts with any tolerance, whichever side the even-odd rule puts it.
+    assert index.contains(holed, -36.0, 144.005, tolerance_m=0.01)
+    # 11 m south of the paddock: outside, unless the tolerance reaches it.
+    assert not index.contains(holed, -36.0001, 144.005)
+    assert index.contains(holed, -36.0001, 144.005, tolerance_m=15)
+
+
+def test_boundary_violation_caps_reported_accuracy():
+    paddock = uuid.uuid4()
+    index = PaddockIndex([_shape(SQUARE_WITH_HOLE, paddock)])
+    unbounded = uuid.uuid4()
+    # 110 m south of the edge with the default 15 m tolerance and 50 m accuracy cap.
+    far_lat = -36.001
+
+    assert boundary_violation(index, [_link(paddock, -35.998, 144.002, 5.0)]) is None
+    assert boundary_violation(index, [_link(paddock, None, None), _link(unbounded, 0.0, 0.0)]) is None
+    assert "outside the paddock boundary" in boundary_violation(index, [_link(paddock, far_lat, 144.005, 10.0)])
+    # Accuracy widens the tolerance up to the cap.
+    assert boundary_violation(index, [_link(paddock, -36.0004, 144.005, 40.0)]) is None
+    # A client claiming huge uncertainty is rejected, not waved through.
+    problem = boundary_violation(index, [_link(paddock, far_lat, 144.005, 1e9)])
+    assert "GPS accuracy is worse than 50 m" in problem
+    assert "outside" not in problem
@@ -0,0 +1,67 @@
+import asyncio
+import signal
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import render_pool as render_pool_module
+from app.services.render_pool import RenderPool
+
+
+def _square(value):
+    return value * value
+
+
+def _busy(seconds):
+    # Pure Python, so the deadline alarm interrupts it.
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+    return "finished"
+
+
+def _stuck(seconds):
+    # Ignores the deadline alarm, as a job stuck inside a C call would.
+    signal.signal(signal.SIGALRM, signal.SIG_IGN)
+    time.sleep(seconds)
+    return "finished"
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(render_pool_module, "_KILL_GRACE_SECONDS", 0.5)
+    pool = RenderPool(workers=1, max_queue=2, timeout_seconds=0.3)
+    yield pool
+    pool.shutdown()
+
+
+def _run(pool, fn, *args):
+    async def scenario():
+        return await pool.run(fn, *args)
+
+    return asyncio.run(scenario())
+
+
+def test_overrun_is_aborted_in_the_worker_and_the_pool_keeps_working(pool):
+    assert _run(pool, _square, 3) == 9
+    with pytest.raises(HTTPException) as exc:
+        _run(pool, _busy, 10)
+    assert exc.value.status_code == 504
+    assert _run(pool, _square, 4) == 16
+    stats = pool.stats()
+    assert stats["timed_out"] == 1 and stats["recycled"] == 0
+    assert stats["completed"] == 2 and stats["pending"] == 0
+
+
+def test_stuck_render_is_killed_and_the_pool_comes_back(pool):
+    assert _run(pool, _square, 3) == 9
+    started = time.monotonic()
+    with pytest.raises(HTTPException) as exc:
+        _run(pool, _stuck, 60)
+    assert exc.value.status_code == 504
+    assert time.monotonic() - started < 10
+    assert _run(pool, _square, 5) == 25
+    stats = pool.stats()
+    assert stats["timed_out"] == 1 and stats["recycled"] == 1
+    assert stats["completed"] == 2 and stats["pending"] == 0
@@ -0,0 +1,126 @@
+import gzip
+import math
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.services import tracks
+from app.services.paddock_index import M_PER_DEG_LAT, M_PER_DEG_LNG_EQUATOR
+from app.services.tracks import _HEADER, decode_track, encode_track, segment_flags, track_metrics
+
+LAT0, LNG0 = -36.0, 144.0
+KX = M_PER_DEG_LNG_EQUATOR * math.cos(math.radians(LAT0))
+
+
+def _fixes(x_m, y_m, t_s):
+    """Fixes at local east/north metres from (LAT0, LNG0), at times in seconds."""
+    x_m, y_m = np.asarray(x_m, dtype=float), np.asarray(y_m, dtype=float)
+    t_ms = 1_700_000_000_000 + np.round(np.asarray(t_s, dtype=float) * 1000).astype(np.int64)
+    return t_ms, LAT0 + y_m / M_PER_DEG_LAT, LNG0 + x_m / KX
+
+
+def test_round_trip_keeps_fixes_to_the_grid():
+    t_ms = [1_700_000_000_000, 1_700_000_001_000, 1_700_000_001_500]
+    lat = [-36.1234567, -36.1234501, -36.1233001]
+    lng = [144.7654321, 144.7654399, 144.7655001]
+    track, data = decode_track(encode_track(t_ms, lat, lng), max_points=10)
+    assert data[:4] == b"SPTK"
+    assert track.t_ms.tolist() == t_ms
+    np.testing.assert_allclose(track.lat, lat, atol=1e-7)
+    np.testing.assert_allclose(track.lng, lng, atol=1e-7)
+    assert track.boom_on is None
+    assert track.started_at.timestamp() == 1_700_000_000
+    assert track.ended_at.timestamp() == 1_700_000_001.5
+
+
+def test_round_trip_with_boom_and_gzip():
+    encoded = encode_track([0, 1000, 2000, 3000], [-36.0] * 4, [144.0, 144.0001, 144.0002, 144.0003], [1, 0, 1, 1])
+    track, data = decode_track(gzip.compress(encoded), max_points=10)
+    assert data == encoded
+    assert track.boom_on.tolist() == [True, False, True, True]
+
+
+@pytest.mark.parametrize(
+    ("data", "message"),
+    [
+        (b"SPTK", "too short"),
+        (b"XXXX" + encode_track([0, 1], [0, 0], [0, 0])[4:], "unknown format"),
+        (encode_track([0], [0], [0]), "at least two"),
+        (encode_track([0, 1], [0, 0], [0, 0])[:-1], "expected"),
+        (encode_track([1000, 0], [0, 0], [0, 0]), "backwards"),
+        (encode_track([0, 1], [0, 91], [0, 0]), "out of range"),
+        (b"\x1f\x8bnot gzip", "bad gzip"),
+    ],
+)
+def test_decode_rejects_bad_uploads(data, message):
+    with pytest.raises(HTTPException) as exc:
+        decode_track(data, max_points=10)
+    assert exc.value.status_code == 400
+    assert message in exc.value.detail
+
+
+def test_decode_bounds_points_before_and_after_gzip():
+    encoded = encode_track(np.arange(20) * 1000, np.zeros(20), np.zeros(20))
+    with pytest.raises(HTTPException, match="more than 10 points"):
+        decode_track(encoded, max_points=10)
+    # Padding compresses to almost nothing, so the limit must hold on the decompressed size.
+    with pytest.raises(HTTPException, match="more than 10 points"):
+        decode_track(gzip.compress(encoded + bytes(10_000_000)), max_points=10)
+    assert _HEADER.size + 13 * 10 == tracks.max_track_bytes(10)
+
+
+def test_segment_flags_drop_gaps_and_jumps():
+    # 1 s steps of 5 m, then a 60 s gap, then a 500 m jump in one second, then boom off.
+    x = [0, 5, 10, 15, 515, 520]
+    t = [0, 1, 2, 62, 63, 64]
+    t_ms, lat, lng = _fixes(x, [0] * 6, t)
+    track, _ = decode_track(encode_track(t_ms, lat, lng, [1, 1, 1, 1, 1, 0]), max_points=10)
+    ref_lat = float(track.lat.mean())
+    px = (track.lng - track.lng.mean()) * M_PER_DEG_LNG_EQUATOR * math.cos(math.radians(ref_lat))
+    py = (track.lat - ref_lat) * M_PER_DEG_LAT
+    dt, step, valid, sprayed = segment_flags(track, px, py)
+    assert dt.tolist() == [1, 1, 60, 1, 1]
+    np.testing.assert_allclose(step, [5, 5, 5, 500, 5], atol=0.01)
+    assert valid.tolist() == [True, True, False, False, True]
+    assert sprayed.tolist() == [True, True, False, False, True]
+
+    off = decode_track(encode_track(t_ms, lat, lng, [1, 1, 1, 1, 0, 0]), max_points=10)[0]
+    assert segment_flags(off, px, py)[3].tolist() == [True, True, False, False, False]
+
+
+def test_metrics_for_a_straight_run():
+    t_ms, lat, lng = _fixes(np.arange(0, 201, 2), np.zeros(101), np.arange(101))
+    track, _ = decode_track(encode_track(t_ms, lat, lng), max_points=200)
+    metrics = track_metrics(track, 12.0, [])
+    assert metrics["distance_m"] == pytest.approx(200, abs=0.1)
+    assert metrics["sprayed_distance_m"] == pytest.approx(200, abs=0.1)
+    assert metrics["tracked_seconds"] == 100
+    # 200 m x 12 m, give or take one raster cell along the swath edges.
+    assert metrics["covered_area_ha"] * 10_000 == pytest.approx(2400, rel=0.03)
+
+
+def test_covered_area_counts_overlap_once():
+    # Out and back along the same line sprays the same strip twice.
+    x = np.concatenate((np.arange(0, 101, 1.0), np.arange(99, -1, -1.0)))
+    t_ms, lat, lng = _fixes(x, np.zeros(len(x)), np.arange(len(x)))
+    track, _ = decode_track(encode_track(t_ms, lat, lng), max_points=500)
+    metrics = track_metrics(track, 10.0, [])
+    assert metrics["sprayed_distance_m"] == pytest.approx(200, abs=0.1)
+    assert metrics["covered_area_ha"] * 10_000 == pytest.approx(1000, rel=0.03)
+
+
+def test_covered_area_does_not_depend_on_batching(monkeypatch):
+    rng = np.random.default_rng(7)
+    x = np.cumsum(rng.uniform(-3, 5, 2000))
+    y = np.cumsum(rng.uniform(-3, 5, 2000))
+    whole = tracks._covered_area_m2(x[:-1], y[:-1], x[1:], y[1:], 24.0)
+    monkeypatch.setattr(tracks, "_RASTER_BATCH_POINTS", 1000)
+    assert tracks._covered_area_m2(x[:-1], y[:-1], x[1:], y[1:], 24.0) == whole
+
+
+def test_covered_area_edge_cases():
+    empty = np.empty(0)
+    assert tracks._covered_area_m2(empty, empty, empty, empty, 10.0) == 0.0
+    still = np.zeros(3)
+    assert tracks._covered_area_m2(still, still, still, still, 10.0) == 0.0
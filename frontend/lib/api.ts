@@ -1,5 +1,6 @@
 import {
   ApplicationSummary,
+  BackgroundJob,
   Farm,
   Mix,
   MixItem,
@@ -10,13 +11,23 @@ import {
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_BASE_URL ?? 'http://localhost:8000';
 
+export class ApiError extends Error {
+  constructor(
+    public readonly status: number,
+    message: string
+  ) {
+    super(message);
+    this.name = 'ApiError';
+  }
+}
+
 interface RequestOptions {
   method?: 'GET' | 'POST' | 'PUT' | 'PATCH' | 'DELETE';
   token?: string;
   body?: unknown;
 }
 
-async function request<T>(path: string, { method = 'GET', token, body }: RequestOptions): Promise<T> {
+async function send(path: string, { method = 'GET', token, body }: RequestOptions): Promise<Response> {
   const headers: Record<string, string> = {
     'Content-Type': 'application/json'
   };
@@ -33,9 +44,15 @@ async function request<T>(path: string, { method = 'GET', token, body }: Request
 
   if (!response.ok) {
     const text = await response.text();
-    throw new Error(text || `Request failed with status ${response.status}`);
+    throw new ApiError(response.status, text || `Request failed with status ${response.status}`);
   }
 
+  return response;
+}
+
+async function request<T>(path: string, options: RequestOptions): Promise<T> {
+  const response = await send(path, options);
+
   if (response.status === 204) {
     return undefined as T;
   }
@@ -95,9 +112,21 @@ export async function createMix(
   return request<Mix>('/api/mixes', { method: 'POST', token, body: payload });
 }
 
+const APPLICATION_PAGE_SIZE = 500;
+
 export async function fetchApplications(token: string, ownerId?: string) {
-  const query = ownerId ? `?owner_id=${ownerId}` : '';
-  return request<ApplicationSummary[]>(`/api/applications${query}`, { token });
+  // The list is paged; follow X-Next-Cursor until the last page so no records are dropped.
+  const applications: ApplicationSummary[] = [];
+  let cursor: string | null = null;
+  do {
+    const params = new URLSearchParams({ limit: String(APPLICATION_PAGE_SIZE) });
+    if (ownerId) params.set('owner_id', ownerId);
+    if (cursor) params.set('cursor', cursor);
+    const response = await send(`/api/applications?${params}`, { token });
+    applications.push(...((await response.json()) as ApplicationSummary[]));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return applications;
 }
 
 export async function createApplication(
@@ -115,11 +144,50 @@ export async function createApplication(
   return request<ApplicationSummary>('/api/applications', { method: 'POST', token, body: payload });
 }
 
-export async function finalizeApplication(token: string, applicationId: string) {
-  return request<ApplicationSummary>(`/api/applications/${applicationId}/finalize`, {
-    method: 'POST',
-    token
-  });
+export async function fetchJob(token: string, jobId: string) {
+  return request<BackgroundJob>(`/api/jobs/${jobId}`, { token });
+}
+
+const FINALIZE_TIMEOUT_MS = 5 * 60 * 1000;
+const FINALIZE_MAX_RESUBMITS = 1;
+
+export async function finalizeApplication(
+  token: string,
+  applicationId: string,
+  pollIntervalMs = 1000,
+  timeoutMs = FINALIZE_TIMEOUT_MS
+) {
+  // Finalize is accepted as a background job (render, upload, mark finalized); poll until it settles.
+  const submit = () =>
+    request<BackgroundJob>(`/api/applications/${applicationId}/finalize`, {
+      method: 'POST',
+      token
+    });
+  const deadline = Date.now() + timeoutMs;
+  let resubmits = 0;
+  let job = await submit();
+  while (job.status === 'queued' || job.status === 'running') {
+    if (Date.now() >= deadline) {
+      throw new Error('Finalize is taking too long; check the record again shortly');
+    }
+    await new Promise((resolve) => setTimeout(resolve, pollIntervalMs));
+    try {
+      job = await fetchJob(token, job.id);
+    } catch (error) {
+      // Jobs are stored server-side and an active one is never deleted, so 404 means the job is
+      // gone (past retention, or removed) rather than moved. Finalize is safe to repeat: submit it
+      // once more, which returns the active job or starts a new one, and fail if that one vanishes too.
+      if (!(error instanceof ApiError && error.status === 404) || resubmits >= FINALIZE_MAX_RESUBMITS) {
+        throw error;
+      }
+      resubmits += 1;
+      job = await submit();
+    }
+  }
+  if (job.status !== 'succeeded' || !job.result?.application) {
+    throw new Error(job.error || 'Finalize failed');
+  }
+  return job.result.application;
 }
 
 export async function fetchWeatherSnapshot(
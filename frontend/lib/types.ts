@@ -57,6 +57,8 @@ export interface WeatherSnapshot {
   temperatureC: number | null;
   humidityPct: number | null;
   fetchedAt: string;
+  cached?: boolean;
+  ageSeconds?: number;
 }
 
 export interface ApplicationSummary {
@@ -71,6 +73,22 @@ export interface ApplicationSummary {
   isLocalOnly?: boolean;
 }
 
+export interface BackgroundJob {
+  id: string;
+  kind: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  stage?: string | null;
+  completedStages: string[];
+  attempts: number;
+  error?: string | null;
+  result?: {
+    pdfUrl?: string;
+    application?: ApplicationSummary;
+  } | null;
+  createdAt: string;
+  updatedAt: string;
+}
+
 export interface ApplicationDraft {
   ownerId: string | null;
   farmId: string | null;
@@ -0,0 +1,10 @@
+/*
+  # Index for paginated application listings
+
+  `GET /api/applications` pages newest-first with a keyset on
+  (started_at, id) scoped to one owner. This index serves that scan
+  directly, so deep pages cost the same as the first one.
+*/
+
+CREATE INDEX IF NOT EXISTS idx_applications_owner_started_at
+  ON applications (owner_id, started_at DESC);
@@ -0,0 +1,18 @@
+/*
+  # Offline sync receipts
+
+  `POST /api/sync/push` records, per owner, which entity each client
+  idempotency key created. A replayed batch is answered from this table
+  without touching the application tables again.
+*/
+
+CREATE TABLE IF NOT EXISTS sync_receipts (
+  owner_id UUID NOT NULL REFERENCES owners ON DELETE CASCADE,
+  idempotency_key TEXT NOT NULL,
+  kind TEXT NOT NULL,
+  entity_id UUID NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (owner_id, idempotency_key)
+);
+
+ALTER TABLE sync_receipts ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,49 @@
+/*
+  # Delta sync
+
+  `GET /api/sync/changes` returns rows with `updated_at` after the client's
+  cursor. The API sets `updated_at` on writes it makes, and these triggers
+  also keep it current for writes made outside the API. Deletes are
+  recorded in `sync_tombstones` so clients can drop local copies.
+*/
+
+CREATE OR REPLACE FUNCTION set_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.updated_at = now();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS farms_set_updated_at ON farms;
+CREATE TRIGGER farms_set_updated_at BEFORE UPDATE ON farms
+  FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+DROP TRIGGER IF EXISTS paddocks_set_updated_at ON paddocks;
+CREATE TRIGGER paddocks_set_updated_at BEFORE UPDATE ON paddocks
+  FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+DROP TRIGGER IF EXISTS mixes_set_updated_at ON mixes;
+CREATE TRIGGER mixes_set_updated_at BEFORE UPDATE ON mixes
+  FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+DROP TRIGGER IF EXISTS applications_set_updated_at ON applications;
+CREATE TRIGGER applications_set_updated_at BEFORE UPDATE ON applications
+  FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_farms_owner_updated_at ON farms (owner_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_paddocks_owner_updated_at ON paddocks (owner_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_mixes_owner_updated_at ON mixes (owner_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_applications_owner_updated_at ON applications (owner_id, updated_at);
+
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  owner_id UUID NOT NULL REFERENCES owners ON DELETE CASCADE,
+  entity TEXT NOT NULL,
+  entity_id UUID NOT NULL,
+  deleted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_owner_deleted_at ON sync_tombstones (owner_id, deleted_at);
+
+ALTER TABLE sync_tombstones ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,20 @@
+/*
+  # Weather readings time series
+
+  The background poller appends one row per station per interval. REAL
+  columns and the (station_id, observed_at) primary key keep rows small.
+  The key also serves "latest reading" and time-range queries without
+  another index.
+*/
+
+CREATE TABLE IF NOT EXISTS weather_readings (
+  station_id UUID NOT NULL REFERENCES blynk_stations ON DELETE CASCADE,
+  observed_at TIMESTAMPTZ NOT NULL,
+  wind_speed_ms REAL,
+  wind_direction_deg REAL,
+  temp_c REAL,
+  humidity_pct REAL,
+  PRIMARY KEY (station_id, observed_at)
+);
+
+ALTER TABLE weather_readings ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,9 @@
+/*
+  # Paddock boundaries
+
+  Paddocks can carry a GeoJSON Polygon or MultiPolygon outline. The API
+  validates it on write and loads each owner's boundaries into an in-process
+  spatial index, so no PostGIS types or indexes are needed here.
+*/
+
+ALTER TABLE paddocks ADD COLUMN IF NOT EXISTS boundary JSONB;
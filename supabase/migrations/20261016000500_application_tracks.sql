@@ -0,0 +1,29 @@
+/*
+  # Application GPS tracks
+
+  One row per uploaded sprayer track. The fixes are kept in their packed,
+  delta-encoded binary form in `data` rather than as a row per point, next to
+  the distance, coverage and time-in-paddock figures computed on upload.
+*/
+
+CREATE TABLE IF NOT EXISTS application_tracks (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  owner_id UUID NOT NULL REFERENCES owners ON DELETE CASCADE,
+  application_id UUID NOT NULL REFERENCES applications ON DELETE CASCADE,
+  started_at TIMESTAMPTZ NOT NULL,
+  ended_at TIMESTAMPTZ NOT NULL,
+  point_count INTEGER NOT NULL,
+  boom_width_m REAL,
+  distance_m REAL NOT NULL,
+  sprayed_distance_m REAL NOT NULL,
+  covered_area_ha REAL,
+  tracked_seconds REAL NOT NULL,
+  paddock_seconds JSONB NOT NULL DEFAULT '{}'::jsonb,
+  data BYTEA NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS application_tracks_application_idx
+  ON application_tracks (application_id, started_at);
+
+ALTER TABLE application_tracks ENABLE ROW LEVEL SECURITY;
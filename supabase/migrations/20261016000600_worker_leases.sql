@@ -0,0 +1,17 @@
+/*
+  # Worker leases
+
+  One row per singleton background task (the weather poller). A process
+  claims or renews the row in a short transaction and may run the task until
+  `expires_at`; others skip their cycle. Unlike an advisory lock, the claim
+  does not need a connection held open while the task runs, so it also works
+  through pgbouncer in transaction mode.
+*/
+
+CREATE TABLE IF NOT EXISTS worker_leases (
+  name TEXT PRIMARY KEY,
+  holder UUID NOT NULL,
+  expires_at TIMESTAMPTZ NOT NULL
+);
+
+ALTER TABLE worker_leases ENABLE ROW LEVEL SECURITY;
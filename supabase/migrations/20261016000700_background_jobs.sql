@@ -0,0 +1,44 @@
+/*
+  # Background jobs
+
+  Finalize jobs and their stage progress, so a poll can be answered by any
+  API process and a job survives a restart. The process running a job holds
+  a lease (`lease_holder`, `lease_expires_at`) and renews it while the job
+  is queued or running. A shutdown releases the lease. Any process may claim
+  a job whose lease has expired and resume it from its first incomplete
+  stage.
+
+  At most one queued or running job exists per `(kind, key)`, so a repeated
+  finalize joins the job already in flight.
+*/
+
+CREATE TABLE IF NOT EXISTS background_jobs (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  owner_id UUID NOT NULL REFERENCES owners ON DELETE CASCADE,
+  kind TEXT NOT NULL,
+  key TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+  stage TEXT,
+  completed_stages JSONB NOT NULL DEFAULT '[]'::jsonb,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  error TEXT,
+  result JSONB,
+  lease_holder UUID,
+  lease_expires_at TIMESTAMPTZ,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS background_jobs_active_key
+  ON background_jobs (kind, key)
+  WHERE status IN ('queued', 'running');
+
+CREATE INDEX IF NOT EXISTS background_jobs_active_lease
+  ON background_jobs (lease_expires_at)
+  WHERE status IN ('queued', 'running');
+
+CREATE INDEX IF NOT EXISTS background_jobs_finished
+  ON background_jobs (updated_at)
+  WHERE status IN ('succeeded', 'failed');
+
+ALTER TABLE background_jobs ENABLE ROW LEVEL SECURITY;